@@ -0,0 +1,68 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'machines',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('cpu', sa.String(), nullable=False),
+        sa.Column('gpu', sa.String(), nullable=False),
+        sa.Column('memory', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_machines_id'), 'machines', ['id'], unique=False)
+    op.create_index(op.f('ix_machines_name'), 'machines', ['name'], unique=True)
+
+    op.create_table(
+        'simulations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'FINISHED', name='simulationstatus'), nullable=True),
+        sa.Column('machine_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['machine_id'], ['machines.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_simulations_id'), 'simulations', ['id'], unique=False)
+    op.create_index(op.f('ix_simulations_name'), 'simulations', ['name'], unique=False)
+
+    op.create_table(
+        'convergence_data',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('simulation_id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('loss_value', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['simulation_id'], ['simulations.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_convergence_data_id'), 'convergence_data', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_convergence_data_id'), table_name='convergence_data')
+    op.drop_table('convergence_data')
+    op.drop_index(op.f('ix_simulations_name'), table_name='simulations')
+    op.drop_index(op.f('ix_simulations_id'), table_name='simulations')
+    op.drop_table('simulations')
+    sa.Enum(name='simulationstatus').drop(op.get_bind(), checkfirst=True)
+    op.drop_index(op.f('ix_machines_name'), table_name='machines')
+    op.drop_index(op.f('ix_machines_id'), table_name='machines')
+    op.drop_table('machines')
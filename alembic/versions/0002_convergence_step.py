@@ -0,0 +1,41 @@
+"""add per-simulation step to convergence_data
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('convergence_data', sa.Column('step', sa.Integer(), nullable=True))
+
+    # Number existing points in their historical (timestamp, id) order
+    op.execute("""
+        UPDATE convergence_data
+        SET step = numbered.step
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY simulation_id ORDER BY timestamp, id) AS step
+            FROM convergence_data
+        ) AS numbered
+        WHERE convergence_data.id = numbered.id
+    """)
+
+    with op.batch_alter_table('convergence_data') as batch_op:
+        batch_op.alter_column('step', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index('ix_convergence_data_simulation_id_step', ['simulation_id', 'step'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('convergence_data') as batch_op:
+        batch_op.drop_index('ix_convergence_data_simulation_id_step')
+        batch_op.drop_column('step')
@@ -0,0 +1,58 @@
+"""add convergence_rollups
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+ROLLUP_LEVELS = (10, 100, 1000, 10000)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'convergence_rollups',
+        sa.Column('simulation_id', sa.Integer(), nullable=False),
+        sa.Column('level', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('min_loss', sa.Float(), nullable=False),
+        sa.Column('max_loss', sa.Float(), nullable=False),
+        sa.Column('sum_loss', sa.Float(), nullable=False),
+        sa.Column('last_loss', sa.Float(), nullable=False),
+        sa.Column('last_step', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['simulation_id'], ['simulations.id']),
+        sa.PrimaryKeyConstraint('simulation_id', 'level', 'bucket')
+    )
+
+    # Backfill rollups for series ingested before this revision
+    for level in ROLLUP_LEVELS:
+        op.execute(f"""
+            INSERT INTO convergence_rollups
+                (simulation_id, level, bucket, count, min_loss, max_loss, sum_loss, last_loss, last_step)
+            SELECT simulation_id, {level}, (step - 1) / {level}, COUNT(*),
+                   MIN(loss_value), MAX(loss_value), SUM(loss_value), 0, MAX(step)
+            FROM convergence_data
+            GROUP BY simulation_id, (step - 1) / {level}
+        """)
+    op.execute("""
+        UPDATE convergence_rollups
+        SET last_loss = (
+            SELECT cd.loss_value FROM convergence_data cd
+            WHERE cd.simulation_id = convergence_rollups.simulation_id
+              AND cd.step = convergence_rollups.last_step
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('convergence_rollups')
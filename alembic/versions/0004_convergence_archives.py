@@ -0,0 +1,34 @@
+"""add convergence_archives
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'convergence_archives',
+        sa.Column('simulation_id', sa.Integer(), nullable=False),
+        sa.Column('codec', sa.String(), nullable=False),
+        sa.Column('point_count', sa.Integer(), nullable=False),
+        sa.Column('last_step', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['simulation_id'], ['simulations.id']),
+        sa.PrimaryKeyConstraint('simulation_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('convergence_archives')
@@ -0,0 +1,38 @@
+"""add convergence_stats
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows for existing series are seeded lazily on their first read or insert
+    op.create_table(
+        'convergence_stats',
+        sa.Column('simulation_id', sa.Integer(), nullable=False),
+        sa.Column('point_count', sa.Integer(), nullable=False),
+        sa.Column('min_loss', sa.Float(), nullable=False),
+        sa.Column('min_step', sa.Integer(), nullable=False),
+        sa.Column('last_loss', sa.Float(), nullable=False),
+        sa.Column('last_step', sa.Integer(), nullable=False),
+        sa.Column('ema', sa.Float(), nullable=False),
+        sa.Column('slope', sa.Float(), nullable=False),
+        sa.Column('improved_step', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['simulation_id'], ['simulations.id']),
+        sa.PrimaryKeyConstraint('simulation_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('convergence_stats')
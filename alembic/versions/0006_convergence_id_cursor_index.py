@@ -0,0 +1,24 @@
+"""add (simulation_id, id) index to convergence_data
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_convergence_data_simulation_id_id', 'convergence_data', ['simulation_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_convergence_data_simulation_id_id', table_name='convergence_data')
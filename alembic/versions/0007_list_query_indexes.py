@@ -0,0 +1,36 @@
+"""add indexes for simulation and machine list queries
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_simulations_status_created_at', 'simulations', ['status', 'created_at', 'id'])
+    op.create_index('ix_simulations_status_updated_at', 'simulations', ['status', 'updated_at', 'id'])
+    op.create_index('ix_simulations_status_name', 'simulations', ['status', 'name', 'id'])
+    op.create_index('ix_simulations_created_at', 'simulations', ['created_at', 'id'])
+    op.create_index('ix_simulations_updated_at', 'simulations', ['updated_at', 'id'])
+    op.create_index(op.f('ix_simulations_machine_id'), 'simulations', ['machine_id'])
+    op.create_index(op.f('ix_machines_status'), 'machines', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_machines_status'), table_name='machines')
+    op.drop_index(op.f('ix_simulations_machine_id'), table_name='simulations')
+    op.drop_index('ix_simulations_updated_at', table_name='simulations')
+    op.drop_index('ix_simulations_created_at', table_name='simulations')
+    op.drop_index('ix_simulations_status_name', table_name='simulations')
+    op.drop_index('ix_simulations_status_updated_at', table_name='simulations')
+    op.drop_index('ix_simulations_status_created_at', table_name='simulations')
@@ -0,0 +1,35 @@
+"""add simulations.last_step step counter
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('simulations', sa.Column('last_step', sa.Integer(), server_default='0', nullable=False))
+
+    # Continue from the last raw point, or from the archive when the raw rows are gone
+    op.execute("""
+        UPDATE simulations
+        SET last_step = COALESCE(
+            (SELECT MAX(step) FROM convergence_data WHERE convergence_data.simulation_id = simulations.id),
+            (SELECT last_step FROM convergence_archives WHERE convergence_archives.simulation_id = simulations.id),
+            0
+        )
+    """)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('simulations') as batch_op:
+        batch_op.drop_column('last_step')
@@ -0,0 +1,26 @@
+"""add convergence_archives.max_id
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing archives keep NULL until their next archive run; id-cursor reads treat NULL as unknown
+    op.add_column('convergence_archives', sa.Column('max_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('convergence_archives') as batch_op:
+        batch_op.drop_column('max_id')
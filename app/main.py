@@ -1,8 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import simulations_router, machines_router, convergence_router, websocket_router
-from app.db.database import engine, Base
+from app.db.database import async_engine, engine, Base
 from app.db.seed_data import seed_machines
+from app.services.convergence_buffer import convergence_buffer
+from app.services.convergence_events import convergence_events
 from sqlalchemy.orm import Session
 
 # Create database tables
@@ -15,12 +18,25 @@ try:
 finally:
     db.close()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    convergence_events.start()
+    convergence_buffer.start()
+    yield
+    # Flush points still waiting in the write-behind buffer
+    await convergence_buffer.close()
+    convergence_events.stop()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title="Origen.ai Simulation Scheduling System",
     description="Backend service for managing simulations, machines, and convergence data",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -55,4 +71,4 @@ def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=True)
@@ -1,5 +1,12 @@
 from .machine import Machine
 from .simulation import Simulation
 from .convergence_data import ConvergenceData
+from .convergence_rollup import ConvergenceRollup
+from .convergence_archive import ConvergenceArchive
+from .convergence_stats import ConvergenceStats
+from .cache_version import CacheVersion
 
-__all__ = ["Machine", "Simulation", "ConvergenceData"]
+__all__ = [
+    "Machine", "Simulation", "ConvergenceData",
+    "ConvergenceRollup", "ConvergenceArchive", "ConvergenceStats", "CacheVersion"
+]
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from app.db.database import Base
+
+
+class CacheVersion(Base):
+    """Version stamp bumped by every write to a cached catalog, so other workers can spot stale copies"""
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
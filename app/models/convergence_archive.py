@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class ConvergenceArchive(Base):
+    """Compressed convergence series of a finished simulation (replaces its convergence_data rows)"""
+    __tablename__ = "convergence_archives"
+
+    simulation_id = Column(Integer, ForeignKey("simulations.id"), primary_key=True)
+    codec = Column(String, nullable=False)
+    point_count = Column(Integer, nullable=False)
+    last_step = Column(Integer, nullable=False)
+    max_id = Column(Integer, nullable=True)
+    payload = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
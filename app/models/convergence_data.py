@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, event, func, inspect, select, update
+from sqlalchemy.orm import Session, relationship
 from app.db.database import Base
+from app.models.simulation import Simulation
 
 
 class ConvergenceData(Base):
@@ -9,8 +9,65 @@ class ConvergenceData(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     simulation_id = Column(Integer, ForeignKey("simulations.id"), nullable=False)
+    step = Column(Integer, nullable=False)  # 1-based, monotonic per simulation
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     loss_value = Column(Float, nullable=False)
 
     # Relationship
     simulation = relationship("Simulation", back_populates="convergence_data")
+
+    __table_args__ = (
+        # Serves every per-simulation read: filter on simulation_id, ordered by step
+        Index("ix_convergence_data_simulation_id_step", "simulation_id", "step", unique=True),
+        # Serves incremental stream reads that resume after a point id
+        Index("ix_convergence_data_simulation_id_id", "simulation_id", "id"),
+    )
+
+
+def last_steps(db, simulation_ids) -> dict:
+    """Return {simulation_id: highest step handed out so far} for the given simulations"""
+    return dict(db.execute(
+        select(Simulation.id, Simulation.last_step).where(Simulation.id.in_(set(simulation_ids)))
+    ).all())
+
+
+def allocate_steps(db, counts: dict) -> dict:
+    """Reserve counts[simulation_id] consecutive steps per simulation; return {simulation_id: first step}.
+
+    The counter update row-locks the simulation until the transaction ends, so
+    concurrent writers to one simulation queue up instead of colliding on
+    (simulation_id, step) and on its rollup and stats rows.
+    """
+    first_steps = {}
+    # Lock in id order so writers touching several simulations cannot deadlock
+    for simulation_id in sorted(counts):
+        last_step = db.execute(
+            update(Simulation.__table__)
+            .where(Simulation.id == simulation_id)
+            # Naming updated_at keeps its onupdate from firing on every ingest
+            .values(last_step=Simulation.last_step + counts[simulation_id], updated_at=Simulation.updated_at)
+            .returning(Simulation.last_step)
+        ).scalar()
+        if last_step is None:
+            raise ValueError(f"Simulation {simulation_id} not found")
+        first_steps[simulation_id] = last_step - counts[simulation_id] + 1
+    return first_steps
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_convergence_steps(session, flush_context, instances):
+    """Number new ORM-added points after the last step handed out for their simulation"""
+    new_points = [
+        obj for obj in session.new
+        if isinstance(obj, ConvergenceData) and obj.step is None
+    ]
+    if not new_points:
+        return
+
+    counts = {}
+    for obj in new_points:
+        counts[obj.simulation_id] = counts.get(obj.simulation_id, 0) + 1
+    steps = allocate_steps(session, counts)
+    for obj in sorted(new_points, key=lambda obj: inspect(obj).insert_order):
+        obj.step = steps[obj.simulation_id]
+        steps[obj.simulation_id] += 1
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey
+from app.db.database import Base
+
+
+class ConvergenceRollup(Base):
+    """Pre-aggregated convergence bucket covering steps [bucket * level + 1, (bucket + 1) * level]"""
+    __tablename__ = "convergence_rollups"
+
+    simulation_id = Column(Integer, ForeignKey("simulations.id"), primary_key=True)
+    level = Column(Integer, primary_key=True)  # bucket width in steps
+    bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False)
+    min_loss = Column(Float, nullable=False)
+    max_loss = Column(Float, nullable=False)
+    sum_loss = Column(Float, nullable=False)
+    last_loss = Column(Float, nullable=False)
+    last_step = Column(Integer, nullable=False)
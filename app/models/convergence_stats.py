@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey
+from app.db.database import Base
+
+
+class ConvergenceStats(Base):
+    """Running convergence statistics, updated on every insert so reads never rescan the series"""
+    __tablename__ = "convergence_stats"
+
+    simulation_id = Column(Integer, ForeignKey("simulations.id"), primary_key=True)
+    point_count = Column(Integer, nullable=False, default=0)
+    min_loss = Column(Float, nullable=False)
+    min_step = Column(Integer, nullable=False)
+    last_loss = Column(Float, nullable=False)
+    last_step = Column(Integer, nullable=False)
+    ema = Column(Float, nullable=False)
+    slope = Column(Float, nullable=False, default=0.0)  # EMA of per-step loss change
+    improved_step = Column(Integer, nullable=False)  # last step that improved the minimum significantly
@@ -11,7 +11,7 @@ class Machine(Base):
     cpu = Column(String, nullable=False)
     gpu = Column(String, nullable=False)
     memory = Column(Float, nullable=False)  # in GB
-    status = Column(String, default="available")  # available, busy, maintenance
+    status = Column(String, default="available", index=True)  # available, busy, maintenance
 
     # Relationship
     simulations = relationship("Simulation", back_populates="machine")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -17,10 +17,23 @@ class Simulation(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
     status = Column(Enum(SimulationStatus), default=SimulationStatus.PENDING)
-    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=False)
+    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    last_step = Column(Integer, nullable=False, default=0, server_default="0")  # highest convergence step handed out
 
     # Relationships
     machine = relationship("Machine", back_populates="simulations")
     convergence_data = relationship("ConvergenceData", back_populates="simulation", cascade="all, delete-orphan")
+    convergence_rollups = relationship("ConvergenceRollup", cascade="all, delete-orphan")
+    convergence_archive = relationship("ConvergenceArchive", uselist=False, cascade="all, delete-orphan")
+    convergence_stats = relationship("ConvergenceStats", uselist=False, cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # List pages, with or without a status filter, read these in (sort key, id) keyset order
+        Index("ix_simulations_status_created_at", "status", "created_at", "id"),
+        Index("ix_simulations_status_updated_at", "status", "updated_at", "id"),
+        Index("ix_simulations_status_name", "status", "name", "id"),
+        Index("ix_simulations_created_at", "created_at", "id"),
+        Index("ix_simulations_updated_at", "updated_at", "id"),
+    )
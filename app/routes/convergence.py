@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import json
-from app.db.database import get_db
-from app.services.convergence_service import ConvergenceService
+from app.db.database import get_async_db, get_db
+from app.services.convergence_service import AsyncConvergenceService, ConvergenceService
+from app.services.convergence_buffer import BufferFullError, ConvergenceWriteBuffer, get_convergence_buffer
+from app.services.export_formats import EXPORT_ENCODERS, EXPORT_MEDIA_TYPES
+from app.services.json_encoding import FastJSONResponse
+from app.services.ingest_formats import IngestFormatError, IngestPayloadTooLarge, decode_packed_losses, decode_ndjson_losses
 from app.schemas.convergence_data import (
     ConvergenceDataCreate, 
     ConvergenceDataResponse,
-    ConvergenceGraphResponse
+    ConvergenceGraphResponse,
+    ConvergenceBatchCreate,
+    ConvergenceBatchResponse,
+    ConvergenceRollupResponse,
+    ConvergenceStatsResponse
 )
 
 router = APIRouter(prefix="/convergence", tags=["convergence"])
@@ -19,12 +30,134 @@ def add_convergence_data(
     db: Session = Depends(get_db)
 ):
     """Add convergence data point"""
+    # Check if simulation exists
+    from app.models.simulation import Simulation
+    simulation = db.query(Simulation).filter(Simulation.id == convergence_data.simulation_id).first()
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
     service = ConvergenceService(db)
     return service.add_convergence_data(convergence_data)
 
 
+@router.post("/data/buffered", response_model=dict)
+async def add_convergence_data_buffered(
+    convergence_data: ConvergenceDataCreate,
+    response: Response,
+    ack: str = Query("commit", pattern="^(commit|buffer)$", description="Acknowledge once committed or once buffered"),
+    db: Session = Depends(get_db),
+    buffer: ConvergenceWriteBuffer = Depends(get_convergence_buffer)
+):
+    """Add convergence data point through the write-behind buffer"""
+    # Check if simulation exists
+    from app.models.simulation import Simulation
+    simulation = await run_in_threadpool(
+        lambda: db.query(Simulation).filter(Simulation.id == convergence_data.simulation_id).first()
+    )
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    try:
+        stored = await buffer.submit(
+            convergence_data.simulation_id,
+            convergence_data.loss_value,
+            wait_for_commit=(ack == "commit")
+        )
+    except BufferFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    
+    if stored is None:
+        response.status_code = 202
+        return {"status": "buffered", **convergence_data.model_dump()}
+    return stored
+
+
+@router.post("/{simulation_id}/data/batch", response_model=ConvergenceBatchResponse)
+def add_convergence_data_batch(
+    simulation_id: int,
+    batch: ConvergenceBatchCreate,
+    db: Session = Depends(get_db)
+):
+    """Add many convergence data points in a single transaction"""
+    service = ConvergenceService(db)
+    
+    # Check if simulation exists
+    from app.models.simulation import Simulation
+    simulation = db.query(Simulation).filter(Simulation.id == simulation_id).first()
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    inserted = service.add_convergence_data_batch(simulation_id, batch.loss_values)
+    return ConvergenceBatchResponse(
+        simulation_id=simulation_id,
+        count=len(inserted),
+        ids=[row["id"] for row in inserted],
+        timestamps=[row["timestamp"] for row in inserted]
+    )
+
+
+@router.post("/{simulation_id}/data/packed", response_model=dict)
+def add_convergence_data_packed(
+    simulation_id: int,
+    payload: bytes = Body(..., media_type="application/octet-stream"),
+    dtype: str = Query("float64", description="Element type of the packed array (float64, float32)"),
+    db: Session = Depends(get_db)
+):
+    """Add convergence data points sent as a packed little-endian float array"""
+    service = ConvergenceService(db)
+    
+    # Check if simulation exists
+    from app.models.simulation import Simulation
+    simulation = db.query(Simulation).filter(Simulation.id == simulation_id).first()
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    try:
+        loss_values = decode_packed_losses(payload, dtype)
+    except IngestPayloadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    inserted = service.add_convergence_data_batch(simulation_id, loss_values)
+    return {"simulation_id": simulation_id, "count": len(inserted)}
+
+
+@router.post("/{simulation_id}/data/ndjson", response_model=dict)
+async def add_convergence_data_ndjson(
+    simulation_id: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """Add convergence data points sent as newline-delimited JSON, parsed while streaming"""
+    service = ConvergenceService(db)
+    
+    # Check if simulation exists
+    from app.models.simulation import Simulation
+    simulation = await run_in_threadpool(
+        lambda: db.query(Simulation).filter(Simulation.id == simulation_id).first()
+    )
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    try:
+        loss_values = await decode_ndjson_losses(request.stream())
+    except IngestPayloadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    inserted = await run_in_threadpool(service.add_convergence_data_batch, simulation_id, loss_values)
+    return {"simulation_id": simulation_id, "count": len(inserted)}
+
+
 @router.get("/{simulation_id}/graph", response_model=ConvergenceGraphResponse)
-def get_convergence_graph(simulation_id: int, db: Session = Depends(get_db)):
+def get_convergence_graph(
+    simulation_id: int,
+    max_points: Optional[int] = Query(None, ge=4, le=100_000, description="Downsample to at most this many points"),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$", description="Downsampling method (lttb, minmax)"),
+    db: Session = Depends(get_db)
+):
     """Get convergence graph data for a simulation"""
     service = ConvergenceService(db)
     
@@ -34,17 +167,20 @@ def get_convergence_graph(simulation_id: int, db: Session = Depends(get_db)):
     if not simulation:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
-    graph_data = service.get_convergence_graph_data(simulation_id)
-    return ConvergenceGraphResponse(**graph_data)
+    graph_data = service.get_convergence_graph_data(simulation_id, max_points=max_points, method=method)
+    # Serialized directly: the service already returns the ConvergenceGraphResponse shape
+    return FastJSONResponse(graph_data)
 
 
-@router.get("/{simulation_id}/stream")
-def stream_convergence_data(
+@router.get("/{simulation_id}/graph/rollup", response_model=ConvergenceRollupResponse)
+def get_convergence_graph_rollup(
     simulation_id: int,
-    last_timestamp: Optional[str] = None,
+    from_step: Optional[int] = Query(None, ge=1, description="First step of the range (default: first step)"),
+    to_step: Optional[int] = Query(None, ge=1, description="Last step of the range (default: latest step)"),
+    points: int = Query(500, ge=1, le=10_000, description="Minimum number of buckets wanted for the range"),
     db: Session = Depends(get_db)
 ):
-    """Stream convergence data for real-time updates"""
+    """Get convergence graph data for a step range from pre-aggregated rollups"""
     service = ConvergenceService(db)
     
     # Check if simulation exists
@@ -53,19 +189,121 @@ def stream_convergence_data(
     if not simulation:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
-    data_points = service.get_convergence_data_streaming(simulation_id, last_timestamp)
-    is_finished = service.is_simulation_finished(simulation_id)
+    return service.get_convergence_rollup_graph(simulation_id, from_step, to_step, points)
+
+
+@router.get("/{simulation_id}/stats", response_model=ConvergenceStatsResponse)
+def get_convergence_stats(simulation_id: int, db: Session = Depends(get_db)):
+    """Get running convergence statistics (min, last, EMA, slope, plateau) for a simulation"""
+    service = ConvergenceService(db)
+    
+    # Check if simulation exists
+    from app.models.simulation import Simulation
+    simulation = db.query(Simulation).filter(Simulation.id == simulation_id).first()
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation not found")
     
+    stats = service.get_convergence_stats(simulation_id) or {}
+    return ConvergenceStatsResponse(simulation_id=simulation_id, **stats)
+
+
+@router.get("/{simulation_id}/stream")
+async def stream_convergence_data(
+    simulation_id: int,
+    last_timestamp: Optional[str] = None,
+    since_id: Optional[int] = Query(None, ge=0, description="Cursor: only points after the point with this id"),
+    since_step: Optional[int] = Query(None, ge=0, description="Cursor: only points after this step"),
+    wait: float = Query(0, ge=0, le=60, description="Long-poll: seconds to wait for new points when there are none yet"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stream convergence data for real-time updates (optionally long-polling until new points arrive)"""
+    service = AsyncConvergenceService(db)
+    
+    # Check if simulation exists
+    simulation = await service.get_simulation(simulation_id)
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    data_points, is_finished = await service.wait_for_convergence_data(
+        simulation_id, last_timestamp, wait, since_id, since_step
+    )
+    
+    # Pass next_cursor back as since_id / since_step to fetch only the points that follow
+    last_point = data_points[-1] if data_points else None
     return {
         "simulation_id": simulation_id,
         "data_points": data_points,
-        "is_complete": is_finished
+        "is_complete": is_finished,
+        "next_cursor": {
+            "since_id": last_point.id if last_point is not None else since_id,
+            "since_step": last_point.step if last_point is not None else since_step
+        }
     }
 
 
 @router.get("/{simulation_id}/data", response_model=List[ConvergenceDataResponse])
-def get_convergence_data(simulation_id: int, db: Session = Depends(get_db)):
-    """Get all convergence data for a simulation"""
+def get_convergence_data(
+    simulation_id: int,
+    response: Response,
+    from_step: Optional[int] = Query(None, ge=1, description="Only points at or after this step"),
+    to_step: Optional[int] = Query(None, ge=1, description="Only points at or before this step"),
+    after_id: Optional[int] = Query(None, description="Keyset cursor: continue after the point with this id"),
+    limit: Optional[int] = Query(None, ge=1, le=100_000, description="Page size; X-Next-Cursor is set when more points may follow"),
+    tail: Optional[int] = Query(None, ge=1, le=100_000, description="Only the last N points of the window"),
+    db: Session = Depends(get_db)
+):
+    """Get convergence data for a simulation (all points, a step window, a keyset page or the tail)"""
+    service = ConvergenceService(db)
+    
+    # Check if simulation exists
+    from app.models.simulation import Simulation
+    simulation = db.query(Simulation).filter(Simulation.id == simulation_id).first()
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    if after_id is not None and service.get_step_of_point(simulation_id, after_id) is None:
+        raise HTTPException(status_code=400, detail=f"Point {after_id} not found in simulation {simulation_id}")
+    
+    data_points = service.get_convergence_data(
+        simulation_id,
+        from_step=from_step,
+        to_step=to_step,
+        after_id=after_id,
+        limit=limit,
+        tail=tail
+    )
+    
+    if limit is not None and tail is None and len(data_points) == limit:
+        response.headers["X-Next-Cursor"] = str(data_points[-1].id)
+    
+    return data_points
+
+
+@router.get("/{simulation_id}/export")
+def export_convergence_data(
+    simulation_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format (ndjson, csv)"),
+    db: Session = Depends(get_db)
+):
+    """Stream the full convergence series for a simulation as NDJSON or CSV"""
+    service = ConvergenceService(db)
+    
+    # Check if simulation exists
+    from app.models.simulation import Simulation
+    simulation = db.query(Simulation).filter(Simulation.id == simulation_id).first()
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    return StreamingResponse(
+        EXPORT_ENCODERS[format](service.iter_convergence_data(simulation_id)),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="convergence_{simulation_id}.{format}"'}
+    )
+
+
+@router.post("/{simulation_id}/archive", response_model=dict)
+def archive_convergence_data(simulation_id: int, db: Session = Depends(get_db)):
+    """Compress a finished simulation's convergence series into its archive blob"""
     service = ConvergenceService(db)
     
     # Check if simulation exists
@@ -74,7 +312,10 @@ def get_convergence_data(simulation_id: int, db: Session = Depends(get_db)):
     if not simulation:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
-    return service.get_convergence_data(simulation_id)
+    try:
+        return service.archive_convergence_data(simulation_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 
 @router.post("/{simulation_id}/add-bare-sql", response_model=dict)
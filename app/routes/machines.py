@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.db.database import get_db
 from app.services.machine_service import MachineService
 from app.schemas.machine import MachineCreate, MachineResponse
@@ -9,10 +9,13 @@ router = APIRouter(prefix="/machines", tags=["machines"])
 
 
 @router.get("/", response_model=List[MachineResponse])
-def list_machines(db: Session = Depends(get_db)):
-    """List all available machines"""
+def list_machines(
+    status: Optional[str] = Query(None, description="Filter by machine status (available, busy, maintenance)"),
+    db: Session = Depends(get_db)
+):
+    """List all machines, optionally filtered by status"""
     service = MachineService(db)
-    return service.get_machines()
+    return service.get_machines(status)
 
 
 @router.get("/{machine_id}", response_model=MachineResponse)
@@ -2,15 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.db.database import get_db
-from app.services.simulation_service import SimulationService
+from app.services.json_encoding import FastJSONResponse
+from app.services.machine_cache import machine_cache
+from app.services.simulation_service import SimulationService, encode_simulation_cursor
 from app.schemas.simulation import (
     SimulationCreate, 
     SimulationResponse, 
     SimulationUpdate, 
     SimulationListResponse
 )
-from app.models.simulation import Simulation, SimulationStatus
-from app.models.machine import Machine
+from app.models.simulation import SimulationStatus
 
 router = APIRouter(prefix="/simulations", tags=["simulations"])
 
@@ -21,7 +22,7 @@ def create_simulation(simulation: SimulationCreate, db: Session = Depends(get_db
     service = SimulationService(db)
     
     # Check if machine exists
-    machine = db.query(Machine).filter(Machine.id == simulation.machine_id).first()
+    machine = machine_cache.get(db, simulation.machine_id)
     
     if not machine:
         raise HTTPException(status_code=404, detail="Machine not found")
@@ -34,34 +35,42 @@ def list_simulations(
     status: Optional[SimulationStatus] = Query(None, description="Filter by simulation status"),
     order_by: str = Query("created_at", description="Order by field (name, created_at, updated_at)"),
     order_direction: str = Query("desc", description="Order direction (asc, desc)"),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
     size: int = Query(100, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor: next_cursor of the previous page"),
+    count: str = Query("estimated", pattern="^(exact|estimated|none)$", description="Total: exact, estimated (planner statistics on PostgreSQL) or none"),
     db: Session = Depends(get_db)
 ):
     """List all simulations with filtering and ordering"""
     service = SimulationService(db)
     
     skip = (page - 1) * size
-    simulations = service.get_simulations(
-        status=status,
-        order_by=order_by,
-        order_direction=order_direction,
-        skip=skip,
-        limit=size
-    )
+    try:
+        simulations = service.get_simulations(
+            status=status,
+            order_by=order_by,
+            order_direction=order_direction,
+            skip=skip,
+            limit=size,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Get total count
-    total_query = service.db.query(Simulation)
-    if status:
-        total_query = total_query.filter(Simulation.status == status)
-    total = total_query.count()
-    
-    return SimulationListResponse(
-        simulations=simulations,
-        total=total,
-        page=page,
-        size=size
-    )
+    total = service.count_simulations(status, estimate=count == "estimated") if count != "none" else None
+    
+    # A short page is the last one
+    next_cursor = encode_simulation_cursor(order_by, order_direction, simulations[-1]) if len(simulations) == size else None
+    
+    # Serialized directly: the service already returns the SimulationListResponse shape
+    return FastJSONResponse({
+        "simulations": simulations,
+        "total": total,
+        "page": page,
+        "size": size,
+        "next_cursor": next_cursor
+    })
 
 
 @router.get("/{simulation_id}", response_model=SimulationResponse)
@@ -101,7 +110,7 @@ def update_simulation(
     if not simulation:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
-    return simulation
+    return service.serialize(simulation)
 
 
 @router.delete("/{simulation_id}")
@@ -127,7 +136,7 @@ def create_simulation_bare_sql(
     service = SimulationService(db)
     
     # Check if machine exists
-    machine = db.query(Machine).filter(Machine.id == machine_id).first()
+    machine = machine_cache.get(db, machine_id)
     
     if not machine:
         raise HTTPException(status_code=404, detail="Machine not found")
@@ -1,117 +1,621 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import Session
-from app.db.database import get_db
-from app.services.convergence_service import ConvergenceService
-from app.models.simulation import Simulation
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from app.db.database import AsyncSessionLocal
+from app.services.convergence_service import AsyncConvergenceService
+from app.services.convergence_events import convergence_events
+from app.services.convergence_frames import BINARY_SUBPROTOCOL, encode_batch, encode_frame
+from collections import deque
+from contextlib import asynccontextmanager
+import itertools
 import json
 import asyncio
-from typing import Dict, List
+import logging
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
 
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Close code sent to subscribers dropped by the "disconnect" overflow policy
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Close code sent when a resume cursor names a point the simulation does not have
+POLICY_VIOLATION_CLOSE_CODE = 1008
+
+
+def _serialize_points(data_points) -> list:
+    return [
+        {
+            "id": data.id,
+            "step": data.step,
+            "timestamp": data.timestamp.isoformat(),
+            "loss_value": data.loss_value
+        } for data in data_points
+    ]
+
+
+class Outbound(NamedTuple):
+    """One queued frame for a subscriber.
+
+    message / binary hold a pre-encoded update (JSON and, for subscribers that
+    negotiated it, the binary frame). Items with render set are read from the
+    database when sent instead: the points in (after_step, last_step] as an
+    initial_data or snapshot message. new_data items also carry after_step, the
+    producer cursor they continue from. An item with neither ends the
+    simulation's stream. Only droppable items (new_data, snapshots) may be
+    dropped or coalesced on overflow; everything else is always delivered.
+    """
+    simulation_id: Optional[int]
+    message: Optional[str] = None
+    binary: Optional[bytes] = None
+    last_step: Optional[int] = None
+    droppable: bool = False
+    render: Optional[str] = None
+    after_step: int = 0
+
+    @property
+    def ends_stream(self) -> bool:
+        return self.message is None and self.binary is None and self.render is None
+
+
+class Subscriber:
+    """Bounded outbound queue of one socket, drained by that socket's own writer task"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, websocket: WebSocket, max_queue: int, overflow: str, binary: bool = False):
+        self.id = next(self._ids)
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.binary = binary
+        self.items: deque = deque()
+        self.ready = asyncio.Event()
+        self.overflowed = False
+        self.writer: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_queued = 0
+
+    def put(self, item: Outbound):
+        if self.overflowed:
+            return
+        if item.droppable and len(self.items) >= self.max_queue:
+            self._overflow(item)
+        else:
+            self.items.append(item)
+        self.max_queued = max(self.max_queued, len(self.items))
+        self.ready.set()
+
+    def _overflow(self, item: Outbound):
+        if self.overflow == "disconnect":
+            self.overflowed = True
+            self.dropped += len(self.items) + 1
+            self.items.clear()
+            if self.writer is not None:
+                self.writer.cancel()
+            return
+
+        if self.overflow == "drop_oldest":
+            for queued in self.items:
+                if queued.droppable:
+                    self.items.remove(queued)
+                    self.dropped += 1
+                    break
+            self.items.append(item)
+            return
+
+        # coalesce: replace every droppable update with one snapshot per simulation that covers
+        # only the steps those updates carried, from the oldest one's cursor to the newest one's
+        # last step, so the snapshot fills the gap and later updates join it exactly. Each snapshot
+        # takes the place of its simulation's first replaced update, ahead of the
+        # simulation_finished and end-of-stream items queued after it
+        kept = []
+        stale = {}
+        for queued in list(self.items) + [item]:
+            if not queued.droppable:
+                kept.append(queued)
+                continue
+            if queued.simulation_id in stale:
+                after_step, last_step = stale[queued.simulation_id]
+                stale[queued.simulation_id] = (min(after_step, queued.after_step), max(last_step, queued.last_step))
+            else:
+                stale[queued.simulation_id] = (queued.after_step, queued.last_step)
+                kept.append(queued.simulation_id)
+            if queued is not item:
+                self.coalesced += 1
+        self.coalesced += 1
+        self.items = deque(
+            queued if isinstance(queued, Outbound) else Outbound(
+                queued, last_step=stale[queued][1], droppable=True, render="snapshot", after_step=stale[queued][0]
+            )
+            for queued in kept
+        )
+
+    async def get(self) -> Outbound:
+        while not self.items:
+            self.ready.clear()
+            await self.ready.wait()
+        return self.items.popleft()
+
+    def drain(self) -> List[Outbound]:
+        items = list(self.items)
+        self.items.clear()
+        return items
+
+    def stats(self, simulation_ids: List[int]) -> dict:
+        return {
+            "id": self.id,
+            "simulation_ids": simulation_ids,
+            "overflow": self.overflow,
+            "encoding": "binary" if self.binary else "json",
+            "queued": len(self.items),
+            "max_queued": self.max_queued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced
+        }
+
+
 # Store active connections
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+    """Fans out convergence updates with one shared producer task per watched simulation.
+
+    The producer is started by the first subscriber of a simulation and cancelled
+    when the last one leaves. It sleeps until the convergence event bus reports a
+    commit for its simulation, queries the new points once and pushes the
+    already-serialized message into every subscriber's queue. poll_interval adds
+    a fallback re-check for writers that do not publish events (None disables it).
+
+    All queries go through AsyncSessions that are only open while a check runs, so
+    idle sockets hold no database connection and never block the event loop.
+
+    Broadcasting never awaits a socket: each subscriber has a bounded queue of at
+    most max_queue updates and its own writer task, so a slow client only delays
+    itself. When its queue is full, the overflow policy drops its oldest update,
+    coalesces its backlog into a fresh snapshot, or disconnects it.
+
+    Multiplexed sockets subscribe one queue to many simulations and merge whatever
+    arrived during one batch_interval into a single frame.
 
-    async def connect(self, websocket: WebSocket, simulation_id: int):
-        await websocket.accept()
-        if simulation_id not in self.active_connections:
-            self.active_connections[simulation_id] = []
-        self.active_connections[simulation_id].append(websocket)
+    Clients offering the BINARY_SUBPROTOCOL get data updates as packed binary
+    frames instead of JSON; producers only encode the binary form while such a
+    subscriber is listening.
 
-    def disconnect(self, websocket: WebSocket, simulation_id: int):
-        if simulation_id in self.active_connections:
-            self.active_connections[simulation_id].remove(websocket)
-            if not self.active_connections[simulation_id]:
-                del self.active_connections[simulation_id]
+    cursors holds the step each producer has broadcast up to. A new subscriber is
+    registered and handed an initial read bounded by that cursor in one step, so
+    its snapshot and the live updates that follow join without gaps or duplicates.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        poll_interval: Optional[float] = None,
+        batch_interval: float = 0.1,
+        max_queue: int = 256,
+        overflow: str = "coalesce"
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'")
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.batch_interval = batch_interval
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.active_connections: Dict[int, Dict[WebSocket, Subscriber]] = {}
+        self.producers: Dict[int, asyncio.Task] = {}
+        self.cursors: Dict[int, int] = {}
+        # simulation_id -> (start lock, subscribers using it)
+        self._start_locks: Dict[int, Tuple[asyncio.Lock, int]] = {}
+
+    async def connect(self, websocket: WebSocket) -> Subscriber:
+        binary = BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+        await websocket.accept(subprotocol=BINARY_SUBPROTOCOL if binary else None)
+        return Subscriber(websocket, self.max_queue, self.overflow, binary)
+
+    async def subscribe(self, subscriber: Subscriber, simulation_id: int, after_step: int = 0):
+        """Route a simulation's updates into the subscriber's queue, starting its producer if needed.
+
+        The first queued item is the subscriber's initial_data: every point after
+        after_step that the producer has already passed.
+        """
+        # Starting a producer awaits a query; concurrent subscribers of one simulation must not both start one
+        async with self._starting(simulation_id):
+            if simulation_id not in self.producers:
+                self.producers[simulation_id] = await self._start_producer(simulation_id)
+            # No await between reading the cursor and registering: nothing can be broadcast in between
+            subscriber.put(Outbound(
+                simulation_id, last_step=self.cursors[simulation_id], render="initial_data", after_step=after_step
+            ))
+            self.active_connections.setdefault(simulation_id, {})[subscriber.websocket] = subscriber
+
+    @asynccontextmanager
+    async def _starting(self, simulation_id: int):
+        """Hold the simulation's start lock, dropping it once no subscriber is using it"""
+        lock, users = self._start_locks.get(simulation_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._start_locks[simulation_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._start_locks[simulation_id]
+            if users == 1:
+                del self._start_locks[simulation_id]
+            else:
+                self._start_locks[simulation_id] = (lock, users - 1)
+
+    def disconnect(self, websocket: WebSocket, simulation_id: int) -> Optional[asyncio.Task]:
+        """Stop routing a simulation's updates to the socket, cancelling the producer after its last subscriber.
+
+        Returns the cancelled producer, if any.
+        """
+        subscribers = self.active_connections.get(simulation_id)
+        if subscribers is None:
+            return None
+        subscribers.pop(websocket, None)
+        if subscribers:
+            return None
+        del self.active_connections[simulation_id]
+        producer = self.producers.pop(simulation_id, None)
+        self.cursors.pop(simulation_id, None)
+        if producer is not None:
+            producer.cancel()
+        return producer
+
+    async def release(self, websocket: WebSocket, simulation_ids: Iterable[int]):
+        """Disconnect the socket from the simulations and wait for the producers this stopped.
+
+        Endpoints call this as the socket closes, so a producer's in-flight read
+        releases its connection before the endpoint (and possibly its event loop) ends.
+        """
+        producers = {self.disconnect(websocket, simulation_id) for simulation_id in simulation_ids} - {None}
+        if producers:
+            await asyncio.wait(producers)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
-    async def broadcast_to_simulation(self, message: str, simulation_id: int):
-        if simulation_id in self.active_connections:
-            for connection in self.active_connections[simulation_id]:
-                try:
-                    await connection.send_text(message)
-                except:
-                    # Remove broken connections
-                    self.active_connections[simulation_id].remove(connection)
+    def broadcast_to_simulation(
+        self,
+        message: Optional[str],
+        simulation_id: int,
+        last_step: Optional[int] = None,
+        binary: Optional[bytes] = None,
+        after_step: int = 0
+    ):
+        """Queue a message for every subscriber of a simulation (None ends their streams)"""
+        item = Outbound(simulation_id, message, binary, last_step, droppable=last_step is not None, after_step=after_step)
+        for subscriber in list(self.active_connections.get(simulation_id, {}).values()):
+            subscriber.put(item)
 
-manager = ConnectionManager()
+    def wants_binary(self, simulation_id: int) -> bool:
+        return any(subscriber.binary for subscriber in self.active_connections.get(simulation_id, {}).values())
 
+    def connection_stats(self) -> List[dict]:
+        """Lag counters of every connected subscriber"""
+        subscribers: Dict[int, Subscriber] = {}
+        simulation_ids: Dict[int, List[int]] = {}
+        for simulation_id, connections in self.active_connections.items():
+            for subscriber in connections.values():
+                subscribers[subscriber.id] = subscriber
+                simulation_ids.setdefault(subscriber.id, []).append(simulation_id)
+        return [
+            subscriber.stats(sorted(simulation_ids[subscriber_id]))
+            for subscriber_id, subscriber in sorted(subscribers.items())
+        ]
 
-@router.websocket("/convergence/{simulation_id}")
-async def websocket_convergence_endpoint(websocket: WebSocket, simulation_id: int):
-    """WebSocket endpoint for real-time convergence graph updates"""
-    await manager.connect(websocket, simulation_id)
-    
-    try:
-        # Check if simulation exists
-        db = next(get_db())
-        simulation = db.query(Simulation).filter(Simulation.id == simulation_id).first()
-        if not simulation:
-            await websocket.send_text(json.dumps({"error": "Simulation not found"}))
-            await websocket.close()
-            return
-        
-        # Send initial data
-        service = ConvergenceService(db)
-        initial_data = service.get_convergence_data(simulation_id)
-        
-        await websocket.send_text(json.dumps({
-            "type": "initial_data",
-            "simulation_id": simulation_id,
-            "data_points": [
-                {
-                    "id": data.id,
-                    "timestamp": data.timestamp.isoformat(),
-                    "loss_value": data.loss_value
-                } for data in initial_data
-            ]
-        }))
-        
-        # Keep connection alive and send periodic updates
-        last_timestamp = None
-        while True:
-            try:
-                # Check for new data every 2 seconds
-                await asyncio.sleep(2)
-                
-                new_data = service.get_convergence_data_streaming(simulation_id, last_timestamp)
-                is_finished = service.is_simulation_finished(simulation_id)
-                
-                if new_data:
-                    last_timestamp = new_data[-1].timestamp.isoformat()
-                    
-                    await manager.broadcast_to_simulation(json.dumps({
+    async def read(self, query):
+        """Run query(service) in its own AsyncSession.
+
+        The read is shielded, so a caller cancelled mid-query (e.g. a producer whose
+        last subscriber left) waits for it to finish and close the session instead
+        of abandoning a connection with an open transaction.
+        """
+        async def run():
+            async with self.session_factory() as db:
+                return await query(AsyncConvergenceService(db))
+        task = asyncio.ensure_future(run())
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            await asyncio.wait({task})
+            raise
+
+    async def _start_producer(self, simulation_id: int) -> asyncio.Task:
+        # Listen for commits before taking the cursor so none can slip in between
+        wakeup = convergence_events.subscribe(simulation_id)
+        try:
+            last_step = await self.read(lambda service: service.get_last_step(simulation_id))
+        except BaseException:
+            convergence_events.unsubscribe(simulation_id, wakeup)
+            raise
+        self.cursors[simulation_id] = last_step
+        producer = asyncio.create_task(self._produce(simulation_id, wakeup, last_step))
+        # Also runs when the task is cancelled before it ever started
+        producer.add_done_callback(lambda _: convergence_events.unsubscribe(simulation_id, wakeup))
+        return producer
+
+    async def _produce(self, simulation_id: int, wakeup: asyncio.Event, last_step: int):
+        try:
+            while True:
+                new_data, is_finished = await self.read(lambda service: self._check(service, simulation_id, last_step))
+                data_points = _serialize_points(new_data)
+
+                if data_points:
+                    after_step, last_step = last_step, data_points[-1]["step"]
+                    binary = encode_frame(
+                        "new_data", simulation_id, new_data, is_finished
+                    ) if self.wants_binary(simulation_id) else None
+                    self.cursors[simulation_id] = last_step
+                    self.broadcast_to_simulation(json.dumps({
                         "type": "new_data",
                         "simulation_id": simulation_id,
-                        "data_points": [
-                            {
-                                "id": data.id,
-                                "timestamp": data.timestamp.isoformat(),
-                                "loss_value": data.loss_value
-                            } for data in new_data
-                        ],
+                        "data_points": data_points,
                         "is_complete": is_finished
-                    }), simulation_id)
-                
+                    }), simulation_id, last_step=last_step, binary=binary, after_step=after_step)
+
                 if is_finished:
-                    await manager.broadcast_to_simulation(json.dumps({
+                    self.broadcast_to_simulation(json.dumps({
                         "type": "simulation_finished",
                         "simulation_id": simulation_id
                     }), simulation_id)
                     break
-                    
-            except Exception as e:
-                print(f"Error in WebSocket loop: {e}")
-                break
-                
+
+                await self._wait_for_change(wakeup)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Convergence producer for simulation %s failed: %s", simulation_id, e)
+
+        self.broadcast_to_simulation(None, simulation_id)
+        if self.producers.get(simulation_id) is asyncio.current_task():
+            del self.producers[simulation_id]
+            del self.cursors[simulation_id]
+
+    @staticmethod
+    async def _check(service: AsyncConvergenceService, simulation_id: int, last_step: int):
+        new_data = await service.get_convergence_data(simulation_id, from_step=last_step + 1)
+        return new_data, await service.is_simulation_finished(simulation_id)
+
+    async def _wait_for_change(self, wakeup: asyncio.Event):
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+
+
+manager = ConnectionManager(
+    max_queue=int(os.getenv("WS_MAX_QUEUE", "256")),
+    overflow=os.getenv("WS_OVERFLOW_POLICY", "coalesce")
+)
+
+
+@router.get("/stats", response_model=dict)
+def get_websocket_stats():
+    """Per-connection queue depth and drop counters"""
+    return {"connections": manager.connection_stats()}
+
+
+def _points_message(subscriber: Subscriber, kind: str, simulation_id: int, points) -> Union[str, bytes]:
+    """Encode an initial_data / snapshot message in the subscriber's negotiated format"""
+    if subscriber.binary:
+        return encode_frame(kind, simulation_id, points)
+    return json.dumps({
+        "type": kind,
+        "simulation_id": simulation_id,
+        "data_points": _serialize_points(points)
+    })
+
+
+async def _render(subscriber: Subscriber, item: Outbound) -> Union[str, bytes]:
+    """Frame to send for a queued item in the subscriber's format"""
+    if item.render is None:
+        if subscriber.binary and item.binary is not None:
+            return item.binary
+        return item.message
+
+    points = await manager.read(lambda service: service.get_convergence_data(
+        item.simulation_id, from_step=item.after_step + 1, to_step=item.last_step
+    ))
+    return _points_message(subscriber, item.render, item.simulation_id, points)
+
+
+async def _send(subscriber: Subscriber, message: Union[str, bytes]):
+    if isinstance(message, bytes):
+        await subscriber.websocket.send_bytes(message)
+    else:
+        await subscriber.websocket.send_text(message)
+    subscriber.sent += 1
+
+
+async def _forward_updates(subscriber: Subscriber):
+    while True:
+        item = await subscriber.get()
+        if item.ends_stream:
+            return
+        await _send(subscriber, await _render(subscriber, item))
+
+
+async def _forward_batches(subscriber: Subscriber, subscriptions: Set[int]):
+    """Send everything queued during one batch interval as a single merged frame"""
+    while True:
+        items = [await subscriber.get()]
+        await asyncio.sleep(manager.batch_interval)
+        items.extend(subscriber.drain())
+
+        updates = []
+        frames = []
+        for item in items:
+            if item.simulation_id is None:
+                # Command replies go out on their own, ahead of the batch
+                await _send(subscriber, item.message)
+            elif item.simulation_id not in subscriptions:
+                continue
+            elif item.ends_stream:
+                # The simulation's producer finished
+                subscriptions.discard(item.simulation_id)
+                manager.disconnect(subscriber.websocket, item.simulation_id)
+            else:
+                message = await _render(subscriber, item)
+                if isinstance(message, bytes):
+                    frames.append(message)
+                else:
+                    updates.append(message)
+
+        if frames:
+            await _send(subscriber, encode_batch(frames))
+        if updates:
+            # Messages are already serialized once per producer; splice them rather than re-encode
+            await _send(subscriber, '{"type": "batch", "updates": [' + ", ".join(updates) + "]}")
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+async def _relay(subscriber: Subscriber, forward, receive) -> bool:
+    """Run a socket's writer and reader until either ends; returns whether the writer finished the stream"""
+    subscriber.writer = asyncio.create_task(forward)
+    reader = asyncio.create_task(receive)
+    done, pending = await asyncio.wait({subscriber.writer, reader}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    if subscriber.overflowed:
+        await subscriber.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Subscriber queue overflowed")
+        return False
+    for task in done:
+        task.result()
+    return subscriber.writer in done
+
+
+@router.websocket("/convergence/{simulation_id}")
+async def websocket_convergence_endpoint(
+    websocket: WebSocket,
+    simulation_id: int,
+    after_step: Optional[int] = Query(None, ge=0, description="Resume after the last step the client has"),
+    after_id: Optional[int] = Query(None, description="Resume after the last point id the client has")
+):
+    """WebSocket endpoint for real-time convergence graph updates"""
+    subscriber = await manager.connect(websocket)
+
+    try:
+        # Check if simulation exists
+        simulation = await manager.read(lambda service: service.get_simulation(simulation_id))
+        if simulation is None:
+            await websocket.send_text(json.dumps({"error": "Simulation not found"}))
+            await websocket.close()
+            return
+
+        if after_id is not None:
+            after_step = await manager.read(lambda service: service.get_step_of_point(simulation_id, after_id))
+            if after_step is None:
+                await websocket.send_text(json.dumps({"error": f"Point {after_id} not found in simulation {simulation_id}"}))
+                await websocket.close(code=POLICY_VIOLATION_CLOSE_CODE)
+                return
+
+        # Initial data (only the points after the resume cursor) is the first queued item
+        await manager.subscribe(subscriber, simulation_id, after_step or 0)
+
+        # Relay the shared producer's updates until it finishes or the client leaves
+        if await _relay(subscriber, _forward_updates(subscriber), _wait_for_disconnect(websocket)):
+            await websocket.close()
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.warning("WebSocket error: %s", e)
+    finally:
+        await manager.release(websocket, [simulation_id])
+
+
+async def _subscribe_many(
+    subscriber: Subscriber,
+    subscriptions: Set[int],
+    simulation_ids: List[int],
+    after_steps: Dict[int, int]
+):
+    new_ids = [simulation_id for simulation_id in dict.fromkeys(simulation_ids) if simulation_id not in subscriptions]
+    existing = await manager.read(lambda service: service.get_existing_simulation_ids(new_ids)) if new_ids else set()
+    subscribed = [simulation_id for simulation_id in new_ids if simulation_id in existing]
+
+    for simulation_id in subscribed:
+        subscriptions.add(simulation_id)
+        await manager.subscribe(subscriber, simulation_id, after_steps.get(simulation_id, 0))
+
+    subscriber.put(Outbound(None, json.dumps({
+        "type": "subscribed",
+        "simulation_ids": sorted(subscriptions),
+        "not_found": [simulation_id for simulation_id in new_ids if simulation_id not in existing]
+    })))
+
+
+def _unsubscribe_many(subscriber: Subscriber, subscriptions: Set[int], simulation_ids: List[int]):
+    for simulation_id in simulation_ids:
+        if simulation_id in subscriptions:
+            subscriptions.discard(simulation_id)
+            manager.disconnect(subscriber.websocket, simulation_id)
+    subscriber.put(Outbound(None, json.dumps({
+        "type": "unsubscribed",
+        "simulation_ids": sorted(subscriptions)
+    })))
+
+
+def _parse_command(text: str):
+    try:
+        command = json.loads(text)
+        action = command["action"]
+        simulation_ids = [int(simulation_id) for simulation_id in command["simulation_ids"]]
+        after_steps = {
+            int(simulation_id): max(int(step), 0)
+            for simulation_id, step in command.get("after_steps", {}).items()
+        }
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None, None, None
+    if action not in ("subscribe", "unsubscribe"):
+        return None, None, None
+    return action, simulation_ids, after_steps
+
+
+async def _handle_commands(subscriber: Subscriber, subscriptions: Set[int]):
+    while True:
+        message = await subscriber.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        action, simulation_ids, after_steps = _parse_command(message.get("text") or "")
+        if action == "subscribe":
+            await _subscribe_many(subscriber, subscriptions, simulation_ids, after_steps)
+        elif action == "unsubscribe":
+            _unsubscribe_many(subscriber, subscriptions, simulation_ids)
+        else:
+            subscriber.put(Outbound(None, json.dumps({
+                "type": "error",
+                "detail": 'Expected {"action": "subscribe" | "unsubscribe", "simulation_ids": [...], "after_steps": {...}}'
+            })))
+
+
+@router.websocket("/convergence")
+async def websocket_multiplexed_convergence_endpoint(websocket: WebSocket):
+    """WebSocket endpoint streaming many simulations' convergence updates over one socket"""
+    subscriber = await manager.connect(websocket)
+    subscriptions: Set[int] = set()
+
+    try:
+        await _relay(
+            subscriber,
+            _forward_batches(subscriber, subscriptions),
+            _handle_commands(subscriber, subscriptions)
+        )
+
     except WebSocketDisconnect:
-        manager.disconnect(websocket, simulation_id)
+        pass
     except Exception as e:
-        print(f"WebSocket error: {e}")
-        manager.disconnect(websocket, simulation_id)
+        logger.warning("WebSocket error: %s", e)
     finally:
-        db.close()
+        await manager.release(websocket, list(subscriptions))
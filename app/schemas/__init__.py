@@ -1,9 +1,13 @@
 from .machine import Machine, MachineCreate, MachineResponse
 from .simulation import Simulation, SimulationCreate, SimulationResponse, SimulationUpdate
-from .convergence_data import ConvergenceData, ConvergenceDataCreate, ConvergenceDataResponse
+from .convergence_data import (
+    ConvergenceData, ConvergenceDataCreate, ConvergenceDataResponse,
+    ConvergenceBatchCreate, ConvergenceBatchResponse
+)
 
 __all__ = [
     "Machine", "MachineCreate", "MachineResponse",
     "Simulation", "SimulationCreate", "SimulationResponse", "SimulationUpdate",
-    "ConvergenceData", "ConvergenceDataCreate", "ConvergenceDataResponse"
+    "ConvergenceData", "ConvergenceDataCreate", "ConvergenceDataResponse",
+    "ConvergenceBatchCreate", "ConvergenceBatchResponse"
 ]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -14,6 +14,7 @@ class ConvergenceDataCreate(ConvergenceDataBase):
 
 class ConvergenceDataResponse(ConvergenceDataBase):
     id: int
+    step: int
     timestamp: datetime
 
     class Config:
@@ -22,6 +23,7 @@ class ConvergenceDataResponse(ConvergenceDataBase):
 
 class ConvergenceData(ConvergenceDataBase):
     id: int
+    step: int
     timestamp: datetime
 
     class Config:
@@ -32,3 +34,46 @@ class ConvergenceGraphResponse(BaseModel):
     simulation_id: int
     data_points: List[ConvergenceDataResponse]
     is_complete: bool
+    total_points: Optional[int] = None
+
+
+class ConvergenceBatchCreate(BaseModel):
+    loss_values: List[float] = Field(..., min_length=1, max_length=100_000)
+
+
+class ConvergenceBatchResponse(BaseModel):
+    simulation_id: int
+    count: int
+    ids: List[int]
+    timestamps: List[datetime]
+
+
+class ConvergenceRollupBucket(BaseModel):
+    start_step: int
+    end_step: int
+    count: int
+    min_loss: float
+    max_loss: float
+    mean_loss: float
+    last_loss: float
+
+
+class ConvergenceRollupResponse(BaseModel):
+    simulation_id: int
+    level: int
+    from_step: int
+    to_step: int
+    buckets: List[ConvergenceRollupBucket]
+
+
+class ConvergenceStatsResponse(BaseModel):
+    simulation_id: int
+    point_count: int = 0
+    min_loss: Optional[float] = None
+    min_step: Optional[int] = None
+    last_loss: Optional[float] = None
+    last_step: Optional[int] = None
+    ema: Optional[float] = None
+    slope: Optional[float] = None
+    steps_since_improvement: Optional[int] = None
+    plateau: bool = False
@@ -42,6 +42,7 @@ class Simulation(SimulationBase):
 
 class SimulationListResponse(BaseModel):
     simulations: List[SimulationResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     size: int
+    next_cursor: Optional[str] = None
@@ -0,0 +1,114 @@
+"""
+Compact codec for archived convergence series.
+
+A series is stored as one zlib-compressed blob holding delta-encoded ids,
+steps and microsecond timestamps (int64) followed by float32 losses. Deltas of
+a regular series are small and repetitive, so they compress to a few bytes
+per point.
+"""
+import struct
+import zlib
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+import numpy as np
+
+ARCHIVE_CODEC = "zlib-delta-v1"
+_HEADER = struct.Struct("<IB")  # point count, timestamps-are-tz-aware flag
+
+
+def _to_utc_naive(timestamp) -> datetime:
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+class ArchivedSeries:
+    """Decoded archive: parallel NumPy arrays sorted by step"""
+
+    def __init__(self, ids: np.ndarray, steps: np.ndarray, timestamps: np.ndarray, losses: np.ndarray, tz_aware: bool):
+        self.ids = ids
+        self.steps = steps
+        self.timestamps = timestamps  # datetime64[us], UTC
+        self.losses = losses
+        self.tz_aware = tz_aware
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    @classmethod
+    def from_points(cls, points: Sequence) -> "ArchivedSeries":
+        """Build from step-ordered objects with id, step, timestamp and loss_value"""
+        count = len(points)
+        return cls(
+            ids=np.fromiter((point.id for point in points), dtype=np.int64, count=count),
+            steps=np.fromiter((point.step for point in points), dtype=np.int64, count=count),
+            timestamps=np.array([_to_utc_naive(point.timestamp) for point in points], dtype="datetime64[us]"),
+            losses=np.fromiter((point.loss_value for point in points), dtype=np.float32, count=count),
+            tz_aware=any(getattr(point.timestamp, "tzinfo", None) is not None for point in points)
+        )
+
+    @classmethod
+    def concatenate(cls, first: "ArchivedSeries", second: "ArchivedSeries") -> "ArchivedSeries":
+        return cls(
+            ids=np.concatenate([first.ids, second.ids]),
+            steps=np.concatenate([first.steps, second.steps]),
+            timestamps=np.concatenate([first.timestamps, second.timestamps]),
+            losses=np.concatenate([first.losses, second.losses]),
+            tz_aware=first.tz_aware or second.tz_aware
+        )
+
+    def encode(self) -> bytes:
+        columns = [
+            np.diff(self.ids, prepend=0),
+            np.diff(self.steps, prepend=0),
+            np.diff(self.timestamps.astype(np.int64), prepend=0)
+        ]
+        body = b"".join(column.astype("<i8").tobytes() for column in columns) + self.losses.astype("<f4").tobytes()
+        return _HEADER.pack(len(self), int(self.tz_aware)) + zlib.compress(body)
+
+    @classmethod
+    def decode(cls, payload: bytes) -> "ArchivedSeries":
+        count, tz_aware = _HEADER.unpack_from(payload)
+        body = zlib.decompress(memoryview(payload)[_HEADER.size:])
+        ints = np.frombuffer(body, dtype="<i8", count=3 * count).reshape(3, count)
+        return cls(
+            ids=np.cumsum(ints[0]),
+            steps=np.cumsum(ints[1]),
+            timestamps=np.cumsum(ints[2]).astype("datetime64[us]"),
+            losses=np.frombuffer(body, dtype="<f4", offset=3 * count * 8, count=count),
+            tz_aware=bool(tz_aware)
+        )
+
+    def datetimes(self, indices: np.ndarray) -> List[datetime]:
+        values = self.timestamps[indices].tolist()
+        if self.tz_aware:
+            return [value.replace(tzinfo=timezone.utc) for value in values]
+        return values
+
+    def select(
+        self,
+        from_step: Optional[int] = None,
+        to_step: Optional[int] = None,
+        after_step: Optional[int] = None,
+        after_timestamp: Optional[str] = None
+    ) -> np.ndarray:
+        """Indices of points matching the given step / timestamp bounds"""
+        lo = 0
+        hi = len(self.steps)
+        if from_step is not None:
+            lo = max(lo, int(np.searchsorted(self.steps, from_step, side="left")))
+        if after_step is not None:
+            lo = max(lo, int(np.searchsorted(self.steps, after_step, side="right")))
+        if to_step is not None:
+            hi = min(hi, int(np.searchsorted(self.steps, to_step, side="right")))
+        indices = np.arange(lo, max(lo, hi))
+        if after_timestamp is not None:
+            cutoff = np.datetime64(_to_utc_naive(after_timestamp), "us")
+            indices = indices[self.timestamps[indices] > cutoff]
+        return indices
+
+    def step_of(self, point_id: int) -> Optional[int]:
+        matches = np.flatnonzero(self.ids == point_id)
+        return int(self.steps[matches[0]]) if len(matches) else None
@@ -0,0 +1,153 @@
+"""
+Write-behind buffer that coalesces single convergence points into bulk inserts.
+
+Points submitted from many requests are queued in memory and written by one
+background task every ``flush_interval_ms`` or as soon as ``max_batch_rows``
+points are waiting, whichever comes first.
+"""
+import asyncio
+import logging
+import os
+from typing import Callable, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
+from app.services.convergence_service import ConvergenceService
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFullError(Exception):
+    """Raised when the buffer is at capacity and cannot accept more points"""
+
+
+class ConvergenceWriteBuffer:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_interval_ms: int = 50,
+        max_batch_rows: int = 1000,
+        max_pending_rows: int = 10000
+    ):
+        self.session_factory = session_factory
+        self.flush_interval_ms = flush_interval_ms
+        self.max_batch_rows = max_batch_rows
+        self.max_pending_rows = max_pending_rows
+        self._pending: List[Tuple[dict, Optional[asyncio.Future]]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        """Start the background flush task on the running event loop"""
+        if self._task is None:
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the background task and write out everything still queued"""
+        if self._task is None:
+            return
+        # Let an in-flight flush finish instead of cancelling it: its batch is no longer in _pending
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        await self.flush()
+        self._task = None
+
+    async def submit(self, simulation_id: int, loss_value: float, wait_for_commit: bool = True) -> Optional[dict]:
+        """Queue a point; when wait_for_commit is set, return the stored row once it is committed"""
+        self.start()
+        if len(self._pending) >= self.max_pending_rows:
+            raise BufferFullError(f"Convergence write buffer is full ({self.max_pending_rows} points pending)")
+
+        future = asyncio.get_running_loop().create_future() if wait_for_commit else None
+        self._pending.append(({"simulation_id": simulation_id, "loss_value": loss_value}, future))
+        if len(self._pending) == 1 or len(self._pending) >= self.max_batch_rows:
+            self._wakeup.set()
+
+        if future is not None:
+            return await future
+        return None
+
+    async def flush(self):
+        """Write all queued points in chunks of at most max_batch_rows"""
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.max_batch_rows]
+                del self._pending[:self.max_batch_rows]
+                await self._write_batch(batch)
+
+    async def _run(self):
+        while not self._closing:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self._pending) < self.max_batch_rows and not self._closing:
+                # Give other requests a chance to join this batch
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Convergence write buffer flush failed")
+
+    async def _write_batch(self, batch: List[Tuple[dict, Optional[asyncio.Future]]]):
+        try:
+            await self._write_points(batch)
+        finally:
+            # Never leave a caller waiting, even if the flush was cancelled mid-write
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(RuntimeError("Convergence write buffer stopped before the point was confirmed"))
+
+    async def _write_points(self, batch: List[Tuple[dict, Optional[asyncio.Future]]]):
+        points = [point for point, _ in batch]
+        try:
+            results = await run_in_threadpool(self._write, points)
+        except Exception:
+            # One bad point (e.g. a deleted simulation) must not sink the whole batch
+            logger.warning("Bulk flush of %d points failed, retrying individually", len(points), exc_info=True)
+            for point, future in batch:
+                try:
+                    result = (await run_in_threadpool(self._write, [point]))[0]
+                except Exception as exc:
+                    logger.error("Dropping convergence point %s: %s", point, exc)
+                    if future is not None and not future.done():
+                        future.set_exception(exc)
+                    continue
+                if future is not None and not future.done():
+                    future.set_result(result)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    def _write(self, points: List[dict]) -> List[dict]:
+        db = self.session_factory()
+        try:
+            return ConvergenceService(db).add_convergence_data_bulk(points)
+        finally:
+            db.close()
+
+
+convergence_buffer = ConvergenceWriteBuffer(
+    SessionLocal,
+    flush_interval_ms=int(os.getenv("CONVERGENCE_BUFFER_FLUSH_MS", "50")),
+    max_batch_rows=int(os.getenv("CONVERGENCE_BUFFER_MAX_BATCH", "1000")),
+    max_pending_rows=int(os.getenv("CONVERGENCE_BUFFER_CAPACITY", "10000"))
+)
+
+
+def get_convergence_buffer() -> ConvergenceWriteBuffer:
+    return convergence_buffer
@@ -0,0 +1,258 @@
+"""
+Change notifications for convergence series.
+
+Writers call ``convergence_events.notify(db, simulation_ids)`` inside their
+transaction; once it commits, every asyncio waiter subscribed to one of those
+simulations is woken. Notifications carry no data, so bursts of commits
+coalesce into a single wake-up per waiter, and the ids of one transaction are
+sent to the broker once, when it commits.
+
+Each worker process has one ``ConvergenceEventBus`` holding its local waiters.
+Buses exchange notifications through a broker:
+
+- ``InMemoryBroker`` relays between buses in the same process (a single worker,
+  or several simulated workers in tests).
+- ``PostgresBroker`` relays between processes with LISTEN/NOTIFY; every worker
+  listens and wakes only the waiters it has for the notified simulations. A
+  lost listener connection is re-established with backoff, and every waiter is
+  woken once it is back, since notifications sent in between are gone.
+
+Set ``CONVERGENCE_EVENTS_BACKEND=postgres`` to use the PostgreSQL broker.
+"""
+import asyncio
+import logging
+import os
+import select
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "convergence_events_pending"
+NOTIFY_CHANNEL = "convergence_events"
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7900
+# Delay before re-establishing a lost LISTEN connection, doubled on every failed attempt
+LISTEN_RETRY_DELAY = 0.5
+LISTEN_MAX_RETRY_DELAY = 30.0
+
+# Called with the notified simulation ids, or None to wake every waiter
+Deliver = Callable[[Optional[Iterable[int]]], None]
+
+
+class InMemoryBroker:
+    """Relays committed notifications to every bus attached in this process"""
+
+    def __init__(self):
+        self._buses: List[Deliver] = []
+
+    def attach(self, deliver: Deliver):
+        self._buses.append(deliver)
+
+    def detach(self, deliver: Deliver):
+        if deliver in self._buses:
+            self._buses.remove(deliver)
+
+    def stage(self, db: Session, simulation_ids: Set[int]):
+        """Called once per transaction, just before it commits; nothing to do in memory"""
+
+    def publish(self, simulation_ids: Optional[Set[int]]):
+        """Called after commit"""
+        for deliver in list(self._buses):
+            deliver(simulation_ids)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def encode_notify_payloads(simulation_ids: Iterable[int]) -> List[str]:
+    """Pack simulation ids into as few comma-separated NOTIFY payloads as fit"""
+    payloads = []
+    current = ""
+    for simulation_id in sorted(set(simulation_ids)):
+        token = str(simulation_id)
+        if current and len(current) + 1 + len(token) > MAX_NOTIFY_PAYLOAD:
+            payloads.append(current)
+            current = token
+        else:
+            current = f"{current},{token}" if current else token
+    if current:
+        payloads.append(current)
+    return payloads
+
+
+def decode_notify_payload(payload: str) -> Set[int]:
+    return {int(token) for token in payload.split(",") if token}
+
+
+class PostgresBroker(InMemoryBroker):
+    """Relays notifications between worker processes with LISTEN/NOTIFY.
+
+    NOTIFY is issued inside the writing transaction, so PostgreSQL delivers it
+    only on commit, to every listening worker including the writer's own.
+    """
+
+    def __init__(self, engine, retry_delay: float = LISTEN_RETRY_DELAY, max_retry_delay: float = LISTEN_MAX_RETRY_DELAY):
+        super().__init__()
+        self.engine = engine
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stage(self, db: Session, simulation_ids: Set[int]):
+        for payload in encode_notify_payloads(simulation_ids):
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {
+                "channel": NOTIFY_CHANNEL,
+                "payload": payload
+            })
+
+    def publish(self, simulation_ids: Optional[Set[int]]):
+        """Delivery happens through LISTEN, once PostgreSQL commits the NOTIFY"""
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, name="convergence-events-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self):
+        delay = self.retry_delay
+        reconnecting = False
+        while not self._stop.is_set():
+            try:
+                dbapi_connection = self._connect()
+            except Exception:
+                logger.warning("Convergence LISTEN connection failed, retrying in %.1fs", delay, exc_info=True)
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+            
+            delay = self.retry_delay
+            try:
+                if reconnecting:
+                    # Notifications sent while disconnected are lost: let every waiter re-check
+                    super().publish(None)
+                self._relay(dbapi_connection)
+            except Exception:
+                logger.exception("Convergence LISTEN connection lost, reconnecting")
+                reconnecting = True
+            finally:
+                dbapi_connection.close()
+
+    def _connect(self):
+        connection = self.engine.raw_connection()
+        connection.detach()
+        dbapi_connection = connection.dbapi_connection
+        try:
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        except Exception:
+            dbapi_connection.close()
+            raise
+        return dbapi_connection
+
+    def _relay(self, dbapi_connection):
+        while not self._stop.is_set():
+            if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                continue
+            dbapi_connection.poll()
+            simulation_ids = set()
+            while dbapi_connection.notifies:
+                simulation_ids |= decode_notify_payload(dbapi_connection.notifies.pop(0).payload)
+            if simulation_ids:
+                super().publish(simulation_ids)
+
+
+class ConvergenceEventBus:
+    """Per-worker registry of asyncio waiters, fed by a broker"""
+
+    def __init__(self, broker: InMemoryBroker):
+        self.broker = broker
+        self._waiters: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+        broker.attach(self.deliver)
+
+    def subscribe(self, simulation_id: int) -> asyncio.Event:
+        """Return an event that is set whenever the simulation's series or status changes"""
+        wakeup = asyncio.Event()
+        with self._lock:
+            self._waiters.setdefault(simulation_id, set()).add((asyncio.get_running_loop(), wakeup))
+        return wakeup
+
+    def unsubscribe(self, simulation_id: int, wakeup: asyncio.Event):
+        with self._lock:
+            waiters = self._waiters.get(simulation_id)
+            if waiters is None:
+                return
+            waiters.difference_update({waiter for waiter in waiters if waiter[1] is wakeup})
+            if not waiters:
+                del self._waiters[simulation_id]
+
+    @property
+    def watched_simulation_ids(self) -> Set[int]:
+        with self._lock:
+            return set(self._waiters)
+
+    def deliver(self, simulation_ids: Optional[Iterable[int]]):
+        """Wake local waiters of the given simulations (None: all of them); safe to call from any thread"""
+        with self._lock:
+            if simulation_ids is None:
+                simulation_ids = list(self._waiters)
+            waiters = [waiter for simulation_id in simulation_ids for waiter in self._waiters.get(simulation_id, ())]
+        for loop, wakeup in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(wakeup.set)
+
+    def notify(self, db: Session, simulation_ids: Iterable[int]):
+        """Stage notifications that are published when the session's transaction commits"""
+        db.info.setdefault(_PENDING_KEY, {}).setdefault(self, set()).update(simulation_ids)
+
+    def publish(self, simulation_ids: Iterable[int]):
+        self.broker.publish(set(simulation_ids))
+
+    def start(self):
+        self.broker.start()
+
+    def stop(self):
+        self.broker.stop()
+
+
+def create_broker() -> InMemoryBroker:
+    if os.getenv("CONVERGENCE_EVENTS_BACKEND", "memory") == "postgres":
+        return PostgresBroker(engine)
+    return InMemoryBroker()
+
+
+convergence_events = ConvergenceEventBus(create_broker())
+
+
+@event.listens_for(Session, "before_commit")
+def _stage_pending(session):
+    # One broker call per bus and transaction, however many writes it made
+    for bus, simulation_ids in session.info.get(_PENDING_KEY, {}).items():
+        bus.broker.stage(session, simulation_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session):
+    for bus, simulation_ids in session.info.pop(_PENDING_KEY, {}).items():
+        bus.publish(simulation_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
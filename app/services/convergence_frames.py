@@ -0,0 +1,114 @@
+"""
+Binary WebSocket frames for convergence updates.
+
+A data frame is a fixed header followed by four packed little-endian columns:
+
+    <BBIIqqq   kind, flags, simulation_id, count, first id, first step, first timestamp (us, UTC)
+    <i4[count] id deltas          (first entry 0)
+    <i4[count] step deltas        (first entry 0)
+    <i8[count] timestamp deltas   (microseconds, first entry 0)
+    <f8[count] loss values
+
+Consecutive points differ by small, repetitive deltas, so frames are a fraction
+of the JSON size and compress well under permessage-deflate. A batch frame
+(kind 0) is a u4 frame count followed by u4-length-prefixed data frames.
+"""
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import List, Sequence
+import numpy as np
+
+BINARY_SUBPROTOCOL = "convergence.binary.v1"
+
+FRAME_KINDS = {"initial_data": 1, "new_data": 2, "snapshot": 3}
+BATCH_KIND = 0
+_KIND_NAMES = {code: name for name, code in FRAME_KINDS.items()}
+_FLAG_COMPLETE = 0x01
+_FLAG_TZ_AWARE = 0x02
+
+_HEADER = struct.Struct("<BBIIqqq")
+_BATCH_HEADER = struct.Struct("<BI")
+_LENGTH = struct.Struct("<I")
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_frame(kind: str, simulation_id: int, points: Sequence, is_complete: bool = False) -> bytes:
+    """Pack step-ordered objects with id, step, timestamp and loss_value into one frame"""
+    count = len(points)
+    ids = np.fromiter((point.id for point in points), dtype=np.int64, count=count)
+    steps = np.fromiter((point.step for point in points), dtype=np.int64, count=count)
+    # Naive timestamps are UTC; plain datetime arithmetic is several times faster than numpy conversion here
+    timestamps = np.fromiter((
+        (point.timestamp - (_EPOCH_NAIVE if point.timestamp.tzinfo is None else _EPOCH_UTC)) // _MICROSECOND
+        for point in points
+    ), dtype=np.int64, count=count)
+    losses = np.fromiter((point.loss_value for point in points), dtype=np.float64, count=count)
+
+    flags = _FLAG_COMPLETE if is_complete else 0
+    if any(point.timestamp.tzinfo is not None for point in points):
+        flags |= _FLAG_TZ_AWARE
+    first = (int(ids[0]), int(steps[0]), int(timestamps[0])) if count else (0, 0, 0)
+    return b"".join([
+        _HEADER.pack(FRAME_KINDS[kind], flags, simulation_id, count, *first),
+        np.diff(ids, prepend=ids[:1]).astype("<i4").tobytes(),
+        np.diff(steps, prepend=steps[:1]).astype("<i4").tobytes(),
+        np.diff(timestamps, prepend=timestamps[:1]).astype("<i8").tobytes(),
+        losses.astype("<f8").tobytes()
+    ])
+
+
+def decode_frame(payload: bytes) -> dict:
+    """Inverse of encode_frame, returning the same shape as the JSON message"""
+    kind, flags, simulation_id, count, first_id, first_step, first_timestamp = _HEADER.unpack_from(payload)
+    offset = _HEADER.size
+    columns = []
+    for dtype in ("<i4", "<i4", "<i8", "<f8"):
+        column = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += column.nbytes
+        columns.append(column)
+    id_deltas, step_deltas, timestamp_deltas, losses = columns
+
+    ids = first_id + np.cumsum(id_deltas, dtype=np.int64)
+    steps = first_step + np.cumsum(step_deltas, dtype=np.int64)
+    timestamps = (first_timestamp + np.cumsum(timestamp_deltas)).astype("datetime64[us]").tolist()
+    if flags & _FLAG_TZ_AWARE:
+        timestamps = [timestamp.replace(tzinfo=timezone.utc) for timestamp in timestamps]
+
+    message = {
+        "type": _KIND_NAMES[kind],
+        "simulation_id": simulation_id,
+        "data_points": [
+            {"id": point_id, "step": step, "timestamp": timestamp.isoformat(), "loss_value": loss_value}
+            for point_id, step, timestamp, loss_value in zip(ids.tolist(), steps.tolist(), timestamps, losses.tolist())
+        ]
+    }
+    if kind == FRAME_KINDS["new_data"]:
+        message["is_complete"] = bool(flags & _FLAG_COMPLETE)
+    return message
+
+
+def encode_batch(frames: Sequence[bytes]) -> bytes:
+    return b"".join([_BATCH_HEADER.pack(BATCH_KIND, len(frames))] + [
+        _LENGTH.pack(len(frame)) + frame for frame in frames
+    ])
+
+
+def decode_batch(payload: bytes) -> List[dict]:
+    _, count = _BATCH_HEADER.unpack_from(payload)
+    offset = _BATCH_HEADER.size
+    messages = []
+    for _ in range(count):
+        (length,) = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        messages.append(decode_frame(payload[offset:offset + length]))
+        offset += length
+    return messages
+
+
+def decode_message(payload: bytes):
+    """Decode a binary frame as a single message or, for batch frames, a list of messages"""
+    if payload[0] == BATCH_KIND:
+        return decode_batch(payload)
+    return decode_frame(payload)
@@ -1,9 +1,154 @@
+import asyncio
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Optional
-from app.models.convergence_data import ConvergenceData
+from sqlalchemy import DateTime, or_, text, insert, select, tuple_
+from typing import Iterator, List, Optional, Sequence, Tuple
+from app.models.convergence_data import ConvergenceData, allocate_steps, last_steps
+from app.models.convergence_rollup import ConvergenceRollup
+from app.models.convergence_archive import ConvergenceArchive
+from app.models.convergence_stats import ConvergenceStats
 from app.schemas.convergence_data import ConvergenceDataCreate
 from app.models.simulation import Simulation, SimulationStatus
+from app.services.convergence_archive import ARCHIVE_CODEC, ArchivedSeries
+from app.services.convergence_events import convergence_events
+from app.services.convergence_stats import STATS_FIELDS, describe_stats, fold_stats
+from app.services.downsampling import downsample_indices
+from app.services.rollups import ROLLUP_LEVELS, aggregate_buckets, choose_level
+
+# Graph reads reduce series longer than this many points per requested point in SQL first
+GRAPH_CANDIDATES_PER_POINT = 4
+
+
+def _archive_payload_query(simulation_id: int, after_step: Optional[int] = None, after_id: Optional[int] = None):
+    """Select the archive blob, skipping it when every archived point is at or before after_step / after_id"""
+    query = select(ConvergenceArchive.payload).where(ConvergenceArchive.simulation_id == simulation_id)
+    if after_step is not None:
+        query = query.where(ConvergenceArchive.last_step > after_step)
+    if after_id is not None:
+        # Archives written before max_id existed have none and are always read
+        query = query.where(or_(ConvergenceArchive.max_id.is_(None), ConvergenceArchive.max_id > after_id))
+    return query
+
+
+def _window_start(from_step: Optional[int]) -> Optional[int]:
+    return from_step - 1 if from_step is not None else None
+
+
+def _archived_window(
+    archive: ArchivedSeries,
+    from_step: Optional[int],
+    to_step: Optional[int],
+    after_id: Optional[int],
+    limit: Optional[int],
+    tail: Optional[int]
+) -> Optional[np.ndarray]:
+    """Indices of the archived points in a window, or None when after_id points past the archive"""
+    after_step = archive.step_of(after_id) if after_id is not None else None
+    if after_id is not None and after_step is None:
+        return None
+    indices = archive.select(from_step=from_step, to_step=to_step, after_step=after_step)
+    if tail is not None:
+        return indices[-tail:]
+    if limit is not None:
+        return indices[:limit]
+    return indices
+
+
+def _archived_window_points(
+    simulation_id: int,
+    archive: ArchivedSeries,
+    from_step: Optional[int],
+    to_step: Optional[int],
+    after_id: Optional[int],
+    limit: Optional[int],
+    tail: Optional[int]
+) -> Optional[List[ConvergenceData]]:
+    """Archived points of a window, or None when after_id points past the archive"""
+    indices = _archived_window(archive, from_step, to_step, after_id, limit, tail)
+    return ConvergenceService._archived_points(simulation_id, archive, indices) if indices is not None else None
+
+
+def _raw_window_query(
+    simulation_id: int,
+    from_step: Optional[int],
+    to_step: Optional[int],
+    after_id: Optional[int],
+    limit: Optional[int],
+    tail: Optional[int],
+    archived_count: int = 0
+):
+    """Select the raw rows of a window (newest first when tail is set), or None if nothing is left to read"""
+    query = select(ConvergenceData).where(ConvergenceData.simulation_id == simulation_id)
+    
+    if after_id is not None:
+        after_step = select(ConvergenceData.step).where(
+            ConvergenceData.simulation_id == simulation_id,
+            ConvergenceData.id == after_id
+        ).scalar_subquery()
+        query = query.where(ConvergenceData.step > after_step)
+    if from_step is not None:
+        query = query.where(ConvergenceData.step >= from_step)
+    if to_step is not None:
+        query = query.where(ConvergenceData.step <= to_step)
+    
+    if tail is not None:
+        return query.order_by(ConvergenceData.step.desc()).limit(tail)
+    
+    query = query.order_by(ConvergenceData.step)
+    if limit is not None:
+        if archived_count >= limit:
+            return None
+        query = query.limit(limit - archived_count)
+    return query
+
+
+def _merge_window(archived_points: list, raw_points: Sequence, tail: Optional[int]) -> list:
+    if tail is not None:
+        return (archived_points + list(raw_points)[::-1])[-tail:]
+    return archived_points + list(raw_points)
+
+
+def _streaming_query(
+    simulation_id: int,
+    last_timestamp: Optional[str],
+    since_id: Optional[int] = None,
+    since_step: Optional[int] = None
+):
+    query = select(ConvergenceData).where(ConvergenceData.simulation_id == simulation_id)
+    if since_id is not None:
+        query = query.where(ConvergenceData.id > since_id)
+    if since_step is not None:
+        query = query.where(ConvergenceData.step > since_step)
+    if last_timestamp:
+        query = query.where(ConvergenceData.timestamp > last_timestamp)
+    # Ids and steps grow together within a simulation; order by whichever index the cursor probes
+    return query.order_by(ConvergenceData.id if since_id is not None else ConvergenceData.step)
+
+
+def _streaming_archive_indices(
+    archive: ArchivedSeries,
+    last_timestamp: Optional[str],
+    since_id: Optional[int],
+    since_step: Optional[int]
+) -> np.ndarray:
+    indices = archive.select(after_step=since_step, after_timestamp=last_timestamp or None)
+    if since_id is not None:
+        indices = indices[archive.ids[indices] > since_id]
+    return indices
+
+
+def _streaming_archive_points(
+    simulation_id: int,
+    archive: ArchivedSeries,
+    last_timestamp: Optional[str],
+    since_id: Optional[int],
+    since_step: Optional[int]
+) -> List[ConvergenceData]:
+    return ConvergenceService._archived_points(
+        simulation_id, archive, _streaming_archive_indices(archive, last_timestamp, since_id, since_step)
+    )
 
 
 class ConvergenceService:
@@ -14,83 +159,670 @@ class ConvergenceService:
         """Add convergence data point using ORM"""
         db_data = ConvergenceData(**convergence_data.dict())
         self.db.add(db_data)
+        self.db.flush()
+        self._record_points([{
+            "simulation_id": db_data.simulation_id,
+            "step": db_data.step,
+            "loss_value": db_data.loss_value
+        }])
         self.db.commit()
         self.db.refresh(db_data)
         return db_data
 
-    def get_convergence_data(self, simulation_id: int) -> List[ConvergenceData]:
-        """Get all convergence data for a simulation using ORM"""
-        return self.db.query(ConvergenceData).filter(
+    def add_convergence_data_batch(self, simulation_id: int, loss_values: Sequence[float]) -> List[dict]:
+        """Add many convergence data points for one simulation in a single transaction"""
+        return self.add_convergence_data_bulk([
+            {"simulation_id": simulation_id, "loss_value": loss_value}
+            for loss_value in loss_values
+        ])
+
+    def add_convergence_data_bulk(self, points: Sequence[dict]) -> List[dict]:
+        """Add convergence data points (possibly for several simulations) with one multi-row INSERT"""
+        if not points:
+            return []
+
+        # Reserve a contiguous run of steps per simulation, continuing its sequence
+        counts = {}
+        for point in points:
+            counts[point["simulation_id"]] = counts.get(point["simulation_id"], 0) + 1
+        steps = allocate_steps(self.db, counts)
+        rows = []
+        for point in points:
+            step = steps[point["simulation_id"]]
+            steps[point["simulation_id"]] += 1
+            rows.append({"simulation_id": point["simulation_id"], "loss_value": point["loss_value"], "step": step})
+
+        query = insert(ConvergenceData.__table__).returning(
+            ConvergenceData.id,
+            ConvergenceData.simulation_id,
+            ConvergenceData.step,
+            ConvergenceData.loss_value,
+            ConvergenceData.timestamp,
+            sort_by_parameter_order=True
+        )
+        result = self.db.execute(query, rows).fetchall()
+        self._record_points(rows)
+        self.db.commit()
+
+        return [
+            {
+                "id": row.id,
+                "simulation_id": row.simulation_id,
+                "step": row.step,
+                "loss_value": row.loss_value,
+                "timestamp": row.timestamp
+            } for row in result
+        ]
+
+    def _record_points(self, points: Sequence[dict]):
+        """Maintain derived per-simulation state for newly inserted points (same transaction)"""
+        by_simulation = {}
+        for point in points:
+            by_simulation.setdefault(point["simulation_id"], []).append(point)
+
+        for simulation_id, simulation_points in by_simulation.items():
+            steps = np.fromiter((point["step"] for point in simulation_points), dtype=np.int64, count=len(simulation_points))
+            losses = np.fromiter((point["loss_value"] for point in simulation_points), dtype=np.float64, count=len(simulation_points))
+            order = np.argsort(steps, kind="stable")
+            self._update_rollups(simulation_id, steps[order], losses[order])
+            self._update_stats(simulation_id, steps[order], losses[order])
+        
+        # Wake live subscribers once this transaction commits
+        convergence_events.notify(self.db, by_simulation.keys())
+
+    def _update_stats(self, simulation_id: int, steps: np.ndarray, losses: np.ndarray):
+        """Fold step-sorted new points into the simulation's running statistics"""
+        db_stats = self.db.get(ConvergenceStats, simulation_id)
+        if db_stats is None:
+            if steps[0] > 1:
+                # Series predates the statistics table: seed once from the full series (new points included)
+                steps, losses = self._series_arrays(simulation_id)
+            db_stats = ConvergenceStats(simulation_id=simulation_id)
+            self.db.add(db_stats)
+            state = None
+        else:
+            state = {field: getattr(db_stats, field) for field in STATS_FIELDS}
+        
+        for field, value in fold_stats(state, steps, losses).items():
+            setattr(db_stats, field, value)
+
+    def _series_arrays(self, simulation_id: int):
+        """Steps and losses of the whole series (archived and raw) as NumPy arrays"""
+        rows = self.db.query(ConvergenceData.step, ConvergenceData.loss_value).filter(
             ConvergenceData.simulation_id == simulation_id
-        ).order_by(ConvergenceData.timestamp).all()
+        ).order_by(ConvergenceData.step).all()
+        steps = np.fromiter((row.step for row in rows), dtype=np.int64, count=len(rows))
+        losses = np.fromiter((row.loss_value for row in rows), dtype=np.float64, count=len(rows))
+        
+        archive = self._load_archive(simulation_id)
+        if archive is not None:
+            steps = np.concatenate([archive.steps, steps])
+            losses = np.concatenate([archive.losses.astype(np.float64), losses])
+        return steps, losses
+
+    def get_convergence_stats(self, simulation_id: int) -> Optional[dict]:
+        """Get running convergence statistics (O(1): one primary-key lookup)"""
+        db_stats = self.db.get(ConvergenceStats, simulation_id)
+        if db_stats is None:
+            steps, losses = self._series_arrays(simulation_id)
+            if not len(steps):
+                return None
+            db_stats = ConvergenceStats(simulation_id=simulation_id)
+            for field, value in fold_stats(None, steps, losses).items():
+                setattr(db_stats, field, value)
+            self.db.add(db_stats)
+            self.db.commit()
+        
+        return describe_stats({field: getattr(db_stats, field) for field in STATS_FIELDS})
+
+    def _update_rollups(self, simulation_id: int, steps: np.ndarray, losses: np.ndarray):
+        """Fold step-sorted new points into every rollup level"""
+        # New points follow all stored ones, so only the bucket holding the first new step can already exist
+        open_buckets = [(level, int((steps[0] - 1) // level)) for level in ROLLUP_LEVELS]
+        existing = {
+            (rollup.level, rollup.bucket): rollup
+            for rollup in self.db.query(ConvergenceRollup).filter(
+                ConvergenceRollup.simulation_id == simulation_id,
+                tuple_(ConvergenceRollup.level, ConvergenceRollup.bucket).in_(open_buckets)
+            )
+        }
+
+        new_rows = []
+        for level in ROLLUP_LEVELS:
+            aggregates = {key: values.tolist() for key, values in aggregate_buckets(steps, losses, level).items()}
+            for bucket, count, min_loss, max_loss, sum_loss, last_loss, last_step in zip(
+                aggregates["bucket"], aggregates["count"], aggregates["min_loss"], aggregates["max_loss"],
+                aggregates["sum_loss"], aggregates["last_loss"], aggregates["last_step"]
+            ):
+                rollup = existing.get((level, bucket))
+                if rollup is None:
+                    new_rows.append({
+                        "simulation_id": simulation_id,
+                        "level": level,
+                        "bucket": bucket,
+                        "count": count,
+                        "min_loss": min_loss,
+                        "max_loss": max_loss,
+                        "sum_loss": sum_loss,
+                        "last_loss": last_loss,
+                        "last_step": last_step
+                    })
+                    continue
+                rollup.count += count
+                rollup.min_loss = min(rollup.min_loss, min_loss)
+                rollup.max_loss = max(rollup.max_loss, max_loss)
+                rollup.sum_loss += sum_loss
+                if last_step > rollup.last_step:
+                    rollup.last_loss = last_loss
+                    rollup.last_step = last_step
+
+        if new_rows:
+            self.db.execute(insert(ConvergenceRollup.__table__), new_rows)
+
+    def get_convergence_rollup_graph(
+        self,
+        simulation_id: int,
+        from_step: Optional[int] = None,
+        to_step: Optional[int] = None,
+        points: int = 500
+    ) -> dict:
+        """Get a step range at the coarsest rollup level that still yields `points` buckets"""
+        if to_step is None:
+            to_step = self.db.query(ConvergenceRollup.last_step).filter(
+                ConvergenceRollup.simulation_id == simulation_id,
+                ConvergenceRollup.level == ROLLUP_LEVELS[-1]
+            ).order_by(ConvergenceRollup.bucket.desc()).limit(1).scalar() or 0
+        from_step = max(from_step or 1, 1)
+        level = choose_level(to_step - from_step + 1, points)
+
+        if level == 1:
+            archive = self._load_archive(simulation_id)
+            rows = self._archived_points(
+                simulation_id, archive, archive.select(from_step=from_step, to_step=to_step)
+            ) if archive is not None else []
+            rows += self.db.query(ConvergenceData.step, ConvergenceData.loss_value).filter(
+                ConvergenceData.simulation_id == simulation_id,
+                ConvergenceData.step.between(from_step, to_step)
+            ).order_by(ConvergenceData.step).all()
+            buckets = [
+                {
+                    "start_step": row.step,
+                    "end_step": row.step,
+                    "count": 1,
+                    "min_loss": row.loss_value,
+                    "max_loss": row.loss_value,
+                    "mean_loss": row.loss_value,
+                    "last_loss": row.loss_value
+                } for row in rows
+            ]
+        else:
+            rollups = self.db.query(ConvergenceRollup).filter(
+                ConvergenceRollup.simulation_id == simulation_id,
+                ConvergenceRollup.level == level,
+                ConvergenceRollup.bucket.between((from_step - 1) // level, (to_step - 1) // level)
+            ).order_by(ConvergenceRollup.bucket).all()
+            buckets = [
+                {
+                    "start_step": rollup.bucket * level + 1,
+                    "end_step": rollup.last_step,
+                    "count": rollup.count,
+                    "min_loss": rollup.min_loss,
+                    "max_loss": rollup.max_loss,
+                    "mean_loss": rollup.sum_loss / rollup.count,
+                    "last_loss": rollup.last_loss
+                } for rollup in rollups
+            ]
+
+        return {
+            "simulation_id": simulation_id,
+            "level": level,
+            "from_step": from_step,
+            "to_step": to_step,
+            "buckets": buckets
+        }
+
+    def get_convergence_data(
+        self,
+        simulation_id: int,
+        from_step: Optional[int] = None,
+        to_step: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        tail: Optional[int] = None
+    ) -> List[ConvergenceData]:
+        """Get convergence data for a simulation using ORM, optionally as a step window or keyset page.
+
+        after_id continues from the point with that id (keyset pagination on step);
+        tail returns only the last `tail` points of the selected window.
+        """
+        raw_points = None
+        if tail is not None and after_id is None:
+            # Raw rows follow the archived ones, so when they fill the tail the archive is not needed
+            raw_points = self.db.scalars(_raw_window_query(simulation_id, from_step, to_step, None, None, tail)).all()
+            if len(raw_points) == tail:
+                return _merge_window([], raw_points, tail)
+        
+        archived_points = []
+        archive = self._load_archive(simulation_id, _window_start(from_step))
+        if archive is not None:
+            points = _archived_window_points(simulation_id, archive, from_step, to_step, after_id, limit, tail)
+            if points is not None:
+                archived_points = points
+                # Raw rows always follow the archived ones, so the cursor is already behind them
+                after_id = None
+        
+        if raw_points is None:
+            query = _raw_window_query(simulation_id, from_step, to_step, after_id, limit, tail, len(archived_points))
+            raw_points = self.db.scalars(query).all() if query is not None else []
+        return _merge_window(archived_points, raw_points, tail)
+
+    def get_step_of_point(self, simulation_id: int, point_id: int) -> Optional[int]:
+        """Step of a point by id, looking in the archive when the raw row is gone"""
+        step = self.db.scalar(select(ConvergenceData.step).where(
+            ConvergenceData.simulation_id == simulation_id,
+            ConvergenceData.id == point_id
+        ))
+        if step is None:
+            archive = self._load_archive(simulation_id)
+            step = archive.step_of(point_id) if archive is not None else None
+        return step
 
-    def get_convergence_data_streaming(self, simulation_id: int, last_timestamp: Optional[str] = None) -> List[ConvergenceData]:
-        """Get convergence data for streaming (new data since last_timestamp) using ORM"""
-        query = self.db.query(ConvergenceData).filter(
+    def iter_convergence_data(self, simulation_id: int, chunk_size: int = 10_000) -> Iterator[list]:
+        """Yield a simulation's points in step order, chunk_size rows at a time, via a server-side cursor"""
+        query = select(
+            ConvergenceData.id,
+            ConvergenceData.step,
+            ConvergenceData.timestamp,
+            ConvergenceData.loss_value
+        ).where(
             ConvergenceData.simulation_id == simulation_id
-        )
+        ).order_by(ConvergenceData.step).execution_options(yield_per=chunk_size)
+        
+        archive = self._load_archive(simulation_id)
+        if archive is not None:
+            for start in range(0, len(archive), chunk_size):
+                yield self._archived_points(simulation_id, archive, np.arange(start, min(start + chunk_size, len(archive))))
         
-        if last_timestamp:
-            query = query.filter(ConvergenceData.timestamp > last_timestamp)
+        result = self.db.execute(query)
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
+
+    def get_convergence_data_streaming(
+        self,
+        simulation_id: int,
+        last_timestamp: Optional[str] = None,
+        since_id: Optional[int] = None,
+        since_step: Optional[int] = None
+    ) -> List[ConvergenceData]:
+        """Get convergence data for streaming (new data after the id / step cursor or last_timestamp) using ORM"""
+        archive = self._load_archive(simulation_id, since_step, since_id)
+        archived_points = _streaming_archive_points(
+            simulation_id, archive, last_timestamp, since_id, since_step
+        ) if archive is not None else []
         
-        return query.order_by(ConvergenceData.timestamp).all()
+        return archived_points + list(self.db.scalars(
+            _streaming_query(simulation_id, last_timestamp, since_id, since_step)
+        ))
+
+    def archive_convergence_data(self, simulation_id: int) -> dict:
+        """Pack a finished simulation's series into one compressed blob and delete its raw rows"""
+        if not self.is_simulation_finished(simulation_id):
+            raise ValueError("Only finished simulations can be archived")
+        
+        raw_points = self.db.execute(
+            select(
+                ConvergenceData.id,
+                ConvergenceData.step,
+                ConvergenceData.timestamp,
+                ConvergenceData.loss_value
+            ).where(
+                ConvergenceData.simulation_id == simulation_id
+            ).order_by(ConvergenceData.step)
+        ).all()
+        db_archive = self.db.query(ConvergenceArchive).filter(
+            ConvergenceArchive.simulation_id == simulation_id
+        ).first()
+        
+        if raw_points:
+            series = ArchivedSeries.from_points(raw_points)
+            if db_archive is not None:
+                # Points that arrived after an earlier archive run are appended to it
+                series = ArchivedSeries.concatenate(ArchivedSeries.decode(db_archive.payload), series)
+            else:
+                db_archive = ConvergenceArchive(simulation_id=simulation_id)
+                self.db.add(db_archive)
+            db_archive.codec = ARCHIVE_CODEC
+            db_archive.point_count = len(series)
+            db_archive.last_step = int(series.steps[-1])
+            # Ids follow commit order, not step order, so take the largest rather than the last
+            db_archive.max_id = int(series.ids.max())
+            db_archive.payload = series.encode()
+            
+            # Only delete what was encoded: points committed since the SELECT stay raw for the next run
+            self.db.query(ConvergenceData).filter(
+                ConvergenceData.simulation_id == simulation_id,
+                ConvergenceData.step <= raw_points[-1].step
+            ).delete(synchronize_session=False)
+            self.db.commit()
+        
+        return {
+            "simulation_id": simulation_id,
+            "archived_points": len(raw_points),
+            "point_count": db_archive.point_count if db_archive is not None else 0,
+            "payload_bytes": len(db_archive.payload) if db_archive is not None else 0
+        }
+
+    def _load_archive(
+        self, simulation_id: int, after_step: Optional[int] = None, after_id: Optional[int] = None
+    ) -> Optional[ArchivedSeries]:
+        payload = self.db.scalar(_archive_payload_query(simulation_id, after_step, after_id))
+        return ArchivedSeries.decode(payload) if payload is not None else None
+
+    @staticmethod
+    def _archived_points(simulation_id: int, archive: ArchivedSeries, indices: np.ndarray) -> List[ConvergenceData]:
+        """Materialize archived points as detached ConvergenceData objects"""
+        return [
+            ConvergenceData(id=point_id, simulation_id=simulation_id, step=step, timestamp=timestamp, loss_value=loss_value)
+            for point_id, step, timestamp, loss_value in zip(
+                archive.ids[indices].tolist(),
+                archive.steps[indices].tolist(),
+                archive.datetimes(indices),
+                archive.losses[indices].tolist()
+            )
+        ]
 
     def is_simulation_finished(self, simulation_id: int) -> bool:
         """Check if simulation is finished using ORM"""
         simulation = self.db.query(Simulation).filter(Simulation.id == simulation_id).first()
         return simulation.status == SimulationStatus.FINISHED if simulation else False
 
-    def get_convergence_graph_data(self, simulation_id: int) -> dict:
-        """Get convergence graph data using BARE SQL (READ operation)"""
-        query = text("""
-            SELECT 
-                cd.id,
-                cd.simulation_id,
-                cd.timestamp,
-                cd.loss_value,
-                s.status as simulation_status
-            FROM convergence_data cd
-            JOIN simulations s ON cd.simulation_id = s.id
-            WHERE cd.simulation_id = :simulation_id
-            ORDER BY cd.timestamp ASC
-        """)
+    def get_convergence_graph_data(
+        self,
+        simulation_id: int,
+        max_points: Optional[int] = None,
+        method: str = "lttb"
+    ) -> dict:
+        """Get convergence graph data using BARE SQL (READ operation), optionally downsampled to max_points.
+
+        Long series are first reduced in SQL to the first, last, lowest and highest
+        point of each of max_points step buckets (M4), so only those candidates are
+        fetched and downsampled instead of the whole series.
+        """
+        simulation = self.db.execute(
+            text("SELECT status, last_step FROM simulations WHERE id = :simulation_id"),
+            {"simulation_id": simulation_id}
+        ).first()
+        archive = self._load_archive(simulation_id)
+        archived_count = len(archive) if archive is not None else 0
+        raw_steps = simulation.last_step - archived_count if simulation is not None else 0
+        
+        if max_points and raw_steps > GRAPH_CANDIDATES_PER_POINT * max_points:
+            query = text("""
+                WITH bucketed AS (
+                    SELECT step, loss_value, (step - 1) / :width AS bucket
+                    FROM convergence_data
+                    WHERE simulation_id = :simulation_id
+                ),
+                buckets AS (
+                    SELECT
+                        bucket,
+                        COUNT(*) AS point_count,
+                        MIN(step) AS first_step,
+                        MAX(step) AS last_step,
+                        MIN(loss_value) AS min_loss,
+                        MAX(loss_value) AS max_loss
+                    FROM bucketed
+                    GROUP BY bucket
+                ),
+                extremes AS (
+                    SELECT MIN(bucketed.step) AS step
+                    FROM bucketed
+                    JOIN buckets ON bucketed.bucket = buckets.bucket
+                    WHERE bucketed.loss_value IN (buckets.min_loss, buckets.max_loss)
+                    GROUP BY buckets.bucket, bucketed.loss_value
+                ),
+                candidates AS (
+                    SELECT first_step AS step FROM buckets
+                    UNION SELECT last_step FROM buckets
+                    UNION SELECT step FROM extremes
+                )
+                SELECT
+                    cd.id,
+                    cd.simulation_id,
+                    cd.step,
+                    cd.timestamp,
+                    cd.loss_value,
+                    (SELECT SUM(point_count) FROM buckets) AS raw_count
+                FROM convergence_data cd
+                JOIN candidates ON cd.step = candidates.step
+                WHERE cd.simulation_id = :simulation_id
+                ORDER BY cd.step ASC
+            """).columns(timestamp=DateTime(timezone=True))  # SQLite returns bare SQL timestamps as strings
+            result = self.db.execute(query, {
+                "simulation_id": simulation_id,
+                "width": -(-simulation.last_step // max_points)
+            }).fetchall()
+            raw_count = result[0].raw_count if result else 0
+        else:
+            query = text("""
+                SELECT 
+                    cd.id,
+                    cd.simulation_id,
+                    cd.step,
+                    cd.timestamp,
+                    cd.loss_value
+                FROM convergence_data cd
+                WHERE cd.simulation_id = :simulation_id
+                ORDER BY cd.step ASC
+            """).columns(timestamp=DateTime(timezone=True))  # SQLite returns bare SQL timestamps as strings
+            result = self.db.execute(query, {"simulation_id": simulation_id}).fetchall()
+            raw_count = len(result)
+        
+        total_points = archived_count + raw_count
+        # The Enum column stores member names, rows written by bare SQL store values
+        finished = (SimulationStatus.FINISHED.name, SimulationStatus.FINISHED.value)
+        is_finished = total_points > 0 and simulation.status in finished
         
-        result = self.db.execute(query, {"simulation_id": simulation_id}).fetchall()
+        candidate_count = archived_count + len(result)
+        selected = np.arange(candidate_count)
+        if max_points and candidate_count > max_points:
+            steps = np.fromiter((row.step for row in result), dtype=np.float64, count=len(result))
+            losses = np.fromiter((row.loss_value for row in result), dtype=np.float64, count=len(result))
+            if archive is not None:
+                steps = np.concatenate([archive.steps.astype(np.float64), steps])
+                losses = np.concatenate([archive.losses.astype(np.float64), losses])
+            selected = downsample_indices(steps, losses, max_points, method)
+        
+        if archive is not None:
+            split = int(np.searchsorted(selected, archived_count))
+            result = self._archived_points(simulation_id, archive, selected[:split]) + [
+                result[i - archived_count] for i in selected[split:]
+            ]
+        elif len(selected) < candidate_count:
+            result = [result[i] for i in selected]
         
         data_points = []
         for row in result:
             data_points.append({
                 "id": row.id,
                 "simulation_id": row.simulation_id,
+                "step": row.step,
                 "timestamp": row.timestamp,
                 "loss_value": row.loss_value
             })
         
-        is_finished = any(row.simulation_status == "finished" for row in result) if result else False
-        
         return {
             "simulation_id": simulation_id,
             "data_points": data_points,
-            "is_complete": is_finished
+            "is_complete": is_finished,
+            "total_points": total_points
         }
 
     def add_convergence_data_bare_sql(self, simulation_id: int, loss_value: float) -> dict:
         """Add convergence data using BARE SQL (WRITE operation)"""
+        step = self.db.execute(text("""
+            UPDATE simulations
+            SET last_step = last_step + 1
+            WHERE id = :simulation_id
+            RETURNING last_step
+        """), {"simulation_id": simulation_id}).scalar()
+        if step is None:
+            raise ValueError(f"Simulation {simulation_id} not found")
+        
         query = text("""
-            INSERT INTO convergence_data (simulation_id, loss_value, timestamp)
-            VALUES (:simulation_id, :loss_value, NOW())
-            RETURNING id, simulation_id, loss_value, timestamp
+            INSERT INTO convergence_data (simulation_id, step, loss_value, timestamp)
+            VALUES (:simulation_id, :step, :loss_value, CURRENT_TIMESTAMP)
+            RETURNING id, simulation_id, step, loss_value, timestamp
         """)
         
         result = self.db.execute(query, {
             "simulation_id": simulation_id,
+            "step": step,
             "loss_value": loss_value
         }).fetchone()
+        self._record_points([{
+            "simulation_id": result.simulation_id,
+            "step": result.step,
+            "loss_value": result.loss_value
+        }])
         self.db.commit()
         
         return {
             "id": result.id,
             "simulation_id": result.simulation_id,
+            "step": result.step,
             "loss_value": result.loss_value,
             "timestamp": result.timestamp
         }
+
+
+class AsyncConvergenceService:
+    """Read-only convergence queries on an AsyncSession, for code running inside the event loop"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_simulation(self, simulation_id: int) -> Optional[Simulation]:
+        """Get simulation by ID using ORM"""
+        return await self.db.get(Simulation, simulation_id)
+
+    async def get_existing_simulation_ids(self, simulation_ids: Sequence[int]) -> set:
+        """Return which of the given simulation IDs exist, in one query"""
+        return set(await self.db.scalars(select(Simulation.id).where(Simulation.id.in_(set(simulation_ids)))))
+
+    async def is_simulation_finished(self, simulation_id: int) -> bool:
+        """Check if simulation is finished using ORM"""
+        status = await self.db.scalar(select(Simulation.status).where(Simulation.id == simulation_id))
+        return status == SimulationStatus.FINISHED
+
+    async def get_last_step(self, simulation_id: int) -> int:
+        """Highest stored step of a simulation (0 when it has no points)"""
+        steps = await self.db.run_sync(last_steps, [simulation_id])
+        return steps.get(simulation_id) or 0
+
+    async def get_step_of_point(self, simulation_id: int, point_id: int) -> Optional[int]:
+        """Step of a point by id, looking in the archive when the raw row is gone"""
+        step = await self.db.scalar(select(ConvergenceData.step).where(
+            ConvergenceData.simulation_id == simulation_id,
+            ConvergenceData.id == point_id
+        ))
+        if step is None:
+            archive = await self._load_archive(simulation_id)
+            step = await run_in_threadpool(archive.step_of, point_id) if archive is not None else None
+        return step
+
+    async def get_convergence_data(
+        self,
+        simulation_id: int,
+        from_step: Optional[int] = None,
+        to_step: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        tail: Optional[int] = None
+    ) -> List[ConvergenceData]:
+        """Async counterpart of ConvergenceService.get_convergence_data"""
+        raw_points = None
+        if tail is not None and after_id is None:
+            raw_points = (await self.db.scalars(_raw_window_query(simulation_id, from_step, to_step, None, None, tail))).all()
+            if len(raw_points) == tail:
+                return _merge_window([], raw_points, tail)
+        
+        archived_points = []
+        archive = await self._load_archive(simulation_id, _window_start(from_step))
+        if archive is not None:
+            points = await run_in_threadpool(
+                _archived_window_points, simulation_id, archive, from_step, to_step, after_id, limit, tail
+            )
+            if points is not None:
+                archived_points = points
+                after_id = None
+        
+        if raw_points is None:
+            query = _raw_window_query(simulation_id, from_step, to_step, after_id, limit, tail, len(archived_points))
+            raw_points = (await self.db.scalars(query)).all() if query is not None else []
+        if archived_points:
+            return await run_in_threadpool(_merge_window, archived_points, raw_points, tail)
+        return _merge_window(archived_points, raw_points, tail)
+
+    async def get_convergence_data_streaming(
+        self,
+        simulation_id: int,
+        last_timestamp: Optional[str] = None,
+        since_id: Optional[int] = None,
+        since_step: Optional[int] = None
+    ) -> List[ConvergenceData]:
+        """Async counterpart of ConvergenceService.get_convergence_data_streaming"""
+        archive = await self._load_archive(simulation_id, since_step, since_id)
+        archived_points = await run_in_threadpool(
+            _streaming_archive_points, simulation_id, archive, last_timestamp, since_id, since_step
+        ) if archive is not None else []
+        
+        raw_points = list(await self.db.scalars(_streaming_query(simulation_id, last_timestamp, since_id, since_step)))
+        if archived_points:
+            return await run_in_threadpool(_merge_window, archived_points, raw_points, None)
+        return raw_points
+
+    async def wait_for_convergence_data(
+        self,
+        simulation_id: int,
+        last_timestamp: Optional[str] = None,
+        wait: float = 0,
+        since_id: Optional[int] = None,
+        since_step: Optional[int] = None
+    ) -> Tuple[List[ConvergenceData], bool]:
+        """Return (new points, is_finished), parking up to wait seconds while there are none.
+
+        While parked the session's transaction is ended, so its connection goes back
+        to the pool until a commit for this simulation wakes the request.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        # Subscribe before reading so a commit between the read and the wait still wakes us
+        wakeup = convergence_events.subscribe(simulation_id) if wait > 0 else None
+        try:
+            while True:
+                if wakeup is not None:
+                    wakeup.clear()
+                data_points = await self.get_convergence_data_streaming(simulation_id, last_timestamp, since_id, since_step)
+                is_finished = await self.is_simulation_finished(simulation_id)
+                remaining = deadline - loop.time()
+                if data_points or is_finished or wakeup is None or remaining <= 0:
+                    return data_points, is_finished
+                await self.db.rollback()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return data_points, is_finished
+        finally:
+            if wakeup is not None:
+                convergence_events.unsubscribe(simulation_id, wakeup)
+
+    async def _load_archive(
+        self, simulation_id: int, after_step: Optional[int] = None, after_id: Optional[int] = None
+    ) -> Optional[ArchivedSeries]:
+        payload = await self.db.scalar(_archive_payload_query(simulation_id, after_step, after_id))
+        # Decompressing a long series is CPU-bound; keep it off the event loop
+        return await run_in_threadpool(ArchivedSeries.decode, payload) if payload is not None else None
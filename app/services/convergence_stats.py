@@ -0,0 +1,74 @@
+"""
+Incremental convergence statistics.
+
+State is folded forward one batch at a time with closed-form NumPy updates, so
+the cost of an insert depends only on the batch size, never on series length.
+"""
+import numpy as np
+
+EMA_ALPHA = 0.1
+PLATEAU_PATIENCE = 100  # steps without significant improvement before flagging a plateau
+PLATEAU_TOLERANCE = 1e-3  # relative improvement of the minimum that counts as significant
+
+STATS_FIELDS = ("point_count", "min_loss", "min_step", "last_loss", "last_step", "ema", "slope", "improved_step")
+
+
+def _ema(previous: float, values: np.ndarray, alpha: float = EMA_ALPHA) -> float:
+    """Exponential moving average after feeding `values` into an EMA currently at `previous`"""
+    n = len(values)
+    weights = alpha * (1 - alpha) ** np.arange(n - 1, -1, -1)
+    return float((1 - alpha) ** n * previous + np.dot(weights, values))
+
+
+def fold_stats(state: dict, steps: np.ndarray, losses: np.ndarray) -> dict:
+    """Return the statistics state after appending step-sorted points (state may be None)"""
+    if state is None:
+        state = {
+            "point_count": 1,
+            "min_loss": float(losses[0]),
+            "min_step": int(steps[0]),
+            "last_loss": float(losses[0]),
+            "last_step": int(steps[0]),
+            "ema": float(losses[0]),
+            "slope": 0.0,
+            "improved_step": int(steps[0])
+        }
+        steps, losses = steps[1:], losses[1:]
+        if not len(losses):
+            return state
+
+    previous_losses = np.r_[state["last_loss"], losses[:-1]]
+    previous_steps = np.r_[state["last_step"], steps[:-1]]
+    per_step_change = (losses - previous_losses) / np.maximum(steps - previous_steps, 1)
+
+    running_min = np.minimum.accumulate(np.r_[state["min_loss"], losses])
+    best_before = running_min[:-1]
+    improved = np.flatnonzero(losses < best_before - PLATEAU_TOLERANCE * np.abs(best_before))
+    argmin = int(np.argmin(losses))
+
+    return {
+        "point_count": state["point_count"] + len(losses),
+        "min_loss": float(running_min[-1]),
+        "min_step": int(steps[argmin]) if losses[argmin] < state["min_loss"] else state["min_step"],
+        "last_loss": float(losses[-1]),
+        "last_step": int(steps[-1]),
+        "ema": _ema(state["ema"], losses),
+        "slope": _ema(state["slope"], per_step_change),
+        "improved_step": int(steps[improved[-1]]) if len(improved) else state["improved_step"]
+    }
+
+
+def describe_stats(state: dict) -> dict:
+    """Public view of the statistics state, including the plateau flag"""
+    steps_since_improvement = state["last_step"] - state["improved_step"]
+    return {
+        "point_count": state["point_count"],
+        "min_loss": state["min_loss"],
+        "min_step": state["min_step"],
+        "last_loss": state["last_loss"],
+        "last_step": state["last_step"],
+        "ema": state["ema"],
+        "slope": state["slope"],
+        "steps_since_improvement": steps_since_improvement,
+        "plateau": steps_since_improvement >= PLATEAU_PATIENCE
+    }
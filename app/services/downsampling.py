@@ -0,0 +1,79 @@
+"""
+Vectorized downsampling of convergence series for plotting.
+
+All functions return sorted indices into the input arrays so callers can pick
+the matching rows without copying the full series.
+"""
+import numpy as np
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets selection of n_out points (first and last always kept)"""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    # n_out - 2 buckets over the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < n_out - 2:
+            cx, cy = avg_x[i + 1], avg_y[i + 1]
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        ax, ay = x[a], y[a]
+        areas = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Keep the minimum and maximum of each of n_out // 2 equal-width buckets"""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+
+    n_buckets = max(n_out // 2, 1)
+    width = -(-n // n_buckets)
+    padded = n_buckets * width
+    low = np.full(padded, np.inf)
+    high = np.full(padded, -np.inf)
+    low[:n] = y
+    high[:n] = y
+
+    offsets = np.arange(n_buckets) * width
+    mins = offsets + np.argmin(low.reshape(n_buckets, width), axis=1)
+    maxs = offsets + np.argmax(high.reshape(n_buckets, width), axis=1)
+    indices = np.concatenate([mins, maxs])
+    return np.unique(indices[indices < n])
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int, method: str = "lttb") -> np.ndarray:
+    """Select at most max_points indices, always keeping the first, last, minimum and maximum points"""
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Reserve room for the two points each method may miss so the result stays within max_points
+    budget = max(max_points - 2, 2)
+    if method == "lttb":
+        indices = lttb_indices(x, y, budget)
+    elif method == "minmax":
+        indices = minmax_indices(y, budget)
+    else:
+        raise ValueError(f"Unknown downsampling method '{method}'")
+
+    return np.unique(np.concatenate([indices, [0, n - 1, int(np.argmin(y)), int(np.argmax(y))]]))
@@ -0,0 +1,46 @@
+"""
+Encoders for streaming convergence series exports.
+
+Each encoder turns an iterator of row chunks into an iterator of byte chunks,
+so an export never holds more than one chunk in memory.
+"""
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_COLUMNS = ("id", "step", "timestamp", "loss_value")
+
+
+def _isoformat(timestamp) -> str:
+    return timestamp.isoformat() if hasattr(timestamp, "isoformat") else str(timestamp)
+
+
+def encode_ndjson(chunks: Iterable[list]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(
+            json.dumps({
+                "id": row.id,
+                "step": row.step,
+                "timestamp": _isoformat(row.timestamp),
+                "loss_value": row.loss_value
+            }) + "\n"
+            for row in rows
+        ).encode()
+
+
+def encode_csv(chunks: Iterable[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows((row.id, row.step, _isoformat(row.timestamp), repr(row.loss_value)) for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+EXPORT_ENCODERS = {"ndjson": encode_ndjson, "csv": encode_csv}
@@ -0,0 +1,112 @@
+"""
+Decoders for the compact convergence upload formats.
+
+Both decoders produce an ``array.array`` so large uploads are held as one
+contiguous buffer instead of a list of Python floats.
+"""
+import json
+import math
+import sys
+from array import array
+from typing import AsyncIterable
+
+import numpy as np
+
+PACKED_TYPECODES = {"float64": "d", "float32": "f"}
+MAX_NDJSON_LINE_BYTES = 64 * 1024
+# Same cap as the JSON batch endpoint
+MAX_UPLOAD_ROWS = 100_000
+
+
+class IngestFormatError(ValueError):
+    """Raised when an upload body cannot be decoded"""
+
+
+class IngestPayloadTooLarge(IngestFormatError):
+    """Raised when an upload exceeds a size limit"""
+
+
+class IngestLineTooLong(IngestPayloadTooLarge):
+    """Raised when an NDJSON record exceeds MAX_NDJSON_LINE_BYTES"""
+
+
+def decode_packed_losses(payload: bytes, dtype: str = "float64", max_rows: int = MAX_UPLOAD_ROWS) -> array:
+    """Decode a packed little-endian float array without creating per-value objects"""
+    typecode = PACKED_TYPECODES.get(dtype)
+    if typecode is None:
+        raise IngestFormatError(f"Unsupported dtype '{dtype}', expected one of {sorted(PACKED_TYPECODES)}")
+
+    view = memoryview(payload)
+    itemsize = array(typecode).itemsize
+    if len(view) % itemsize:
+        raise IngestFormatError(f"Payload length {len(view)} is not a multiple of {itemsize} bytes")
+    if len(view) // itemsize > max_rows:
+        raise IngestPayloadTooLarge(f"Payload holds {len(view) // itemsize} values, at most {max_rows} are accepted")
+
+    values = array(typecode)
+    values.frombytes(view)
+    if sys.byteorder == "big":
+        values.byteswap()
+    if not np.isfinite(np.frombuffer(values, dtype=values.typecode)).all():
+        raise IngestFormatError("Packed loss values must be finite (no NaN or infinity)")
+    return values
+
+
+def _parse_ndjson_line(line: bytes, line_number: int) -> float:
+    try:
+        item = json.loads(line)
+        if isinstance(item, dict):
+            item = item["loss_value"]
+        if isinstance(item, bool) or not isinstance(item, (int, float)):
+            raise TypeError(type(item).__name__)
+        value = float(item)
+    except (ValueError, KeyError, TypeError, OverflowError) as exc:
+        raise IngestFormatError(f"Invalid NDJSON record on line {line_number}: {exc}") from exc
+    if not math.isfinite(value):
+        raise IngestFormatError(f"Invalid NDJSON record on line {line_number}: loss value must be finite")
+    return value
+
+
+def _append_row(values: array, value: float, max_rows: int):
+    if len(values) >= max_rows:
+        raise IngestPayloadTooLarge(f"Upload holds more than {max_rows} records")
+    values.append(value)
+
+
+async def decode_ndjson_losses(
+    chunks: AsyncIterable[bytes],
+    max_line_bytes: int = MAX_NDJSON_LINE_BYTES,
+    max_rows: int = MAX_UPLOAD_ROWS
+) -> array:
+    """Parse NDJSON loss records as the body streams in.
+
+    Each line is either a bare, finite number or an object with a ``loss_value``
+    key. Blank lines are ignored. Only new bytes are scanned for line breaks; a
+    line longer than max_line_bytes raises IngestLineTooLong and more than
+    max_rows records raise IngestPayloadTooLarge.
+    """
+    values = array("d")
+    pending = bytearray()
+    line_number = 0
+
+    async for chunk in chunks:
+        scan_from = len(pending)
+        pending += chunk
+        start = 0
+        end = pending.find(b"\n", scan_from)
+        while end != -1:
+            line_number += 1
+            line = pending[start:end]
+            if len(line) > max_line_bytes:
+                raise IngestLineTooLong(f"NDJSON line {line_number} is longer than {max_line_bytes} bytes")
+            if line.strip():
+                _append_row(values, _parse_ndjson_line(line, line_number), max_rows)
+            start = end + 1
+            end = pending.find(b"\n", start)
+        del pending[:start]
+        if len(pending) > max_line_bytes:
+            raise IngestLineTooLong(f"NDJSON line {line_number + 1} is longer than {max_line_bytes} bytes")
+
+    if pending.strip():
+        _append_row(values, _parse_ndjson_line(pending, line_number + 1), max_rows)
+    return values
@@ -0,0 +1,26 @@
+"""
+Fast JSON encoding for large list and graph responses.
+
+Routes returning thousands of rows hand the service's plain dicts straight to
+``FastJSONResponse`` instead of letting FastAPI validate them against the
+response model and serialize them a second time. The response model stays on
+the route for the OpenAPI schema, and the output matches pydantic's JSON
+(ISO 8601 datetimes with ``Z`` for UTC, enums by value).
+"""
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(content: Any) -> bytes:
+    """Encode dicts, lists, datetimes, enums and NumPy values (NaN and infinities become null)"""
+    return orjson.dumps(content, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; the content is not validated"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
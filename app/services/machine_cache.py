@@ -0,0 +1,106 @@
+"""
+Read-through cache of the machine catalog.
+
+Machines change rarely but are looked up on every simulation create and
+embedded in every serialized simulation, so each worker keeps the whole
+catalog in memory as plain dicts (shared between requests; do not mutate).
+MachineService invalidates it after its writes, and an id missing from the
+cache is looked up on its own, so machines created elsewhere are found at once
+while unknown ids cost one primary-key probe rather than a catalog reload.
+
+Status changes made by another worker are only seen after a reload. Set
+``MACHINE_CACHE_VERSION_CHECK_SECONDS`` when running several workers: writers
+bump a stamp in ``cache_versions`` inside their transaction, and every worker
+compares its copy's stamp at most that often, reloading when it moved.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models.cache_version import CacheVersion
+from app.models.machine import Machine
+
+MACHINE_CATALOG = "machines"
+
+
+class MachineCache:
+    def __init__(self, version_check_interval: Optional[float] = None):
+        self.version_check_interval = version_check_interval
+        self._machines: Optional[Dict[int, dict]] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        # Bumped by invalidate(), so a load that raced a write never installs its stale result
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_machines(self, db: Session) -> Dict[int, dict]:
+        """All machines by id, loading the catalog when it is missing or stale"""
+        machines = self._machines
+        if machines is not None and not self._is_stale(db):
+            return machines
+        return self._load(db)
+
+    def get(self, db: Session, machine_id: int) -> Optional[dict]:
+        """One machine; an id missing from the cache is looked up on its own, not by a reload"""
+        machine = self.get_machines(db).get(machine_id)
+        if machine is None:
+            generation = self._generation
+            row = db.execute(_machine_columns().where(Machine.id == machine_id)).mappings().first()
+            if row is None:
+                return None
+            machine = dict(row)
+            with self._lock:
+                if self._machines is not None and generation == self._generation:
+                    # Copy on write: callers may be iterating the current dict
+                    self._machines = {**self._machines, machine_id: machine}
+        return machine
+
+    def invalidate(self):
+        with self._lock:
+            self._machines = None
+            self._generation += 1
+
+    def bump_version(self, db: Session):
+        """Stage a catalog version bump in the writer's transaction"""
+        result = db.execute(
+            update(CacheVersion)
+            .where(CacheVersion.name == MACHINE_CATALOG)
+            .values(version=CacheVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            db.add(CacheVersion(name=MACHINE_CATALOG, version=1))
+
+    def _read_version(self, db: Session) -> int:
+        return db.scalar(select(CacheVersion.version).where(CacheVersion.name == MACHINE_CATALOG)) or 0
+
+    def _is_stale(self, db: Session) -> bool:
+        if self.version_check_interval is None:
+            return False
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check_interval:
+            return False
+        self._checked_at = now
+        return self._read_version(db) != self._version
+
+    def _load(self, db: Session) -> Dict[int, dict]:
+        # Query without the lock so a slow load never blocks other requests; only the swap is locked
+        generation = self._generation
+        # Stamp first: a write landing in between leaves an older stamp, so the next check reloads
+        version = self._read_version(db) if self.version_check_interval is not None else None
+        machines = {row["id"]: dict(row) for row in db.execute(_machine_columns().order_by(Machine.id)).mappings()}
+        with self._lock:
+            if generation == self._generation:
+                self._machines = machines
+                self._version = version
+                self._checked_at = time.monotonic()
+        return machines
+
+
+def _machine_columns():
+    return select(Machine.id, Machine.name, Machine.cpu, Machine.gpu, Machine.memory, Machine.status)
+
+
+_check_interval = os.getenv("MACHINE_CACHE_VERSION_CHECK_SECONDS")
+machine_cache = MachineCache(float(_check_interval) if _check_interval else None)
@@ -2,35 +2,41 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.models.machine import Machine
 from app.schemas.machine import MachineCreate
+from app.services.machine_cache import machine_cache
 
 
 class MachineService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_machines(self) -> List[Machine]:
-        """Get all machines using ORM"""
-        return self.db.query(Machine).all()
+    def get_machines(self, status: Optional[str] = None) -> List[dict]:
+        """Get all machines, optionally only those with the given status, from the machine cache"""
+        machines = machine_cache.get_machines(self.db).values()
+        return [machine for machine in machines if not status or machine["status"] == status]
 
-    def get_machine(self, machine_id: int) -> Optional[Machine]:
-        """Get machine by ID using ORM"""
-        return self.db.query(Machine).filter(Machine.id == machine_id).first()
+    def get_machine(self, machine_id: int) -> Optional[dict]:
+        """Get machine by ID from the machine cache"""
+        return machine_cache.get(self.db, machine_id)
 
     def create_machine(self, machine: MachineCreate) -> Machine:
         """Create a new machine using ORM"""
         db_machine = Machine(**machine.dict())
         self.db.add(db_machine)
+        machine_cache.bump_version(self.db)
         self.db.commit()
+        machine_cache.invalidate()
         self.db.refresh(db_machine)
         return db_machine
 
     def update_machine_status(self, machine_id: int, status: str) -> Optional[Machine]:
         """Update machine status using ORM"""
-        db_machine = self.get_machine(machine_id)
+        db_machine = self.db.query(Machine).filter(Machine.id == machine_id).first()
         if not db_machine:
             return None
-        
+
         db_machine.status = status
+        machine_cache.bump_version(self.db)
         self.db.commit()
+        machine_cache.invalidate()
         self.db.refresh(db_machine)
         return db_machine
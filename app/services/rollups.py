@@ -0,0 +1,33 @@
+"""
+Multi-resolution rollups of convergence series.
+
+Each level groups steps into fixed-width buckets; bucket ``b`` of level ``L``
+covers steps ``b * L + 1`` to ``(b + 1) * L``.
+"""
+import numpy as np
+
+ROLLUP_LEVELS = (10, 100, 1000, 10000)
+
+
+def aggregate_buckets(steps: np.ndarray, losses: np.ndarray, level: int) -> dict:
+    """Aggregate step-sorted points into per-bucket count/min/max/sum/last arrays"""
+    buckets = (steps - 1) // level
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(steps)] - 1
+    return {
+        "bucket": buckets[starts],
+        "count": ends - starts + 1,
+        "min_loss": np.minimum.reduceat(losses, starts),
+        "max_loss": np.maximum.reduceat(losses, starts),
+        "sum_loss": np.add.reduceat(losses, starts),
+        "last_loss": losses[ends],
+        "last_step": steps[ends]
+    }
+
+
+def choose_level(span: int, points: int) -> int:
+    """Pick the coarsest level that still yields at least `points` buckets over `span` steps (1 = raw)"""
+    for level in sorted(ROLLUP_LEVELS, reverse=True):
+        if span // level >= points:
+            return level
+    return 1
@@ -1,15 +1,73 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Optional
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, select, text, tuple_
+from typing import Any, List, Optional, Tuple
 from app.models.simulation import Simulation, SimulationStatus
 from app.schemas.simulation import SimulationCreate, SimulationUpdate
 from app.models.machine import Machine
+from app.services.convergence_events import convergence_events
+from app.services.machine_cache import machine_cache
+
+
+def serialize_simulation(simulation: Simulation, machine: Optional[dict]) -> dict:
+    """Simulation as a response dict with its (cached) machine data"""
+    return {
+        "id": simulation.id,
+        "name": simulation.name,
+        "status": simulation.status,
+        "machine_id": simulation.machine_id,
+        "created_at": simulation.created_at,
+        "updated_at": simulation.updated_at,
+        "machine": machine
+    }
+
+
+SIMULATION_SORT_KEYS = ("created_at", "updated_at", "name")
+
+
+def _simulation_ordering(order_by: str, order_direction: str) -> Tuple[str, str]:
+    return (
+        order_by if order_by in SIMULATION_SORT_KEYS else "created_at",
+        "desc" if order_direction == "desc" else "asc"
+    )
+
+
+def encode_simulation_cursor(order_by: str, order_direction: str, simulation: dict) -> str:
+    """Opaque keyset cursor pointing after the given serialized simulation"""
+    order_by, order_direction = _simulation_ordering(order_by, order_direction)
+    value = simulation[order_by]
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([order_by, order_direction, value, simulation["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_simulation_cursor(cursor: str, order_by: str, order_direction: str) -> Tuple[Any, int]:
+    """Return (sort value, id) of a cursor, raising ValueError if it is malformed or for another ordering"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order_by, cursor_direction, value, simulation_id = json.loads(payload)
+        if cursor_order_by != "name" and value is not None:
+            value = datetime.fromisoformat(value)
+        simulation_id = int(simulation_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Malformed cursor")
+    if (cursor_order_by, cursor_direction) != (order_by, order_direction):
+        raise ValueError("Cursor was issued for a different ordering")
+    return value, simulation_id
 
 
 class SimulationService:
     def __init__(self, db: Session):
         self.db = db
 
+    def serialize(self, simulation: Simulation) -> dict:
+        # Machines come from the machine cache, so serializing a page never loads them one by one
+        return serialize_simulation(simulation, machine_cache.get(self.db, simulation.machine_id))
+
     def create_simulation(self, simulation: SimulationCreate) -> dict:
         """Create a new simulation using ORM"""
         db_simulation = Simulation(**simulation.dict())
@@ -18,22 +76,7 @@ class SimulationService:
         self.db.refresh(db_simulation)
         
         # Return as dict with machine data
-        return {
-            "id": db_simulation.id,
-            "name": db_simulation.name,
-            "status": db_simulation.status,
-            "machine_id": db_simulation.machine_id,
-            "created_at": db_simulation.created_at,
-            "updated_at": db_simulation.updated_at,
-            "machine": {
-                "id": db_simulation.machine.id,
-                "name": db_simulation.machine.name,
-                "cpu": db_simulation.machine.cpu,
-                "gpu": db_simulation.machine.gpu,
-                "memory": db_simulation.machine.memory,
-                "status": db_simulation.machine.status
-            } if db_simulation.machine else None
-        }
+        return self.serialize(db_simulation)
 
     def get_simulation(self, simulation_id: int) -> Optional[Simulation]:
         """Get simulation by ID using ORM"""
@@ -45,23 +88,7 @@ class SimulationService:
         if not simulation:
             return None
         
-        result = {
-            "id": simulation.id,
-            "name": simulation.name,
-            "status": simulation.status,
-            "machine_id": simulation.machine_id,
-            "created_at": simulation.created_at,
-            "updated_at": simulation.updated_at,
-            "machine": {
-                "id": simulation.machine.id,
-                "name": simulation.machine.name,
-                "cpu": simulation.machine.cpu,
-                "gpu": simulation.machine.gpu,
-                "memory": simulation.machine.memory,
-                "status": simulation.machine.status
-            } if simulation.machine else None
-        }
-        return result
+        return self.serialize(simulation)
 
     def get_simulations(
         self, 
@@ -69,52 +96,60 @@ class SimulationService:
         order_by: str = "created_at",
         order_direction: str = "desc",
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[dict]:
-        """Get simulations with filtering and ordering using ORM"""
+        """Get simulations with filtering and ordering using ORM.
+
+        With a cursor (from encode_simulation_cursor) the page continues after the
+        cursor's row by keyset instead of skipping rows; skip is then ignored.
+        """
         query = self.db.query(Simulation)
         
         if status:
             query = query.filter(Simulation.status == status)
         
-        # Order by
-        if order_by == "name":
-            order_column = Simulation.name
-        elif order_by == "created_at":
-            order_column = Simulation.created_at
-        elif order_by == "updated_at":
-            order_column = Simulation.updated_at
-        else:
-            order_column = Simulation.created_at
+        order_by, order_direction = _simulation_ordering(order_by, order_direction)
+        order_column = getattr(Simulation, order_by)
         
+        if cursor is not None:
+            cursor_value, cursor_id = decode_simulation_cursor(cursor, order_by, order_direction)
+            # Re-read the sort key from the cursor's row so it compares in the column's stored
+            # format; the encoded value only stands in if that row has since been deleted
+            cursor_row = aliased(Simulation)
+            cursor_key = func.coalesce(
+                select(getattr(cursor_row, order_by)).where(cursor_row.id == cursor_id).scalar_subquery(),
+                cursor_value
+            )
+            if order_direction == "desc":
+                query = query.filter(tuple_(order_column, Simulation.id) < tuple_(cursor_key, cursor_id))
+            else:
+                query = query.filter(tuple_(order_column, Simulation.id) > tuple_(cursor_key, cursor_id))
+            skip = 0
+        
+        # id breaks ties so keyset pages neither repeat nor skip rows
         if order_direction == "desc":
-            query = query.order_by(order_column.desc())
+            query = query.order_by(order_column.desc(), Simulation.id.desc())
         else:
-            query = query.order_by(order_column.asc())
+            query = query.order_by(order_column.asc(), Simulation.id.asc())
         
         simulations = query.offset(skip).limit(limit).all()
         
         # Convert to dict format with machine data
-        result = []
-        for sim in simulations:
-            result.append({
-                "id": sim.id,
-                "name": sim.name,
-                "status": sim.status,
-                "machine_id": sim.machine_id,
-                "created_at": sim.created_at,
-                "updated_at": sim.updated_at,
-                "machine": {
-                    "id": sim.machine.id,
-                    "name": sim.machine.name,
-                    "cpu": sim.machine.cpu,
-                    "gpu": sim.machine.gpu,
-                    "memory": sim.machine.memory,
-                    "status": sim.machine.status
-                } if sim.machine else None
-            })
-        
-        return result
+        return [self.serialize(sim) for sim in simulations]
+
+    def count_simulations(self, status: Optional[SimulationStatus] = None, estimate: bool = False) -> int:
+        """Count simulations, or on PostgreSQL estimate the count from planner statistics"""
+        query = self.db.query(Simulation)
+        if status:
+            query = query.filter(Simulation.status == status)
+        
+        dialect = self.db.get_bind().dialect
+        if estimate and dialect.name == "postgresql":
+            statement = query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+            plan = self.db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+            return int(plan[0]["Plan"]["Plan Rows"])
+        return query.count()
 
     def update_simulation(self, simulation_id: int, simulation_update: SimulationUpdate) -> Optional[Simulation]:
         """Update simulation using ORM"""
@@ -126,6 +161,9 @@ class SimulationService:
         for field, value in update_data.items():
             setattr(db_simulation, field, value)
         
+        if "status" in update_data:
+            # Live convergence subscribers watch for the simulation finishing
+            convergence_events.notify(self.db, [simulation_id])
         self.db.commit()
         self.db.refresh(db_simulation)
         return db_simulation
@@ -0,0 +1,31 @@
+"""
+Compare per-point and batched convergence ingestion.
+
+Usage: python -m benchmarks.bench_convergence_ingest [points]
+"""
+import sys
+from app.schemas.convergence_data import ConvergenceDataCreate
+from app.services.convergence_service import ConvergenceService
+from benchmarks.common import bench_session, create_simulation, timed
+
+
+def main(points: int = 2000):
+    loss_values = [1.0 / (i + 1) for i in range(points)]
+
+    with bench_session() as db:
+        service = ConvergenceService(db)
+
+        simulation = create_simulation(db, "bench_per_point")
+        with timed(f"add_convergence_data x{points}", points):
+            for loss_value in loss_values:
+                service.add_convergence_data(
+                    ConvergenceDataCreate(simulation_id=simulation.id, loss_value=loss_value)
+                )
+
+        simulation = create_simulation(db, "bench_batch")
+        with timed(f"add_convergence_data_batch ({points})", points):
+            service.add_convergence_data_batch(simulation.id, loss_values)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
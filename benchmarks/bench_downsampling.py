@@ -0,0 +1,55 @@
+"""
+Benchmark graph downsampling on a synthetic 1M-point convergence series.
+
+Times the pure downsampling functions, then GET /convergence/{id}/graph on the
+stored series with and without the SQL candidate reduction.
+
+Usage: python -m benchmarks.bench_downsampling [points] [max_points]
+"""
+import json
+import sys
+import numpy as np
+from fastapi.testclient import TestClient
+from app.db.database import get_db
+from app.main import app
+from app.services import convergence_service
+from app.services.convergence_service import ConvergenceService
+from app.services.downsampling import downsample_indices
+from benchmarks.common import bench_session, create_simulation, timed
+
+
+def main(points: int = 1_000_000, max_points: int = 2000):
+    rng = np.random.default_rng(0)
+    steps = np.arange(1, points + 1, dtype=np.float64)
+    losses = np.exp(-steps / (points / 5)) + rng.normal(0, 0.01, points)
+
+    raw_bytes = len(json.dumps([{"step": int(s), "loss_value": float(v)} for s, v in zip(steps[:10_000], losses)]))
+    print(f"raw JSON payload (extrapolated)          {raw_bytes * points / 10_000 / 1e6:10.1f} MB")
+
+    for method in ("lttb", "minmax"):
+        with timed(f"{method} {points} -> {max_points}"):
+            indices = downsample_indices(steps, losses, max_points, method)
+        payload = json.dumps([{"step": int(steps[i]), "loss_value": float(losses[i])} for i in indices])
+        print(f"{method} JSON payload                       {len(payload) / 1e3:10.1f} KB ({len(indices)} points)")
+
+    with bench_session() as db:
+        simulation = create_simulation(db, "bench_graph")
+        ConvergenceService(db).add_convergence_data_batch(simulation.id, losses.tolist())
+        app.dependency_overrides[get_db] = lambda: db
+        client = TestClient(app)
+        url = f"/convergence/{simulation.id}/graph?max_points={max_points}"
+        try:
+            reduction = convergence_service.GRAPH_CANDIDATES_PER_POINT
+            for label, candidates_per_point in (("full fetch", points), ("SQL M4 reduction", reduction)):
+                convergence_service.GRAPH_CANDIDATES_PER_POINT = candidates_per_point
+                client.get(url)
+                with timed(f"GET graph, {label}"):
+                    response = client.get(url)
+                print(f"{'':<40} {len(response.json()['data_points']):10d} points")
+        finally:
+            convergence_service.GRAPH_CANDIDATES_PER_POINT = reduction
+            app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,79 @@
+"""
+Compare FastAPI's response-model serialization with the fast JSON path for
+large simulation lists and convergence graphs.
+
+Usage: python -m benchmarks.bench_json_responses [simulations] [points]
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+from app.models.simulation import SimulationStatus
+from app.schemas.convergence_data import ConvergenceGraphResponse
+from app.schemas.simulation import SimulationListResponse
+from app.services.json_encoding import FastJSONResponse
+from benchmarks.common import timed
+
+
+def simulation_list(count: int) -> dict:
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    machine = {"id": 1, "name": "gpu-cluster-01", "cpu": "Intel Xeon", "gpu": "NVIDIA V100", "memory": 32.0, "status": "available"}
+    return {
+        "simulations": [{
+            "id": i,
+            "name": f"simulation-{i}",
+            "status": SimulationStatus.RUNNING,
+            "machine_id": 1,
+            "created_at": created + timedelta(seconds=i),
+            "updated_at": created + timedelta(seconds=i),
+            "machine": machine
+        } for i in range(count)],
+        "total": count,
+        "page": 1,
+        "size": count,
+        "next_cursor": None
+    }
+
+
+def convergence_graph(count: int) -> dict:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return {
+        "simulation_id": 1,
+        "data_points": [{
+            "id": i + 1,
+            "simulation_id": 1,
+            "step": i + 1,
+            "timestamp": start + timedelta(milliseconds=i),
+            "loss_value": 1.0 / (i + 1)
+        } for i in range(count)],
+        "is_complete": True,
+        "total_points": count
+    }
+
+
+def compare(label: str, model, content: dict, count: int):
+    field = create_response_field(name=f"Response_{model.__name__}", type_=model)
+    adapter = TypeAdapter(model)
+
+    async def response_model_path() -> bytes:
+        return JSONResponse(await serialize_response(field=field, response_content=content, is_coroutine=False)).body
+
+    with timed(f"{label}: response_model + JSONResponse", count):
+        before = asyncio.run(response_model_path())
+    with timed(f"{label}: TypeAdapter validate + dump_json", count):
+        adapter.dump_json(adapter.validate_python(content))
+    with timed(f"{label}: FastJSONResponse", count):
+        after = FastJSONResponse(content).body
+    print(f"{'':<40} {len(before):10d} -> {len(after)} bytes")
+
+
+def main(simulations: int = 1000, points: int = 100_000):
+    compare(f"{simulations} simulations", SimulationListResponse, simulation_list(simulations), simulations)
+    compare(f"{points} points", ConvergenceGraphResponse, convergence_graph(points), points)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,59 @@
+"""
+Compare listing simulations with per-row lazy machine loads against the machine cache.
+
+Every simulation gets its own machine (the worst case for lazy loading).
+
+Usage: python -m benchmarks.bench_simulation_list [page sizes...]
+"""
+import sys
+from sqlalchemy import event
+from sqlalchemy.orm import lazyload
+from app.models.machine import Machine
+from app.models.simulation import Simulation
+from app.services.simulation_service import SimulationService, serialize_simulation
+from benchmarks.common import bench_session, timed
+
+REPEATS = 5
+
+
+def count_statements(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def main(page_sizes=(100, 1000)):
+    with bench_session() as db:
+        largest = max(page_sizes)
+        machines = [Machine(name=f"bench-machine-{i}", cpu="cpu", gpu="gpu", memory=1.0) for i in range(largest)]
+        db.add_all(machines)
+        db.flush()
+        db.add_all(Simulation(name=f"bench_sim_{i}", machine_id=machine.id) for i, machine in enumerate(machines))
+        db.commit()
+
+        service = SimulationService(db)
+        # Compile both queries before timing
+        [serialize_simulation(simulation, None) for simulation in db.query(Simulation).limit(1)]
+        service.get_simulations(limit=1)
+        statements = count_statements(db)
+        for size in page_sizes:
+            del statements[:]
+            with timed(f"lazy machine loads ({size}) x{REPEATS}", size * REPEATS):
+                for _ in range(REPEATS):
+                    db.expunge_all()
+                    # Same query as get_simulations, with each machine lazy-loaded instead of cached
+                    page = db.query(Simulation).options(lazyload(Simulation.machine)).order_by(
+                        Simulation.created_at.desc()
+                    ).limit(size).all()
+                    [serialize_simulation(simulation, {"id": simulation.machine.id, "name": simulation.machine.name}) for simulation in page]
+            print(f"{'':<40} {len(statements) // REPEATS:10d} queries per page")
+
+            del statements[:]
+            with timed(f"get_simulations ({size}) x{REPEATS}", size * REPEATS):
+                for _ in range(REPEATS):
+                    db.expunge_all()
+                    service.get_simulations(limit=size)
+            print(f"{'':<40} {len(statements) // REPEATS:10d} queries per page")
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or (100, 1000))
@@ -0,0 +1,56 @@
+"""
+Compare JSON and binary WebSocket update frames: bytes per point and encode CPU per broadcast.
+
+Deflated sizes use the raw DEFLATE stream that permessage-deflate sends.
+
+Usage: python -m benchmarks.bench_websocket_frames [points_per_update] [updates]
+"""
+import json
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from app.routes.websocket import _serialize_points
+from app.services.convergence_frames import encode_frame
+from benchmarks.common import timed
+
+
+def _deflate(payload: bytes) -> int:
+    compressor = zlib.compressobj(wbits=-15)
+    return len(compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH))
+
+
+def main(points: int = 100, updates: int = 1000):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    batches = [
+        [
+            SimpleNamespace(
+                id=1 + n, step=1 + n, timestamp=start + timedelta(milliseconds=37 * n), loss_value=1.0 / (1 + n)
+            )
+            for n in range(batch * points, (batch + 1) * points)
+        ]
+        for batch in range(updates)
+    ]
+
+    def encode_json(batch):
+        return json.dumps({
+            "type": "new_data",
+            "simulation_id": 1,
+            "data_points": _serialize_points(batch),
+            "is_complete": False
+        }).encode()
+
+    def encode_binary(batch):
+        return encode_frame("new_data", 1, batch)
+
+    for label, encode in (("json", encode_json), ("binary", encode_binary)):
+        with timed(f"{label} encode {updates} x {points} points", updates):
+            frames = [encode(batch) for batch in batches]
+        raw = sum(len(frame) for frame in frames)
+        deflated = sum(_deflate(frame) for frame in frames)
+        total = points * updates
+        print(f"{label + ' bytes/point (raw / deflate)':<40} {raw / total:10.1f}    {deflated / total:10.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
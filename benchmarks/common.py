@@ -0,0 +1,61 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite file by default; set
+BENCH_DATABASE_URL to point them at a PostgreSQL instance instead.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base
+from app.db.seed_data import seed_machines
+from app.models.machine import Machine
+from app.models.simulation import Simulation
+
+
+@contextmanager
+def bench_session():
+    """Yield a session bound to a freshly created, seeded benchmark database"""
+    url = os.getenv("BENCH_DATABASE_URL")
+    tmpdir = None
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{tmpdir.name}/bench.db"
+
+    engine = create_engine(url, connect_args={"check_same_thread": False} if "sqlite" in url else {})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        seed_machines(db)
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+
+def create_simulation(db, name: str) -> Simulation:
+    """Create a simulation on the first seeded machine"""
+    machine = db.query(Machine).first()
+    simulation = Simulation(name=name, machine_id=machine.id)
+    db.add(simulation)
+    db.commit()
+    db.refresh(simulation)
+    return simulation
+
+
+@contextmanager
+def timed(label: str, count: int = None):
+    """Print wall-clock time (and per-item cost when count is given) for a block"""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if count:
+        print(f"{label:<40} {elapsed * 1000:10.1f} ms  {elapsed / count * 1e6:10.1f} us/item")
+    else:
+        print(f"{label:<40} {elapsed * 1000:10.1f} ms")
@@ -1,15 +1,22 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.db.database import get_db, Base
+from app.db.database import get_async_db, get_db, Base
 from app.db.seed_data import seed_machines
+from app.models.machine import Machine
+from app.models.simulation import Simulation, SimulationStatus
+from app.services.convergence_buffer import convergence_buffer
+from app.routes.websocket import manager
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 def override_get_db():
@@ -20,6 +27,11 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(scope="session")
 def setup_database():
     Base.metadata.create_all(bind=engine)
@@ -34,6 +46,9 @@ def setup_database():
 @pytest.fixture
 def client(setup_database):
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    convergence_buffer.session_factory = TestingSessionLocal
+    manager.session_factory = TestingAsyncSessionLocal
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -46,3 +61,17 @@ def db_session():
         yield db
     finally:
         db.close()
+
+
+@pytest.fixture
+def create_simulation(setup_database, db_session):
+    machine = db_session.query(Machine).first()
+    
+    def create(name: str, status: SimulationStatus = SimulationStatus.PENDING) -> Simulation:
+        simulation = Simulation(name=name, machine_id=machine.id, status=status)
+        db_session.add(simulation)
+        db_session.commit()
+        db_session.refresh(simulation)
+        return simulation
+    
+    return create
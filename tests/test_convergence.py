@@ -26,6 +26,9 @@ def test_add_convergence_data(client: TestClient, db_session: Session):
     data = response.json()
     assert data["simulation_id"] == simulation.id
     assert data["loss_value"] == 0.5
+    
+    response = client.post("/convergence/data", json={"simulation_id": 99999, "loss_value": 0.5})
+    assert response.status_code == 404
 
 
 def test_get_convergence_graph(client: TestClient, db_session: Session):
@@ -105,3 +108,449 @@ def test_convergence_simulation_not_found(client: TestClient):
     """Test convergence endpoints with non-existent simulation"""
     response = client.get("/convergence/99999/graph")
     assert response.status_code == 404
+
+
+def test_add_convergence_data_batch(client: TestClient, db_session: Session):
+    """Test adding many convergence data points in one request"""
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_batch_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    
+    loss_values = [1.0, 0.7, 0.5, 0.4]
+    response = client.post(
+        f"/convergence/{simulation.id}/data/batch",
+        json={"loss_values": loss_values}
+    )
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["simulation_id"] == simulation.id
+    assert data["count"] == 4
+    assert len(data["ids"]) == 4
+    assert len(data["timestamps"]) == 4
+    assert data["ids"] == sorted(data["ids"])
+    
+    stored = db_session.query(ConvergenceData).filter(
+        ConvergenceData.simulation_id == simulation.id
+    ).order_by(ConvergenceData.id).all()
+    assert [row.id for row in stored] == data["ids"]
+    assert [row.loss_value for row in stored] == loss_values
+
+
+def test_add_convergence_data_batch_validation(client: TestClient):
+    """Test batch endpoint rejects empty batches and unknown simulations"""
+    response = client.post("/convergence/99999/data/batch", json={"loss_values": [0.1]})
+    assert response.status_code == 404
+    
+    response = client.post("/convergence/99999/data/batch", json={"loss_values": []})
+    assert response.status_code == 422
+
+
+def test_add_convergence_data_packed(client: TestClient, db_session: Session):
+    """Test uploading convergence data as packed little-endian floats"""
+    import struct
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_packed_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    
+    headers = {"Content-Type": "application/octet-stream"}
+    response = client.post(
+        f"/convergence/{simulation.id}/data/packed",
+        content=struct.pack("<3d", 0.9, 0.6, 0.3),
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+    
+    response = client.post(
+        f"/convergence/{simulation.id}/data/packed",
+        params={"dtype": "float32"},
+        content=struct.pack("<2f", 0.25, 0.125),
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+    
+    stored = db_session.query(ConvergenceData.loss_value).filter(
+        ConvergenceData.simulation_id == simulation.id
+    ).order_by(ConvergenceData.id).all()
+    assert [row.loss_value for row in stored] == [0.9, 0.6, 0.3, 0.25, 0.125]
+    
+    response = client.post(
+        f"/convergence/{simulation.id}/data/packed",
+        content=b"\x00" * 7,
+        headers=headers
+    )
+    assert response.status_code == 422
+    
+    response = client.post(
+        f"/convergence/{simulation.id}/data/packed",
+        content=struct.pack("<2d", 0.5, float("nan")),
+        headers=headers
+    )
+    assert response.status_code == 422
+    
+    response = client.post(
+        f"/convergence/{simulation.id}/data/packed",
+        content=b"\x00" * 8 * 100_001,
+        headers=headers
+    )
+    assert response.status_code == 413
+
+
+def test_add_convergence_data_ndjson(client: TestClient, db_session: Session):
+    """Test uploading convergence data as streamed NDJSON"""
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_ndjson_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    
+    def body():
+        yield b'{"loss_value": 0.8}\n0.'
+        yield b'4\n\n{"loss_value": 0.2}'
+    
+    response = client.post(
+        f"/convergence/{simulation.id}/data/ndjson",
+        content=body(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+    
+    stored = db_session.query(ConvergenceData.loss_value).filter(
+        ConvergenceData.simulation_id == simulation.id
+    ).order_by(ConvergenceData.id).all()
+    assert [row.loss_value for row in stored] == [0.8, 0.4, 0.2]
+    
+    response = client.post(
+        f"/convergence/{simulation.id}/data/ndjson",
+        content=b'{"loss": 1.0}\n',
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 422
+    
+    def unterminated_line():
+        for _ in range(100):
+            yield b" " * 1024
+    
+    response = client.post(
+        f"/convergence/{simulation.id}/data/ndjson",
+        content=unterminated_line(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 413
+    
+    for body, line in ((b"0.5\n1" + b"0" * 400 + b"\n", 2), (b"NaN\n", 1), (b'0.5\n0.4\n{"loss_value": Infinity}\n', 3)):
+        response = client.post(
+            f"/convergence/{simulation.id}/data/ndjson",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 422
+        assert f"line {line}" in response.json()["detail"]
+    
+    response = client.post(
+        f"/convergence/{simulation.id}/data/ndjson",
+        content=b"0.5\n" * 100_001,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 413
+    assert db_session.query(ConvergenceData).filter(
+        ConvergenceData.simulation_id == simulation.id
+    ).count() == 3
+
+
+def test_get_convergence_graph_downsampled(client: TestClient, db_session: Session):
+    """Test graph endpoint downsamples to max_points keeping first, last and extremes"""
+    from app.services.convergence_service import ConvergenceService
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_graph_downsample_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    
+    loss_values = [1.0 / (i + 1) for i in range(500)]
+    loss_values[250] = 10.0
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, loss_values)
+    
+    for method in ("lttb", "minmax"):
+        response = client.get(
+            f"/convergence/{simulation.id}/graph",
+            params={"max_points": 50, "method": method}
+        )
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["total_points"] == 500
+        assert len(data["data_points"]) <= 50
+        steps = [point["step"] for point in data["data_points"]]
+        assert steps == sorted(steps)
+        assert {1, 251, 500} <= set(steps)
+        assert [point["loss_value"] for point in data["data_points"]] == [loss_values[step - 1] for step in steps]
+    
+    # Ties on the bucket extremes still yield one candidate each
+    flat = Simulation(name="test_graph_downsample_flat_sim", machine_id=machine.id)
+    db_session.add(flat)
+    db_session.commit()
+    ConvergenceService(db_session).add_convergence_data_batch(flat.id, [0.5] * 500)
+    data = client.get(f"/convergence/{flat.id}/graph", params={"max_points": 50}).json()
+    assert data["total_points"] == 500
+    assert 2 <= len(data["data_points"]) <= 50
+
+
+def test_get_convergence_data_window_and_pages(client: TestClient, db_session: Session):
+    """Test step windows, keyset pagination and tail reads"""
+    from app.services.convergence_service import ConvergenceService
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_data_pages_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, [i / 10 for i in range(10)])
+    url = f"/convergence/{simulation.id}/data"
+    
+    response = client.get(url, params={"from_step": 3, "to_step": 5})
+    assert [point["step"] for point in response.json()] == [3, 4, 5]
+    
+    unknown_id = db_session.query(ConvergenceData.id).order_by(ConvergenceData.id.desc()).first().id + 1
+    assert client.get(url, params={"after_id": unknown_id}).status_code == 400
+    
+    steps, cursor = [], None
+    while True:
+        params = {"limit": 4}
+        if cursor:
+            params["after_id"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        steps += [point["step"] for point in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert steps == list(range(1, 11))
+    
+    response = client.get(url, params={"tail": 3})
+    assert [point["step"] for point in response.json()] == [8, 9, 10]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_export_convergence_data(client: TestClient, db_session: Session):
+    """Test streaming NDJSON and CSV exports of a series"""
+    import csv
+    import io
+    import json
+    from app.services.convergence_service import ConvergenceService
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_export_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    loss_values = [1.0 / (i + 1) for i in range(25)]
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, loss_values)
+    
+    response = client.get(f"/convergence/{simulation.id}/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["step"] for record in records] == list(range(1, 26))
+    assert [record["loss_value"] for record in records] == loss_values
+    
+    response = client.get(f"/convergence/{simulation.id}/export", params={"format": "csv"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 25
+    assert [float(row["loss_value"]) for row in rows] == loss_values
+
+
+def test_iter_convergence_data_chunks(setup_database, db_session: Session):
+    """Test the export reader yields bounded chunks in step order"""
+    from app.services.convergence_service import ConvergenceService
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_export_chunks_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    service = ConvergenceService(db_session)
+    service.add_convergence_data_batch(simulation.id, [0.5] * 25)
+    
+    chunks = list(service.iter_convergence_data(simulation.id, chunk_size=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [row.step for chunk in chunks for row in chunk] == list(range(1, 26))
+
+
+def test_stream_convergence_data(client: TestClient, db_session: Session):
+    """Test the async stream endpoint returns points and completion status"""
+    from app.models.simulation import SimulationStatus
+    from app.services.convergence_service import ConvergenceService
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_stream_sim", machine_id=machine.id, status=SimulationStatus.FINISHED)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, [0.75, 0.5])
+    
+    response = client.get(f"/convergence/{simulation.id}/stream")
+    assert response.status_code == 200
+    data = response.json()
+    assert [point["loss_value"] for point in data["data_points"]] == [0.75, 0.5]
+    assert data["is_complete"] is True
+    
+    response = client.get("/convergence/99999/stream")
+    assert response.status_code == 404
+
+
+def test_async_convergence_reads_match_sync(setup_database, db_session: Session):
+    """Test the AsyncSession reads return the same windows as the sync service"""
+    import asyncio
+    from app.services.convergence_service import AsyncConvergenceService, ConvergenceService
+    from tests.conftest import TestingAsyncSessionLocal
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_async_reads_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    service = ConvergenceService(db_session)
+    service.add_convergence_data_batch(simulation.id, [float(i) for i in range(20)])
+    windows = [{}, {"from_step": 5, "to_step": 9}, {"tail": 3}, {"limit": 4}]
+    
+    async def read_async():
+        async with TestingAsyncSessionLocal() as db:
+            async_service = AsyncConvergenceService(db)
+            return (
+                [[point.step for point in await async_service.get_convergence_data(simulation.id, **window)] for window in windows],
+                await async_service.get_last_step(simulation.id),
+                await async_service.is_simulation_finished(simulation.id)
+            )
+    
+    steps, last_step, is_finished = asyncio.run(read_async())
+    assert steps == [[point.step for point in service.get_convergence_data(simulation.id, **window)] for window in windows]
+    assert last_step == 20
+    assert is_finished is False
+
+
+def test_stream_long_poll(client: TestClient, db_session: Session):
+    """Test wait parks until a point is committed, times out empty, and returns at once when complete"""
+    import threading
+    import time
+    from app.models.simulation import SimulationStatus
+    from app.services.convergence_service import ConvergenceService
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_long_poll_sim", machine_id=machine.id, status=SimulationStatus.RUNNING)
+    finished = Simulation(name="test_long_poll_finished_sim", machine_id=machine.id, status=SimulationStatus.FINISHED)
+    db_session.add_all([simulation, finished])
+    db_session.commit()
+    
+    started = time.monotonic()
+    data = client.get(f"/convergence/{simulation.id}/stream?wait=0.2").json()
+    assert data["data_points"] == [] and data["is_complete"] is False
+    assert time.monotonic() - started >= 0.2
+    
+    writer = threading.Timer(0.2, ConvergenceService(db_session).add_convergence_data_batch, (simulation.id, [0.5]))
+    writer.start()
+    started = time.monotonic()
+    data = client.get(f"/convergence/{simulation.id}/stream?wait=10").json()
+    writer.join()
+    assert [point["loss_value"] for point in data["data_points"]] == [0.5]
+    assert time.monotonic() - started < 5
+    
+    started = time.monotonic()
+    data = client.get(f"/convergence/{finished.id}/stream?wait=10").json()
+    assert data["data_points"] == [] and data["is_complete"] is True
+    assert time.monotonic() - started < 5
+    
+    assert client.get(f"/convergence/{simulation.id}/stream?wait=61").status_code == 422
+
+
+def test_long_poll_releases_connection_while_parked(setup_database, db_session: Session):
+    """Test a parked long-poll holds no transaction (and so no pooled connection)"""
+    import asyncio
+    from app.services.convergence_service import AsyncConvergenceService, ConvergenceService
+    from tests.conftest import TestingAsyncSessionLocal
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_long_poll_parked_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    
+    async def long_poll():
+        async with TestingAsyncSessionLocal() as db:
+            waiter = asyncio.create_task(AsyncConvergenceService(db).wait_for_convergence_data(simulation.id, wait=10))
+            await asyncio.sleep(0.1)
+            parked_in_transaction = db.in_transaction()
+            ConvergenceService(db_session).add_convergence_data_batch(simulation.id, [0.25])
+            data_points, is_finished = await asyncio.wait_for(waiter, 5)
+            return parked_in_transaction, [point.loss_value for point in data_points], is_finished
+    
+    assert asyncio.run(long_poll()) == (False, [0.25], False)
+
+
+def test_stream_cursor(client: TestClient, db_session: Session):
+    """Test since_id / since_step return only newer points and the next cursor to resume from"""
+    from app.services.convergence_service import ConvergenceService
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_stream_cursor_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    service = ConvergenceService(db_session)
+    inserted = service.add_convergence_data_batch(simulation.id, [0.9, 0.8, 0.7])
+    
+    data = client.get(f"/convergence/{simulation.id}/stream").json()
+    assert [point["step"] for point in data["data_points"]] == [1, 2, 3]
+    assert data["next_cursor"] == {"since_id": inserted[-1]["id"], "since_step": 3}
+    
+    data = client.get(f"/convergence/{simulation.id}/stream?since_id={inserted[0]['id']}").json()
+    assert [point["step"] for point in data["data_points"]] == [2, 3]
+    
+    data = client.get(f"/convergence/{simulation.id}/stream?since_step=2").json()
+    assert [point["step"] for point in data["data_points"]] == [3]
+    
+    cursor = data["next_cursor"]
+    data = client.get(f"/convergence/{simulation.id}/stream", params={"since_id": cursor["since_id"]}).json()
+    assert data["data_points"] == []
+    assert data["next_cursor"] == {"since_id": cursor["since_id"], "since_step": None}
+    
+    service.add_convergence_data_batch(simulation.id, [0.6])
+    data = client.get(f"/convergence/{simulation.id}/stream", params={"since_id": cursor["since_id"]}).json()
+    assert [point["step"] for point in data["data_points"]] == [4]
+
+
+def test_concurrent_writers_get_distinct_steps(setup_database, db_session: Session):
+    """Test single, batch and bare SQL writers racing on one simulation never reuse a step"""
+    from concurrent.futures import ThreadPoolExecutor
+    from app.schemas.convergence_data import ConvergenceDataCreate
+    from app.services.convergence_service import ConvergenceService
+    from tests.conftest import TestingSessionLocal
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_concurrent_steps_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    simulation_id = simulation.id
+    
+    def write(worker: int):
+        db = TestingSessionLocal()
+        try:
+            service = ConvergenceService(db)
+            for i in range(10):
+                if worker % 3 == 0:
+                    service.add_convergence_data(ConvergenceDataCreate(simulation_id=simulation_id, loss_value=0.5))
+                elif worker % 3 == 1:
+                    service.add_convergence_data_batch(simulation_id, [0.5] * 5)
+                else:
+                    service.add_convergence_data_bare_sql(simulation_id, 0.5)
+        finally:
+            db.close()
+    
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(write, range(6)))
+    
+    steps = [row.step for row in db_session.query(ConvergenceData.step).filter(
+        ConvergenceData.simulation_id == simulation_id
+    ).order_by(ConvergenceData.step)]
+    assert steps == list(range(1, 10 * (1 + 5 + 1) * 2 + 1))
+    stats = ConvergenceService(db_session).get_convergence_stats(simulation_id)
+    assert stats["point_count"] == len(steps)
@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.models.simulation import SimulationStatus
+from app.models.convergence_data import ConvergenceData
+from app.services.convergence_archive import ArchivedSeries
+from app.services.convergence_service import ConvergenceService
+
+
+def test_archived_series_roundtrip(setup_database, db_session: Session, create_simulation):
+    """Test the codec restores ids, steps, timestamps and float32 losses"""
+    simulation = create_simulation("test_archive_codec_sim", SimulationStatus.FINISHED)
+    service = ConvergenceService(db_session)
+    service.add_convergence_data_batch(simulation.id, [1.0 / (i + 1) for i in range(1000)])
+    points = service.get_convergence_data(simulation.id)
+    
+    decoded = ArchivedSeries.decode(ArchivedSeries.from_points(points).encode())
+    
+    assert decoded.ids.tolist() == [point.id for point in points]
+    assert decoded.steps.tolist() == [point.step for point in points]
+    assert decoded.datetimes(np.arange(len(points))) == [point.timestamp for point in points]
+    assert decoded.losses.tolist() == pytest.approx([point.loss_value for point in points], rel=1e-6)
+
+
+def test_archive_convergence_data(client: TestClient, db_session: Session, create_simulation):
+    """Test archiving replaces raw rows and reads decode the archive transparently"""
+    simulation = create_simulation("test_archive_sim", SimulationStatus.FINISHED)
+    loss_values = [0.5, 0.25, 0.125, 0.0625]
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, loss_values)
+    before = client.get(f"/convergence/{simulation.id}/data").json()
+    
+    response = client.post(f"/convergence/{simulation.id}/archive")
+    assert response.status_code == 200
+    assert response.json()["point_count"] == 4
+    assert db_session.query(ConvergenceData).filter(
+        ConvergenceData.simulation_id == simulation.id
+    ).count() == 0
+    
+    assert client.get(f"/convergence/{simulation.id}/data").json() == before
+    graph = client.get(f"/convergence/{simulation.id}/graph").json()
+    assert [point["loss_value"] for point in graph["data_points"]] == loss_values
+    assert graph["is_complete"] is True
+    page = client.get(f"/convergence/{simulation.id}/data", params={"after_id": before[1]["id"], "limit": 1})
+    assert [point["step"] for point in page.json()] == [3]
+    
+    # Late points continue the step sequence and are folded in by the next archive run
+    client.post(f"/convergence/{simulation.id}/add-bare-sql", params={"loss_value": 0.03125})
+    client.post(f"/convergence/{simulation.id}/data/batch", json={"loss_values": [0.015625]})
+    steps = [point["step"] for point in client.get(f"/convergence/{simulation.id}/data").json()]
+    assert steps == [1, 2, 3, 4, 5, 6]
+    
+    response = client.post(f"/convergence/{simulation.id}/archive")
+    assert response.json()["point_count"] == 6
+    export = client.get(f"/convergence/{simulation.id}/export").text.splitlines()
+    assert len(export) == 6
+
+
+def test_archive_requires_finished_simulation(client: TestClient, db_session: Session, create_simulation):
+    """Test running simulations cannot be archived"""
+    simulation = create_simulation("test_archive_running_sim", SimulationStatus.RUNNING)
+    
+    response = client.post(f"/convergence/{simulation.id}/archive")
+    assert response.status_code == 409
+
+
+def test_archive_keeps_points_committed_while_archiving(setup_database, db_session: Session, monkeypatch, create_simulation):
+    """Test a point committed between the archive's read and its delete stays raw"""
+    from tests.conftest import TestingSessionLocal
+    simulation = create_simulation("test_archive_race_sim", SimulationStatus.FINISHED)
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, [0.5, 0.25])
+    from_points = ArchivedSeries.from_points
+    
+    def from_points_with_late_write(points):
+        late = TestingSessionLocal()
+        try:
+            ConvergenceService(late).add_convergence_data_batch(simulation.id, [0.125])
+        finally:
+            late.close()
+        return from_points(points)
+    
+    monkeypatch.setattr(ArchivedSeries, "from_points", from_points_with_late_write)
+    assert ConvergenceService(db_session).archive_convergence_data(simulation.id)["point_count"] == 2
+    monkeypatch.undo()
+    
+    steps = [point.step for point in ConvergenceService(db_session).get_convergence_data(simulation.id)]
+    assert steps == [1, 2, 3]
+
+
+def test_reads_after_the_archive_skip_its_payload(setup_database, db_session: Session, monkeypatch, create_simulation):
+    """Test tail and live-cursor reads served by raw rows never decode the archive"""
+    simulation = create_simulation("test_archive_skip_sim", SimulationStatus.FINISHED)
+    service = ConvergenceService(db_session)
+    service.add_convergence_data_batch(simulation.id, [0.5, 0.25])
+    archived_id = max(point.id for point in service.get_convergence_data(simulation.id))
+    # SQLite hands deleted rowids out again when they were the highest; keep a later row
+    service.add_convergence_data_batch(create_simulation("test_archive_skip_other_sim").id, [1.0])
+    service.archive_convergence_data(simulation.id)
+    service.add_convergence_data_batch(simulation.id, [0.125, 0.0625])
+    
+    def fail_decode(payload):
+        raise AssertionError("archive decoded")
+    
+    monkeypatch.setattr(ArchivedSeries, "decode", fail_decode)
+    assert [point.step for point in service.get_convergence_data(simulation.id, tail=2)] == [3, 4]
+    assert [point.step for point in service.get_convergence_data(simulation.id, from_step=3)] == [3, 4]
+    assert [point.step for point in service.get_convergence_data_streaming(simulation.id, since_step=2)] == [3, 4]
+    assert [point.step for point in service.get_convergence_data_streaming(simulation.id, since_id=archived_id)] == [3, 4]
+
+
+def test_async_archive_reads_decode_off_the_event_loop(setup_database, db_session: Session, monkeypatch, create_simulation):
+    """Test the async service decodes and slices archives in a worker thread"""
+    import asyncio
+    import threading
+    from app.services.convergence_service import AsyncConvergenceService
+    from tests.conftest import TestingAsyncSessionLocal
+    simulation = create_simulation("test_archive_async_sim", SimulationStatus.FINISHED)
+    service = ConvergenceService(db_session)
+    service.add_convergence_data_batch(simulation.id, [0.5, 0.25, 0.125])
+    service.archive_convergence_data(simulation.id)
+    service.add_convergence_data_batch(simulation.id, [0.0625])
+    expected = [point.step for point in service.get_convergence_data(simulation.id)]
+    decode_threads = []
+    decode = ArchivedSeries.decode
+    
+    def recording_decode(payload):
+        decode_threads.append(threading.get_ident())
+        return decode(payload)
+    
+    monkeypatch.setattr(ArchivedSeries, "decode", recording_decode)
+    
+    async def read():
+        async with TestingAsyncSessionLocal() as db:
+            async_service = AsyncConvergenceService(db)
+            return (
+                [point.step for point in await async_service.get_convergence_data(simulation.id)],
+                [point.step for point in await async_service.get_convergence_data_streaming(simulation.id)],
+                threading.get_ident()
+            )
+    
+    window, streamed, loop_thread = asyncio.run(read())
+    
+    assert window == streamed == expected == [1, 2, 3, 4]
+    assert len(decode_threads) == 2 and loop_thread not in decode_threads
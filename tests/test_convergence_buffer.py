@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.main import app
+from app.models.convergence_data import ConvergenceData
+from app.services.convergence_buffer import ConvergenceWriteBuffer, BufferFullError, get_convergence_buffer
+from tests.conftest import TestingSessionLocal
+
+
+def test_buffered_ack_modes(client: TestClient, db_session: Session, create_simulation):
+    """Test ack-on-buffer and ack-on-commit through the buffered endpoint"""
+    simulation = create_simulation("test_buffered_sim")
+    
+    response = client.post(
+        "/convergence/data/buffered",
+        params={"ack": "buffer"},
+        json={"simulation_id": simulation.id, "loss_value": 0.9}
+    )
+    assert response.status_code == 202
+    assert response.json()["status"] == "buffered"
+    
+    response = client.post(
+        "/convergence/data/buffered",
+        json={"simulation_id": simulation.id, "loss_value": 0.5}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] > 0
+    assert data["loss_value"] == 0.5
+    
+    # Points are flushed in submission order, so the buffered one is committed too
+    stored = db_session.query(ConvergenceData.loss_value).filter(
+        ConvergenceData.simulation_id == simulation.id
+    ).order_by(ConvergenceData.id).all()
+    assert [row.loss_value for row in stored] == [0.9, 0.5]
+
+
+def test_buffered_backpressure(client: TestClient, db_session: Session, create_simulation):
+    """Test a full buffer answers with 429"""
+    simulation = create_simulation("test_buffer_full_sim")
+    full_buffer = ConvergenceWriteBuffer(TestingSessionLocal, max_pending_rows=0)
+    app.dependency_overrides[get_convergence_buffer] = lambda: full_buffer
+    
+    response = client.post(
+        "/convergence/data/buffered",
+        json={"simulation_id": simulation.id, "loss_value": 0.1}
+    )
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_buffer_coalesces_concurrent_points(setup_database, db_session: Session, create_simulation):
+    """Test points submitted concurrently are written in one bulk insert"""
+    simulation = create_simulation("test_buffer_coalesce_sim")
+    buffer = ConvergenceWriteBuffer(TestingSessionLocal, flush_interval_ms=20, max_batch_rows=100)
+    writes = []
+    original_write = buffer._write
+    
+    def counting_write(points):
+        writes.append(len(points))
+        return original_write(points)
+    
+    buffer._write = counting_write
+    
+    async def run():
+        results = await asyncio.gather(*[
+            buffer.submit(simulation.id, 1.0 / (i + 1)) for i in range(25)
+        ])
+        await buffer.submit(simulation.id, 0.0, wait_for_commit=False)
+        await buffer.close()
+        return results
+    
+    results = asyncio.run(run())
+    
+    assert writes == [25, 1]
+    assert [row["loss_value"] for row in results] == [1.0 / (i + 1) for i in range(25)]
+    assert db_session.query(ConvergenceData).filter(
+        ConvergenceData.simulation_id == simulation.id
+    ).count() == 26
+
+
+def test_buffer_close_waits_for_in_flight_flush(setup_database, db_session: Session, create_simulation):
+    """Test closing the buffer while a batch is being written still resolves its callers"""
+    import threading
+    simulation = create_simulation("test_buffer_close_sim")
+    buffer = ConvergenceWriteBuffer(TestingSessionLocal, flush_interval_ms=0)
+    writing = threading.Event()
+    original_write = buffer._write
+    
+    def slow_write(points):
+        writing.set()
+        threading.Event().wait(0.2)
+        return original_write(points)
+    
+    buffer._write = slow_write
+    
+    async def run():
+        submitted = asyncio.ensure_future(buffer.submit(simulation.id, 0.5))
+        while not writing.is_set():
+            await asyncio.sleep(0.01)
+        await buffer.close()
+        return await asyncio.wait_for(submitted, 1)
+    
+    result = asyncio.run(run())
+    
+    assert result["loss_value"] == 0.5
+    assert db_session.query(ConvergenceData).filter(
+        ConvergenceData.simulation_id == simulation.id
+    ).count() == 1
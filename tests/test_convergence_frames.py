@@ -0,0 +1,43 @@
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from app.routes.websocket import _serialize_points
+from app.services.convergence_frames import decode_message, encode_batch, encode_frame
+
+
+def _points(count: int, tz=None) -> list:
+    start = datetime(2024, 1, 1, tzinfo=tz)
+    return [
+        SimpleNamespace(id=100 + i, step=1 + i, timestamp=start + timedelta(milliseconds=250 * i), loss_value=1.0 / (i + 1))
+        for i in range(count)
+    ]
+
+
+def test_frame_roundtrip_matches_json_message():
+    """Test a binary frame decodes to exactly the JSON message it replaces"""
+    for tz in (None, timezone.utc):
+        points = _points(50, tz)
+        decoded = decode_message(encode_frame("new_data", 7, points, is_complete=True))
+        assert decoded == {
+            "type": "new_data",
+            "simulation_id": 7,
+            "data_points": _serialize_points(points),
+            "is_complete": True
+        }
+
+
+def test_frame_is_smaller_than_json():
+    """Test packed frames cost well under the JSON bytes per point"""
+    points = _points(1000)
+    frame = encode_frame("new_data", 7, points)
+    text = json.dumps({"type": "new_data", "simulation_id": 7, "data_points": _serialize_points(points)})
+    assert len(frame) < len(text) / 3
+
+
+def test_batch_roundtrip():
+    """Test batch frames carry several simulations' frames, including empty ones"""
+    batch = encode_batch([encode_frame("initial_data", 1, _points(3)), encode_frame("snapshot", 2, [])])
+    messages = decode_message(batch)
+    assert [(message["type"], message["simulation_id"], len(message["data_points"])) for message in messages] == [
+        ("initial_data", 1, 3), ("snapshot", 2, 0)
+    ]
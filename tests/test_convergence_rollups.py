@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.models.convergence_rollup import ConvergenceRollup
+from app.schemas.convergence_data import ConvergenceDataCreate
+from app.services.convergence_service import ConvergenceService
+from app.services.rollups import ROLLUP_LEVELS, choose_level
+
+
+def test_rollups_maintained_incrementally(setup_database, db_session: Session, create_simulation):
+    """Test rollups built across mixed ingest paths match a from-scratch aggregation"""
+    simulation = create_simulation("test_rollup_incremental_sim")
+    service = ConvergenceService(db_session)
+    losses = [((i * 7919) % 1000) / 1000 for i in range(1, 1235)]
+    
+    service.add_convergence_data_batch(simulation.id, losses[:15])
+    service.add_convergence_data(ConvergenceDataCreate(simulation_id=simulation.id, loss_value=losses[15]))
+    service.add_convergence_data_batch(simulation.id, losses[16:1234])
+    
+    for level in ROLLUP_LEVELS:
+        rollups = db_session.query(ConvergenceRollup).filter(
+            ConvergenceRollup.simulation_id == simulation.id,
+            ConvergenceRollup.level == level
+        ).order_by(ConvergenceRollup.bucket).all()
+        
+        expected = [losses[start:start + level] for start in range(0, len(losses), level)]
+        assert len(rollups) == len(expected)
+        for rollup, values in zip(rollups, expected):
+            assert rollup.count == len(values)
+            assert rollup.min_loss == min(values)
+            assert rollup.max_loss == max(values)
+            assert rollup.sum_loss == pytest.approx(sum(values))
+            assert rollup.last_loss == values[-1]
+            assert rollup.last_step == rollup.bucket * level + len(values)
+
+
+def test_choose_level():
+    """Test the coarsest level still giving the requested number of buckets is chosen"""
+    assert choose_level(1_000_000, 500) == 1000
+    assert choose_level(1_000_000, 50) == 10000
+    assert choose_level(4_000, 500) == 1
+
+
+def test_get_convergence_graph_rollup(client: TestClient, db_session: Session, create_simulation):
+    """Test rollup graph endpoint answers zoomed ranges from the right level"""
+    simulation = create_simulation("test_rollup_graph_sim")
+    ConvergenceService(db_session).add_convergence_data_batch(
+        simulation.id, [1.0 / step for step in range(1, 5001)]
+    )
+    
+    response = client.get(f"/convergence/{simulation.id}/graph/rollup", params={"points": 40})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["level"] == 100
+    assert data["to_step"] == 5000
+    assert len(data["buckets"]) == 50
+    assert data["buckets"][0]["max_loss"] == 1.0
+    assert data["buckets"][-1]["last_loss"] == 1.0 / 5000
+    
+    response = client.get(
+        f"/convergence/{simulation.id}/graph/rollup",
+        params={"from_step": 101, "to_step": 200, "points": 40}
+    )
+    data = response.json()
+    assert data["level"] == 1
+    assert [bucket["start_step"] for bucket in data["buckets"]] == list(range(101, 201))
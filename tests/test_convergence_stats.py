@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.models.convergence_data import ConvergenceData
+from app.services.convergence_service import ConvergenceService
+from app.services.convergence_stats import EMA_ALPHA, PLATEAU_PATIENCE, describe_stats, fold_stats
+
+
+def test_fold_stats_is_batch_independent():
+    """Test folding in chunks gives the same state as a naive sequential pass"""
+    rng = np.random.default_rng(7)
+    losses = np.exp(-np.arange(500) / 100) + rng.normal(0, 0.01, 500)
+    steps = np.arange(1, 501)
+    
+    state = None
+    for start, stop in [(0, 1), (1, 37), (37, 300), (300, 500)]:
+        state = fold_stats(state, steps[start:stop], losses[start:stop])
+    
+    ema, slope = losses[0], 0.0
+    for previous, loss in zip(losses[:-1], losses[1:]):
+        ema = EMA_ALPHA * loss + (1 - EMA_ALPHA) * ema
+        slope = EMA_ALPHA * (loss - previous) + (1 - EMA_ALPHA) * slope
+    
+    assert state["point_count"] == 500
+    assert state["min_loss"] == losses.min()
+    assert state["min_step"] == int(np.argmin(losses)) + 1
+    assert state["last_loss"] == losses[-1]
+    assert state["ema"] == pytest.approx(ema)
+    assert state["slope"] == pytest.approx(slope)
+
+
+def test_plateau_detection():
+    """Test a flat tail longer than the patience window is flagged"""
+    steps = np.arange(1, 2 * PLATEAU_PATIENCE + 1)
+    improving = fold_stats(None, steps[:PLATEAU_PATIENCE], 1.0 / steps[:PLATEAU_PATIENCE])
+    assert describe_stats(improving)["plateau"] is False
+    
+    flat = fold_stats(improving, steps[PLATEAU_PATIENCE:], np.full(PLATEAU_PATIENCE, 0.5))
+    described = describe_stats(flat)
+    assert described["plateau"] is True
+    assert described["steps_since_improvement"] == PLATEAU_PATIENCE
+
+
+def test_get_convergence_stats(client: TestClient, db_session: Session, create_simulation):
+    """Test the stats endpoint reflects every ingest path"""
+    simulation = create_simulation("test_stats_sim")
+    
+    response = client.get(f"/convergence/{simulation.id}/stats")
+    assert response.status_code == 200
+    assert response.json()["point_count"] == 0
+    
+    client.post(f"/convergence/{simulation.id}/data/batch", json={"loss_values": [1.0, 0.5, 0.75]})
+    client.post("/convergence/data", json={"simulation_id": simulation.id, "loss_value": 0.25})
+    client.post(f"/convergence/{simulation.id}/add-bare-sql", params={"loss_value": 0.3})
+    
+    data = client.get(f"/convergence/{simulation.id}/stats").json()
+    assert data["point_count"] == 5
+    assert data["min_loss"] == 0.25
+    assert data["min_step"] == 4
+    assert data["last_loss"] == 0.3
+    assert data["last_step"] == 5
+    assert data["plateau"] is False
+
+
+def test_stats_seeded_for_existing_series(client: TestClient, db_session: Session, create_simulation):
+    """Test series written outside the service get statistics on first read"""
+    simulation = create_simulation("test_stats_seed_sim")
+    db_session.add_all([ConvergenceData(simulation_id=simulation.id, loss_value=v) for v in (0.9, 0.4, 0.6)])
+    db_session.commit()
+    
+    data = client.get(f"/convergence/{simulation.id}/stats").json()
+    assert data["point_count"] == 3
+    assert data["min_loss"] == 0.4
+    
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, [0.1])
+    assert client.get(f"/convergence/{simulation.id}/stats").json()["min_loss"] == 0.1
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from app.services.downsampling import downsample_indices, lttb_indices, minmax_indices
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(42)
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.exp(-x / 2_000) + rng.normal(0, 0.01, len(x))
+    y[1234] = 5.0  # spike that must survive downsampling
+    y[8765] = -1.0
+    return x, y
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_keeps_endpoints_and_extremes(series, method):
+    """Test both methods respect max_points and keep first, last, min and max"""
+    x, y = series
+    indices = downsample_indices(x, y, 500, method)
+    
+    assert len(indices) <= 500
+    assert np.all(np.diff(indices) > 0)
+    assert {0, len(y) - 1, 1234, 8765} <= set(indices.tolist())
+
+
+def test_downsample_short_series_untouched(series):
+    """Test series already within max_points are returned unchanged"""
+    x, y = series
+    assert np.array_equal(downsample_indices(x[:100], y[:100], 500), np.arange(100))
+
+
+def test_lttb_and_minmax_sizes(series):
+    """Test the raw selectors return the requested number of points"""
+    x, y = series
+    assert len(lttb_indices(x, y, 300)) == 300
+    assert len(minmax_indices(y, 300)) <= 300
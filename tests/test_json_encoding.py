@@ -0,0 +1,62 @@
+import json
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.models.machine import Machine
+from app.models.simulation import Simulation, SimulationStatus
+from app.schemas.convergence_data import ConvergenceGraphResponse
+from app.schemas.simulation import SimulationListResponse
+from app.services.convergence_service import ConvergenceService
+from app.services.json_encoding import dumps
+
+
+def test_dumps_matches_pydantic_json():
+    """Test the fast path encodes responses like their pydantic models"""
+    timestamps = [
+        datetime(2026, 1, 2, 3, 4, 5),
+        datetime(2026, 1, 2, 3, 4, 5, 120000, tzinfo=timezone.utc),
+        datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=2)))
+    ]
+    graph = {
+        "simulation_id": 1,
+        "data_points": [
+            {"id": i, "simulation_id": 1, "step": i + 1, "timestamp": timestamp, "loss_value": 1 / (i + 3)}
+            for i, timestamp in enumerate(timestamps)
+        ],
+        "is_complete": False,
+        "total_points": 3
+    }
+    listing = {
+        "simulations": [{
+            "id": 1, "name": "sim", "machine_id": 2, "status": SimulationStatus.RUNNING,
+            "created_at": timestamps[1], "updated_at": timestamps[0],
+            "machine": {"id": 2, "name": "m", "cpu": "c", "gpu": "g", "memory": 32.0, "status": "available"}
+        }],
+        "total": None,
+        "page": 1,
+        "size": 100,
+        "next_cursor": None
+    }
+    
+    # Same values in the same string formats (key order may differ)
+    assert json.loads(dumps(graph)) == json.loads(ConvergenceGraphResponse(**graph).model_dump_json())
+    assert json.loads(dumps(listing)) == json.loads(SimulationListResponse(**listing).model_dump_json())
+    assert json.loads(dumps({"loss": np.float64("nan"), "steps": np.arange(2)})) == {"loss": None, "steps": [0, 1]}
+
+
+def test_fast_responses_validate_against_response_models(client: TestClient, db_session: Session):
+    """Test the list and graph endpoints still return their documented response models"""
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_fast_json_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, [0.5, 0.25])
+    
+    listing = client.get("/simulations/").json()
+    assert SimulationListResponse.model_validate(listing).model_dump(mode="json") == listing
+    
+    graph = client.get(f"/convergence/{simulation.id}/graph").json()
+    assert ConvergenceGraphResponse.model_validate(graph).model_dump(mode="json") == graph
+    assert "T" in graph["data_points"][0]["timestamp"]
@@ -64,3 +64,81 @@ def test_machine_not_found(client: TestClient):
     """Test getting non-existent machine"""
     response = client.get("/machines/99999")
     assert response.status_code == 404
+
+
+def test_machine_cache_invalidated_on_writes(client: TestClient, db_session: Session):
+    """Test machine creates and status updates are visible through the cache right away"""
+    from app.models.machine import Machine
+    response = client.post("/machines/", json={
+        "name": "test_cached_machine", "cpu": "cpu", "gpu": "gpu", "memory": 8.0, "status": "available"
+    })
+    machine_id = response.json()["id"]
+    assert machine_id in [machine["id"] for machine in client.get("/machines/?status=available").json()]
+    
+    client.patch(f"/machines/{machine_id}/status?status=maintenance")
+    assert client.get(f"/machines/{machine_id}").json()["status"] == "maintenance"
+    assert machine_id not in [machine["id"] for machine in client.get("/machines/?status=available").json()]
+    
+    # A machine added behind the cache's back is picked up by the reload on a miss
+    machine = Machine(name="test_uncached_machine", cpu="cpu", gpu="gpu", memory=8.0)
+    db_session.add(machine)
+    db_session.commit()
+    assert client.get(f"/machines/{machine.id}").json()["name"] == "test_uncached_machine"
+
+
+def test_machine_cache_version_check_across_workers(client: TestClient, db_session: Session):
+    """Test a worker checking the version stamp sees another worker's status update"""
+    from app.models.machine import Machine
+    from app.services.machine_cache import MachineCache
+    from app.services.machine_service import MachineService
+    machine_id = db_session.query(Machine).first().id
+    checking_worker = MachineCache(version_check_interval=0)
+    unchecked_worker = MachineCache()
+    for cache in (checking_worker, unchecked_worker):
+        cache.get_machines(db_session)
+    
+    MachineService(db_session).update_machine_status(machine_id, "busy")
+    MachineService(db_session).update_machine_status(machine_id, "available")
+    MachineService(db_session).update_machine_status(machine_id, "offline")
+    
+    assert checking_worker.get(db_session, machine_id)["status"] == "offline"
+    assert unchecked_worker.get(db_session, machine_id)["status"] != "offline"
+
+
+def test_machine_cache_miss_probes_one_id(setup_database, db_session: Session):
+    """Test unknown ids cost a single-row probe, never a catalog reload"""
+    from app.models.machine import Machine
+    from app.services.machine_cache import MachineCache
+    cache = MachineCache()
+    cache.get_machines(db_session)
+    loads = []
+    load = cache._load
+    cache._load = lambda db: loads.append(1) or load(db)
+    
+    assert cache.get(db_session, 999_999) is None
+    assert cache.get(db_session, 999_999) is None
+    machine = Machine(name="test_probed_machine", cpu="cpu", gpu="gpu", memory=8.0)
+    db_session.add(machine)
+    db_session.commit()
+    assert cache.get(db_session, machine.id)["name"] == "test_probed_machine"
+    assert machine.id in cache.get_machines(db_session)
+    assert loads == []
+
+
+def test_machine_cache_discards_load_racing_a_write(setup_database, db_session: Session):
+    """Test a catalog read before an invalidation is returned but not cached"""
+    from app.services.machine_cache import MachineCache
+    cache = MachineCache()
+    execute = db_session.execute
+    
+    def execute_then_invalidate(*args, **kwargs):
+        result = execute(*args, **kwargs)
+        cache.invalidate()
+        return result
+    
+    db_session.execute = execute_then_invalidate
+    try:
+        assert cache.get_machines(db_session)
+    finally:
+        del db_session.execute
+    assert cache._machines is None
@@ -0,0 +1,84 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, text
+from app.db.database import Base
+import app.models  # noqa: F401 - register all tables on Base.metadata
+
+
+@pytest.fixture
+def alembic_config(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    url = f"sqlite:///{tmp_path}/migrations.db"
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url)
+    yield config, create_engine(url)
+
+
+def test_migrations_match_models(alembic_config):
+    """Test upgrading to head yields exactly the schema declared by the models"""
+    config, engine = alembic_config
+    command.upgrade(config, "head")
+    
+    with engine.connect() as connection:
+        diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    assert diff == []
+    
+    command.downgrade(config, "base")
+
+
+def test_convergence_step_backfill(alembic_config):
+    """Test existing convergence points get steps in timestamp order"""
+    config, engine = alembic_config
+    command.upgrade(config, "0001")
+    
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO machines (id, name, cpu, gpu, memory) VALUES (1, 'm', 'cpu', 'gpu', 1.0)"
+        ))
+        connection.execute(text(
+            "INSERT INTO simulations (id, name, status, machine_id) VALUES (1, 'a', 'PENDING', 1), (2, 'b', 'PENDING', 1)"
+        ))
+        connection.execute(text("""
+            INSERT INTO convergence_data (id, simulation_id, timestamp, loss_value) VALUES
+                (1, 1, '2024-01-01 00:00:02', 0.5),
+                (2, 2, '2024-01-01 00:00:01', 0.9),
+                (3, 1, '2024-01-01 00:00:01', 0.7),
+                (4, 1, '2024-01-01 00:00:02', 0.3)
+        """))
+    
+    command.upgrade(config, "0002")
+    
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT id, step FROM convergence_data ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [(1, 2), (2, 1), (3, 1), (4, 3)]
+
+
+def test_simulation_last_step_backfill(alembic_config):
+    """Test the step counter continues from raw points, or from the archive when they are gone"""
+    config, engine = alembic_config
+    command.upgrade(config, "0008")
+    
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO machines (id, name, cpu, gpu, memory) VALUES (1, 'm', 'cpu', 'gpu', 1.0)"
+        ))
+        connection.execute(text(
+            "INSERT INTO simulations (id, name, status, machine_id) VALUES "
+            "(1, 'a', 'PENDING', 1), (2, 'b', 'FINISHED', 1), (3, 'c', 'PENDING', 1)"
+        ))
+        connection.execute(text(
+            "INSERT INTO convergence_data (simulation_id, step, loss_value) VALUES (1, 1, 0.5), (1, 2, 0.4)"
+        ))
+        connection.execute(text(
+            "INSERT INTO convergence_archives (simulation_id, codec, point_count, last_step, payload) "
+            "VALUES (2, 'zlib-delta-v1', 7, 7, x'00')"
+        ))
+    
+    command.upgrade(config, "0009")
+    
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT id, last_step FROM simulations ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [(1, 2), (2, 7), (3, 0)]
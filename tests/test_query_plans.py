@@ -0,0 +1,200 @@
+from contextlib import contextmanager
+import os
+import pytest
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import Session
+from app.db.database import Base
+from app.models.simulation import Simulation, SimulationStatus
+from app.models.machine import Machine
+from app.services.convergence_service import ConvergenceService
+from app.services.simulation_service import SimulationService, encode_simulation_cursor
+from tests.conftest import engine
+
+
+@contextmanager
+def captured_selects(target=engine):
+    """Collect (statement, parameters) for every SELECT (including WITH ... SELECT) issued on the test engine"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+    
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+def query_plan(statement, parameters) -> str:
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def assert_convergence_reads_use_index(statements):
+    plans = [query_plan(*captured) for captured in statements if "convergence_data" in captured[0]]
+    assert plans
+    for plan in plans:
+        assert "USING INDEX ix_convergence_data_simulation_id_step" in plan, plan
+        assert "SCAN" not in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+@pytest.fixture
+def simulation(setup_database, db_session: Session) -> Simulation:
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_plan_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, [0.9, 0.5, 0.1])
+    return simulation
+
+
+def test_convergence_data_read_plan(db_session: Session, simulation: Simulation):
+    """Test the data read is served by the (simulation_id, step) index without sorting"""
+    with captured_selects() as statements:
+        ConvergenceService(db_session).get_convergence_data(simulation.id)
+    assert_convergence_reads_use_index(statements)
+
+
+def test_convergence_stream_read_plan(db_session: Session, simulation: Simulation):
+    """Test the streaming read is served by the (simulation_id, step) index without sorting"""
+    with captured_selects() as statements:
+        ConvergenceService(db_session).get_convergence_data_streaming(simulation.id, "2000-01-01 00:00:00")
+    assert_convergence_reads_use_index(statements)
+
+
+def test_convergence_graph_read_plan(db_session: Session, simulation: Simulation):
+    """Test the bare SQL graph read is served by the (simulation_id, step) index without sorting"""
+    with captured_selects() as statements:
+        ConvergenceService(db_session).get_convergence_graph_data(simulation.id)
+    assert_convergence_reads_use_index(statements)
+
+
+def test_convergence_data_page_plan(db_session: Session, simulation: Simulation):
+    """Test keyset pages and tail reads stay on the (simulation_id, step) index"""
+    service = ConvergenceService(db_session)
+    first_page = service.get_convergence_data(simulation.id, limit=1)
+    with captured_selects() as statements:
+        service.get_convergence_data(simulation.id, after_id=first_page[-1].id, limit=1)
+        service.get_convergence_data(simulation.id, from_step=2, to_step=3)
+        service.get_convergence_data(simulation.id, tail=2)
+    assert_convergence_reads_use_index(statements)
+
+
+def test_convergence_stream_cursor_plan(db_session: Session, simulation: Simulation):
+    """Test id-cursor stream reads probe the (simulation_id, id) index without sorting"""
+    service = ConvergenceService(db_session)
+    first_id = service.get_convergence_data(simulation.id, limit=1)[0].id
+    with captured_selects() as statements:
+        service.get_convergence_data_streaming(simulation.id, since_id=first_id)
+    plans = [query_plan(*captured) for captured in statements if "FROM convergence_data" in captured[0]]
+    assert plans
+    for plan in plans:
+        assert "USING INDEX ix_convergence_data_simulation_id_id" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+def test_convergence_graph_reduction_plan(setup_database, db_session: Session):
+    """Test the M4 graph CTE reads the series once through the (simulation_id, step) index"""
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_plan_graph_reduction_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, [1.0 / step for step in range(1, 101)])
+    
+    with captured_selects() as statements:
+        graph = ConvergenceService(db_session).get_convergence_graph_data(simulation.id, max_points=5)
+    assert graph["total_points"] == 100
+    plans = [query_plan(*captured) for captured in statements if "WITH bucketed" in captured[0]]
+    assert len(plans) == 1
+    plan = plans[0]
+    # bucketed reads the simulation's rows once (either per-simulation index bounds it);
+    # the final join probes (simulation_id, step) per candidate step
+    assert plan.count("MATERIALIZE bucketed") == 1, plan
+    assert "SEARCH convergence_data USING INDEX ix_convergence_data_simulation_id_" in plan, plan
+    assert "SEARCH cd USING INDEX ix_convergence_data_simulation_id_step (simulation_id=? AND step=?)" in plan, plan
+    assert "SCAN convergence_data" not in plan, plan
+    assert "SCAN cd" not in plan, plan
+
+
+def test_machine_status_filter_plan(setup_database, db_session: Session):
+    """Test filtering machines by status is served by ix_machines_status"""
+    with captured_selects() as statements:
+        db_session.execute(select(Machine).where(Machine.status == "available")).all()
+    plans = [query_plan(*captured) for captured in statements if "FROM machines" in captured[0]]
+    assert len(plans) == 1
+    assert "machines USING INDEX ix_machines_status" in plans[0], plans[0]
+    assert "SCAN machines" not in plans[0], plans[0]
+
+
+def run_list_queries(db: Session):
+    """Issue every simulation list shape (offset and cursor pages, each ordering, with and without
+    a status filter)"""
+    service = SimulationService(db)
+    for order_by in ("created_at", "updated_at", "name"):
+        for order_direction in ("asc", "desc"):
+            for status in (None, SimulationStatus.PENDING):
+                page = service.get_simulations(status=status, order_by=order_by, order_direction=order_direction, limit=1)
+                if page:
+                    cursor = encode_simulation_cursor(order_by, order_direction, page[-1])
+                    service.get_simulations(
+                        status=status, order_by=order_by, order_direction=order_direction, limit=1, cursor=cursor
+                    )
+
+
+def test_list_query_plans(setup_database, db_session: Session):
+    """Test simulation list queries are served by indexes without sorting"""
+    machine = db_session.query(Machine).first()
+    db_session.add(Simulation(name="test_plan_list_sim", machine_id=machine.id))
+    db_session.commit()
+    
+    with captured_selects() as statements:
+        run_list_queries(db_session)
+    plans = [query_plan(*captured) for captured in statements if "FROM simulations" in captured[0]]
+    assert len(plans) == 24
+    for plan in plans:
+        assert "simulations USING INDEX ix_simulations_" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+def test_postgres_query_plans():
+    """Test the hot queries can be served by indexes on PostgreSQL.
+
+    The schema is created inside a transaction that is rolled back, and sequential
+    scans are disabled so the (tiny) tables still show which indexes apply.
+    """
+    pg_engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    with pg_engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.execute(text("CREATE SCHEMA plan_test"))
+            connection.execute(text("SET LOCAL search_path TO plan_test"))
+            connection.execute(text("SET LOCAL enable_seqscan TO off"))
+            Base.metadata.create_all(connection)
+            
+            db = Session(bind=connection)
+            machine = Machine(name="plan-machine", cpu="cpu", gpu="gpu", memory=1.0)
+            db.add(machine)
+            db.flush()
+            simulation = Simulation(name="plan-sim", machine_id=machine.id)
+            db.add(simulation)
+            db.flush()
+            with captured_selects(connection) as statements:
+                run_list_queries(db)
+                db.execute(select(Machine).where(Machine.status == "available")).all()
+                ConvergenceService(db).get_convergence_data(simulation.id)
+                ConvergenceService(db).get_convergence_data_streaming(simulation.id, since_id=0)
+            
+            for statement, parameters in statements:
+                plan = "\n".join(row[0] for row in connection.exec_driver_sql(f"EXPLAIN {statement}", parameters))
+                for table in ("simulations", "machines", "convergence_data"):
+                    assert f"Seq Scan on {table}" not in plan, plan
+        finally:
+            transaction.rollback()
+    pg_engine.dispose()
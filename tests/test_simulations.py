@@ -1,9 +1,14 @@
+from contextlib import contextmanager
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from app.models.simulation import Simulation, SimulationStatus
 from app.models.machine import Machine
 from app.schemas.simulation import SimulationCreate
+from app.services.machine_cache import machine_cache
+from app.services.simulation_service import SimulationService
+from tests.conftest import engine
 
 
 def test_create_simulation(client: TestClient, db_session: Session):
@@ -103,3 +108,116 @@ def test_simulation_not_found(client: TestClient):
     """Test getting non-existent simulation"""
     response = client.get("/simulations/99999")
     assert response.status_code == 404
+
+
+@contextmanager
+def counted_statements():
+    """Collect every SQL statement issued on the test engine"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_simulation_serializers_load_machines_in_one_query(client: TestClient, db_session: Session):
+    """Test list, detail and create take machines from the machine cache instead of loading one per row"""
+    machines = {machine.id: machine.name for machine in db_session.query(Machine)}
+    machine_ids = sorted(machines)
+    simulations = [Simulation(name=f"test_n_plus_one_{i}", machine_id=machine_ids[i % len(machine_ids)]) for i in range(20)]
+    db_session.add_all(simulations)
+    db_session.commit()
+    simulation_id = simulations[0].id
+    db_session.expunge_all()
+    service = SimulationService(db_session)
+    
+    machine_cache.invalidate()
+    with counted_statements() as statements:
+        page = service.get_simulations(limit=20)
+    assert len(statements) == 2  # the page, then the machine catalog on the cold cache
+    assert len({simulation["machine"]["id"] for simulation in page}) == len(machines)
+    
+    db_session.expunge_all()
+    with counted_statements() as statements:
+        page = service.get_simulations(limit=20)
+    assert len(statements) == 1
+    
+    db_session.expunge_all()
+    with counted_statements() as statements:
+        detail = service.get_simulation_with_machine_data(simulation_id)
+    assert len(statements) == 1
+    assert detail["machine"]["id"] == machine_ids[0]
+    
+    db_session.expunge_all()
+    with counted_statements() as statements:
+        created = service.create_simulation(SimulationCreate(name="test_n_plus_one_created", machine_id=machine_ids[1]))
+    assert len(statements) == 2  # INSERT, then the refresh SELECT
+    assert created["machine"]["name"] == machines[machine_ids[1]]
+
+
+def test_update_simulation(client: TestClient, db_session: Session):
+    """Test updating a simulation returns it with its machine data"""
+    machine = db_session.query(Machine).first()
+    simulation = Simulation(name="test_update_sim", machine_id=machine.id)
+    db_session.add(simulation)
+    db_session.commit()
+    db_session.refresh(simulation)
+    
+    response = client.put(f"/simulations/{simulation.id}", json={"name": "test_update_sim_renamed"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["name"] == "test_update_sim_renamed"
+    assert data["machine"]["id"] == machine.id
+
+
+def test_list_simulations_keyset_cursor(client: TestClient, db_session: Session):
+    """Test walking every ordering by cursor visits each simulation once, in the offset order"""
+    machine = db_session.query(Machine).first()
+    # Created within the same second, so created_at ties are broken by id
+    db_session.add_all(
+        Simulation(name=f"test_cursor_{i % 3}", machine_id=machine.id, status=SimulationStatus.RUNNING) for i in range(7)
+    )
+    db_session.commit()
+    
+    for order_by in ("created_at", "updated_at", "name"):
+        for order_direction in ("asc", "desc"):
+            params = {"status": "running", "order_by": order_by, "order_direction": order_direction}
+            expected = [simulation["id"] for simulation in client.get("/simulations/", params={**params, "size": 1000}).json()["simulations"]]
+            
+            walked = []
+            page_params = {**params, "size": 3, "count": "none"}
+            while True:
+                data = client.get("/simulations/", params=page_params).json()
+                walked.extend(simulation["id"] for simulation in data["simulations"])
+                assert data["total"] is None
+                if data["next_cursor"] is None:
+                    break
+                page_params["cursor"] = data["next_cursor"]
+            assert walked == expected, (order_by, order_direction)
+    
+    page = client.get("/simulations/", params={"size": 2, "order_by": "name"}).json()
+    assert page["total"] == db_session.query(Simulation).count()
+    assert client.get("/simulations/", params={"cursor": page["next_cursor"], "order_by": "created_at"}).status_code == 400
+    assert client.get("/simulations/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_list_simulations_cursor_survives_deleted_row(client: TestClient, db_session: Session):
+    """Test a cursor still continues after its row is deleted"""
+    machine = db_session.query(Machine).first()
+    db_session.add_all(Simulation(name=f"test_deleted_cursor_{i}", machine_id=machine.id) for i in range(4))
+    db_session.commit()
+    params = {"order_by": "name", "order_direction": "asc", "size": 1000}
+    names = [simulation["name"] for simulation in client.get("/simulations/", params=params).json()["simulations"]]
+    start = names.index("test_deleted_cursor_0")
+    
+    first = client.get("/simulations/", params={**params, "size": start + 2}).json()
+    assert first["simulations"][-1]["name"] == "test_deleted_cursor_1"
+    client.delete(f"/simulations/{first['simulations'][-1]['id']}")
+    
+    rest = client.get("/simulations/", params={**params, "cursor": first["next_cursor"]}).json()
+    assert [simulation["name"] for simulation in rest["simulations"]][:2] == ["test_deleted_cursor_2", "test_deleted_cursor_3"]
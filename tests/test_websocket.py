@@ -0,0 +1,496 @@
+import asyncio
+import json
+import os
+import time
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from sqlalchemy.orm import Session
+from app.models.simulation import Simulation, SimulationStatus
+from app.routes.websocket import ConnectionManager, Outbound, Subscriber, _forward_batches, _render, manager
+from app.schemas.simulation import SimulationUpdate
+from app.services.convergence_service import ConvergenceService
+from app.services.convergence_events import (
+    MAX_NOTIFY_PAYLOAD,
+    ConvergenceEventBus,
+    InMemoryBroker,
+    PostgresBroker,
+    convergence_events,
+    decode_notify_payload,
+    encode_notify_payloads
+)
+from app.services.convergence_frames import BINARY_SUBPROTOCOL, decode_message
+from app.services.simulation_service import SimulationService
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    """Poll a condition set by the server side of a websocket session"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_websocket_simulation_not_found(client: TestClient):
+    """Test subscribing to an unknown simulation reports an error"""
+    with client.websocket_connect("/ws/convergence/99999") as websocket:
+        assert websocket.receive_json() == {"error": "Simulation not found"}
+    assert wait_until(lambda: 99999 not in manager.producers)
+
+
+def test_websocket_shared_producer(client: TestClient, db_session: Session, create_simulation):
+    """Test subscribers of one simulation share a single producer and all receive updates"""
+    simulation = create_simulation("test_ws_shared_sim", SimulationStatus.RUNNING)
+    service = ConvergenceService(db_session)
+    service.add_convergence_data_batch(simulation.id, [1.0])
+    url = f"/ws/convergence/{simulation.id}"
+    
+    with client.websocket_connect(url) as first, client.websocket_connect(url) as second:
+        for websocket in (first, second):
+            initial = websocket.receive_json()
+            assert initial["type"] == "initial_data"
+            assert [point["step"] for point in initial["data_points"]] == [1]
+        assert len(manager.active_connections[simulation.id]) == 2
+        assert simulation.id in manager.producers
+        
+        service.add_convergence_data_batch(simulation.id, [0.5, 0.25])
+        for websocket in (first, second):
+            update = websocket.receive_json()
+            assert update["type"] == "new_data"
+            assert [point["step"] for point in update["data_points"]] == [2, 3]
+        
+        SimulationService(db_session).update_simulation(
+            simulation.id, SimulationUpdate(status=SimulationStatus.FINISHED)
+        )
+        for websocket in (first, second):
+            assert websocket.receive_json()["type"] == "simulation_finished"
+    
+    assert wait_until(lambda: simulation.id not in manager.active_connections)
+    assert simulation.id not in manager.producers
+
+
+def test_websocket_producer_cancelled_after_last_subscriber(client: TestClient, db_session: Session, create_simulation):
+    """Test the producer stops once every subscriber has disconnected"""
+    simulation = create_simulation("test_ws_cancel_sim", SimulationStatus.RUNNING)
+    
+    with client.websocket_connect(f"/ws/convergence/{simulation.id}") as websocket:
+        assert websocket.receive_json()["type"] == "initial_data"
+        producer = manager.producers[simulation.id]
+    
+    assert wait_until(lambda: simulation.id not in manager.producers)
+    assert wait_until(producer.done)
+
+
+def test_websocket_pushes_update_on_commit(client: TestClient, db_session: Session, create_simulation):
+    """Test a committed point reaches subscribers without waiting for a poll interval"""
+    simulation = create_simulation("test_ws_push_sim", SimulationStatus.RUNNING)
+    service = ConvergenceService(db_session)
+    
+    with client.websocket_connect(f"/ws/convergence/{simulation.id}") as websocket:
+        assert websocket.receive_json()["type"] == "initial_data"
+        assert manager.poll_interval is None
+        
+        started = time.monotonic()
+        service.add_convergence_data_batch(simulation.id, [0.5])
+        update = websocket.receive_json()
+        elapsed = time.monotonic() - started
+        
+        assert update["type"] == "new_data"
+        assert [point["loss_value"] for point in update["data_points"]] == [0.5]
+        assert elapsed < 0.5
+
+
+@pytest.fixture
+def fast_batches():
+    batch_interval = manager.batch_interval
+    manager.batch_interval = 0.01
+    yield
+    manager.batch_interval = batch_interval
+
+
+def receive_until(websocket, message_type: str) -> dict:
+    while True:
+        message = websocket.receive_json()
+        if message["type"] == message_type:
+            return message
+
+
+def test_multiplexed_websocket_subscriptions(client: TestClient, db_session: Session, fast_batches, create_simulation):
+    """Test one socket follows several simulations and gets their updates merged into batches"""
+    first = create_simulation("test_ws_mux_first", SimulationStatus.RUNNING)
+    second = create_simulation("test_ws_mux_second", SimulationStatus.RUNNING)
+    service = ConvergenceService(db_session)
+    service.add_convergence_data_batch(first.id, [1.0])
+    
+    with client.websocket_connect("/ws/convergence") as websocket:
+        websocket.send_json({"action": "subscribe", "simulation_ids": [first.id, second.id, 99999]})
+        reply = websocket.receive_json()
+        assert reply == {"type": "subscribed", "simulation_ids": sorted([first.id, second.id]), "not_found": [99999]}
+        
+        initial = receive_until(websocket, "batch")["updates"]
+        assert {update["simulation_id"] for update in initial if update["type"] == "initial_data"} == {first.id, second.id}
+        assert manager.producers.keys() >= {first.id, second.id}
+        
+        service.add_convergence_data_bulk([
+            {"simulation_id": first.id, "loss_value": 0.5},
+            {"simulation_id": second.id, "loss_value": 0.25}
+        ])
+        batch = receive_until(websocket, "batch")["updates"]
+        assert {(update["simulation_id"], update["data_points"][0]["loss_value"]) for update in batch} == {
+            (first.id, 0.5), (second.id, 0.25)
+        }
+        
+        websocket.send_json({"action": "unsubscribe", "simulation_ids": [second.id]})
+        assert receive_until(websocket, "unsubscribed")["simulation_ids"] == [first.id]
+        assert wait_until(lambda: second.id not in manager.producers)
+        
+        websocket.send_json({"action": "watch"})
+        assert websocket.receive_json()["type"] == "error"
+    
+    assert wait_until(lambda: first.id not in manager.producers)
+
+
+def test_websocket_binary_protocol(client: TestClient, db_session: Session, create_simulation):
+    """Test clients negotiating the binary subprotocol get packed frames with the same content"""
+    simulation = create_simulation("test_ws_binary_sim", SimulationStatus.RUNNING)
+    service = ConvergenceService(db_session)
+    service.add_convergence_data_batch(simulation.id, [1.0])
+    
+    with client.websocket_connect(f"/ws/convergence/{simulation.id}", subprotocols=[BINARY_SUBPROTOCOL]) as websocket:
+        assert websocket.accepted_subprotocol == BINARY_SUBPROTOCOL
+        initial = decode_message(websocket.receive_bytes())
+        assert initial["type"] == "initial_data"
+        assert [point["loss_value"] for point in initial["data_points"]] == [1.0]
+        
+        service.add_convergence_data_batch(simulation.id, [0.5, 0.25])
+        update = decode_message(websocket.receive_bytes())
+        assert update["type"] == "new_data"
+        assert [point["step"] for point in update["data_points"]] == [2, 3]
+        assert update["is_complete"] is False
+        
+        SimulationService(db_session).update_simulation(
+            simulation.id, SimulationUpdate(status=SimulationStatus.FINISHED)
+        )
+        assert websocket.receive_json()["type"] == "simulation_finished"
+
+
+def _queue_updates(overflow: str, max_queue: int = 3) -> Subscriber:
+    async def fill():
+        subscriber = Subscriber(websocket=None, max_queue=max_queue, overflow=overflow)
+        subscriber.put(Outbound(1, "finished"))
+        for step in range(1, 6):
+            # Each simulation's updates continue from its previous one (steps alternate between 1 and 2)
+            subscriber.put(Outbound(1 + step % 2, f"update {step}", last_step=step, droppable=True, after_step=max(step - 2, 0)))
+        return subscriber
+    return asyncio.run(fill())
+
+
+def test_subscriber_overflow_drop_oldest():
+    """Test a full queue drops its oldest update but keeps control messages"""
+    subscriber = _queue_updates("drop_oldest")
+    assert [item.message for item in subscriber.items] == ["finished", "update 4", "update 5"]
+    assert subscriber.dropped == 3
+    assert subscriber.max_queued == 3
+
+
+def test_subscriber_overflow_coalesce():
+    """Test a full queue collapses its updates into one snapshot request per simulation"""
+    subscriber = _queue_updates("coalesce")
+    assert subscriber.items[0].message == "finished"
+    snapshots = {item.simulation_id: item.last_step for item in subscriber.items if item.render == "snapshot"}
+    assert snapshots == {1: 4, 2: 5}
+    assert subscriber.coalesced > 0
+    assert len(subscriber.items) <= subscriber.max_queue
+
+
+def test_coalesced_snapshot_only_covers_the_gap():
+    """Test a snapshot starts at the cursor of the oldest update it replaces, not at step 0"""
+    async def fill():
+        subscriber = Subscriber(websocket=None, max_queue=1, overflow="coalesce")
+        subscriber.put(Outbound(1, "update", last_step=12, droppable=True, after_step=10))
+        subscriber.put(Outbound(1, "update", last_step=14, droppable=True, after_step=12))
+        subscriber.put(Outbound(1, "update", last_step=15, droppable=True, after_step=14))
+        return subscriber
+    
+    subscriber = asyncio.run(fill())
+    assert [(item.render, item.after_step, item.last_step) for item in subscriber.items] == [("snapshot", 10, 15)]
+
+
+def test_coalesced_snapshot_precedes_finish_on_multiplexed_socket(
+    client: TestClient, db_session: Session, fast_batches, create_simulation
+):
+    """Test a snapshot replacing a finished simulation's last update is sent before its stream ends"""
+    finished = create_simulation("test_ws_overflow_finished_sim", SimulationStatus.FINISHED)
+    running = create_simulation("test_ws_overflow_running_sim", SimulationStatus.RUNNING)
+    service = ConvergenceService(db_session)
+    service.add_convergence_data_batch(finished.id, [1.0, 0.5, 0.25])
+    service.add_convergence_data_batch(running.id, [2.0, 1.5])
+    
+    class RecordingSocket:
+        def __init__(self):
+            self.sent = []
+        
+        async def send_text(self, message):
+            self.sent.append(json.loads(message))
+    
+    async def forward():
+        subscriber = Subscriber(websocket=RecordingSocket(), max_queue=3, overflow="coalesce")
+        subscriber.put(Outbound(finished.id, "update", last_step=3, droppable=True, after_step=0))
+        subscriber.put(Outbound(finished.id, json.dumps({"type": "simulation_finished", "simulation_id": finished.id})))
+        subscriber.put(Outbound(finished.id))
+        # The queue is full, so this update coalesces everything droppable
+        subscriber.put(Outbound(running.id, "update", last_step=2, droppable=True, after_step=0))
+        writer = asyncio.create_task(_forward_batches(subscriber, {finished.id, running.id}))
+        while not subscriber.websocket.sent:
+            await asyncio.sleep(0.01)
+        writer.cancel()
+        return subscriber.websocket.sent
+    
+    [batch] = asyncio.run(forward())
+    updates = [(update["type"], update["simulation_id"], [point["step"] for point in update.get("data_points", [])])
+               for update in batch["updates"]]
+    assert updates == [
+        ("snapshot", finished.id, [1, 2, 3]),
+        ("simulation_finished", finished.id, []),
+        ("snapshot", running.id, [1, 2]),
+    ]
+
+
+def test_subscriber_overflow_disconnect():
+    """Test a full queue marks the subscriber for disconnection and stops queueing"""
+    subscriber = _queue_updates("disconnect")
+    assert subscriber.overflowed is True
+    assert not subscriber.items
+    assert subscriber.dropped == 4
+
+
+def test_producer_start_only_blocks_its_own_simulation():
+    """Test a slow producer start holds back subscribers of that simulation only"""
+    async def run():
+        test_manager = ConnectionManager()
+        release = asyncio.Event()
+        starts = []
+        
+        async def start_producer(simulation_id):
+            starts.append(simulation_id)
+            if simulation_id == 1:
+                await release.wait()
+            test_manager.cursors[simulation_id] = 0
+            return asyncio.create_task(asyncio.sleep(3600))
+        
+        test_manager._start_producer = start_producer
+        subscribers = [Subscriber(websocket=object(), max_queue=4, overflow="coalesce") for _ in range(3)]
+        slow = [asyncio.create_task(test_manager.subscribe(subscriber, 1)) for subscriber in subscribers[:2]]
+        await asyncio.sleep(0)
+        await asyncio.wait_for(test_manager.subscribe(subscribers[2], 2), timeout=1)
+        blocked = not any(task.done() for task in slow)
+        release.set()
+        await asyncio.gather(*slow)
+        for producer in test_manager.producers.values():
+            producer.cancel()
+        return blocked, starts, {sid: len(subs) for sid, subs in test_manager.active_connections.items()}, test_manager._start_locks
+    
+    assert asyncio.run(run()) == (True, [1, 2], {1: 2, 2: 1}, {})
+
+
+def test_coalesced_snapshot_is_bounded_by_replaced_updates(client: TestClient, db_session: Session, create_simulation):
+    """Test a snapshot covers exactly the series up to the newest update it replaced"""
+    simulation = create_simulation("test_ws_snapshot_sim", SimulationStatus.RUNNING)
+    ConvergenceService(db_session).add_convergence_data_batch(simulation.id, [1.0, 0.5, 0.25, 0.125])
+    
+    async def render():
+        subscriber = Subscriber(websocket=None, max_queue=1, overflow="coalesce")
+        return await _render(subscriber, Outbound(simulation.id, last_step=3, droppable=True, render="snapshot"))
+    
+    snapshot = json.loads(asyncio.run(render()))
+    assert snapshot["type"] == "snapshot"
+    assert [point["step"] for point in snapshot["data_points"]] == [1, 2, 3]
+
+
+def test_websocket_resume_from_cursor(client: TestClient, db_session: Session, create_simulation):
+    """Test a reconnecting client only receives the points after its cursor"""
+    simulation = create_simulation("test_ws_resume_sim", SimulationStatus.RUNNING)
+    service = ConvergenceService(db_session)
+    inserted = service.add_convergence_data_batch(simulation.id, [1.0, 0.5, 0.25, 0.125])
+    
+    with client.websocket_connect(f"/ws/convergence/{simulation.id}?after_step=2") as websocket:
+        initial = websocket.receive_json()
+        assert initial["type"] == "initial_data"
+        assert [point["step"] for point in initial["data_points"]] == [3, 4]
+    
+    with client.websocket_connect(f"/ws/convergence/{simulation.id}?after_id={inserted[2]['id']}") as websocket:
+        initial = websocket.receive_json()
+        assert [point["step"] for point in initial["data_points"]] == [4]
+        
+        service.add_convergence_data_batch(simulation.id, [0.0625])
+        update = websocket.receive_json()
+        assert [point["step"] for point in update["data_points"]] == [5]
+    
+    other = create_simulation("test_ws_resume_other_sim", SimulationStatus.RUNNING)
+    with client.websocket_connect(f"/ws/convergence/{other.id}?after_id={inserted[2]['id']}") as websocket:
+        assert "error" in websocket.receive_json()
+        with pytest.raises(WebSocketDisconnect) as disconnect:
+            websocket.receive_json()
+        assert disconnect.value.code == 1008
+
+
+def test_websocket_snapshot_joins_live_tail(client: TestClient, db_session: Session, create_simulation):
+    """Test points committed while subscribers join arrive exactly once, in step order"""
+    simulation = create_simulation("test_ws_join_sim", SimulationStatus.RUNNING)
+    service = ConvergenceService(db_session)
+    url = f"/ws/convergence/{simulation.id}"
+    
+    with client.websocket_connect(url) as first:
+        assert first.receive_json()["data_points"] == []
+        service.add_convergence_data_batch(simulation.id, [1.0, 0.5])
+        with client.websocket_connect(url) as second:
+            service.add_convergence_data_batch(simulation.id, [0.25])
+            
+            for websocket, expected in ((first, [1, 2, 3]), (second, [1, 2, 3])):
+                steps = []
+                while len(steps) < len(expected):
+                    steps.extend(point["step"] for point in websocket.receive_json()["data_points"])
+                assert steps == expected
+
+
+def test_websocket_stats(client: TestClient, db_session: Session, create_simulation):
+    """Test per-connection lag counters are exposed"""
+    simulation = create_simulation("test_ws_stats_sim", SimulationStatus.RUNNING)
+    
+    with client.websocket_connect(f"/ws/convergence/{simulation.id}") as websocket:
+        assert websocket.receive_json()["type"] == "initial_data"
+        connections = client.get("/ws/stats").json()["connections"]
+        stats = next(stats for stats in connections if stats["simulation_ids"] == [simulation.id])
+        assert stats["sent"] == 1
+        assert stats["queued"] == 0
+        assert stats["dropped"] == 0
+        assert stats["overflow"] == manager.overflow
+
+
+def test_event_bus_publishes_only_after_commit(db_session: Session, create_simulation):
+    """Test staged notifications are delivered on commit and dropped on rollback"""
+    simulation = create_simulation("test_events_commit_sim", SimulationStatus.RUNNING)
+    
+    async def notified(finish) -> bool:
+        wakeup = convergence_events.subscribe(simulation.id)
+        try:
+            db_session.query(Simulation).filter(Simulation.id == simulation.id).first()
+            convergence_events.notify(db_session, [simulation.id])
+            finish()
+            await asyncio.sleep(0)
+            return wakeup.is_set()
+        finally:
+            convergence_events.unsubscribe(simulation.id, wakeup)
+    
+    assert asyncio.run(notified(db_session.commit)) is True
+    assert asyncio.run(notified(db_session.rollback)) is False
+    assert "convergence_events_pending" not in db_session.info
+
+
+def test_event_broker_relays_commits_to_other_workers(db_session: Session, create_simulation):
+    """Test a commit in one worker wakes only the workers subscribed to that simulation"""
+    watched = create_simulation("test_broker_watched_sim", SimulationStatus.RUNNING)
+    other = create_simulation("test_broker_other_sim", SimulationStatus.RUNNING)
+    worker = ConvergenceEventBus(convergence_events.broker)
+    idle_worker = ConvergenceEventBus(convergence_events.broker)
+    
+    async def relayed():
+        wakeup = worker.subscribe(watched.id)
+        idle_wakeup = idle_worker.subscribe(other.id)
+        try:
+            db_session.query(Simulation).filter(Simulation.id == watched.id).first()
+            convergence_events.notify(db_session, [watched.id])
+            db_session.commit()
+            await asyncio.sleep(0)
+            return wakeup.is_set(), idle_wakeup.is_set(), worker.watched_simulation_ids
+        finally:
+            worker.unsubscribe(watched.id, wakeup)
+            idle_worker.unsubscribe(other.id, idle_wakeup)
+            convergence_events.broker.detach(worker.deliver)
+            convergence_events.broker.detach(idle_worker.deliver)
+    
+    assert asyncio.run(relayed()) == (True, False, {watched.id})
+
+
+def test_event_bus_stages_once_per_commit(db_session: Session):
+    """Test a transaction notifying several times reaches the broker once, with every id"""
+    staged = []
+    
+    class RecordingBroker(InMemoryBroker):
+        def stage(self, db, simulation_ids):
+            staged.append(set(simulation_ids))
+    
+    bus = ConvergenceEventBus(RecordingBroker())
+    db_session.query(Simulation).first()
+    bus.notify(db_session, [1])
+    bus.notify(db_session, [2, 3])
+    db_session.commit()
+    
+    assert staged == [{1, 2, 3}]
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+def test_postgres_broker_relays_and_reconnects():
+    """Test LISTEN/NOTIFY delivers one NOTIFY per commit and survives a dropped listener connection"""
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    pg_engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    broker = PostgresBroker(pg_engine, retry_delay=0.1)
+    bus = ConvergenceEventBus(broker)
+    notifies = []
+    event.listen(pg_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: (
+        notifies.append(statement) if "pg_notify" in statement else None
+    ))
+    
+    def commit(*simulation_ids):
+        with sessionmaker(bind=pg_engine)() as db:
+            for simulation_id in simulation_ids:
+                bus.notify(db, [simulation_id])
+            db.commit()
+    
+    async def woken(wakeup: asyncio.Event, action) -> bool:
+        wakeup.clear()
+        await asyncio.get_running_loop().run_in_executor(None, action)
+        try:
+            await asyncio.wait_for(wakeup.wait(), 5)
+        except asyncio.TimeoutError:
+            return False
+        return True
+    
+    def drop_listener():
+        with pg_engine.begin() as connection:
+            connection.execute(text(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                "WHERE query LIKE 'LISTEN%' AND pid <> pg_backend_pid()"
+            ))
+    
+    async def run():
+        wakeup = bus.subscribe(424242)
+        bus.start()
+        try:
+            await asyncio.sleep(0.5)
+            relayed = await woken(wakeup, lambda: commit(424242, 424243))
+            # The reconnected listener wakes every waiter, then relays commits again
+            caught_up = await woken(wakeup, drop_listener)
+            await asyncio.sleep(0.5)
+            relayed_again = await woken(wakeup, lambda: commit(424242))
+            return relayed, caught_up, relayed_again
+        finally:
+            bus.stop()
+            pg_engine.dispose()
+    
+    assert asyncio.run(run()) == (True, True, True)
+    assert len(notifies) == 2
+
+
+def test_notify_payloads_fit_postgres_limit():
+    """Test simulation ids are packed into as few NOTIFY payloads as fit"""
+    simulation_ids = set(range(1, 5000))
+    payloads = encode_notify_payloads(simulation_ids)
+    
+    assert encode_notify_payloads([3, 1, 3]) == ["1,3"]
+    assert len(payloads) > 1
+    assert all(len(payload) <= MAX_NOTIFY_PAYLOAD for payload in payloads)
+    assert set().union(*map(decode_notify_payload, payloads)) == simulation_ids